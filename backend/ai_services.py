@@ -1,10 +1,11 @@
-import requests
 import json
 from typing import Dict, Any, List
 import asyncio
 from datetime import datetime
 import logging
 
+from .llm_client import OllamaError, ollama_client
+
 logger = logging.getLogger(__name__)
 
 class LlamaAIService:
@@ -13,13 +14,12 @@ class LlamaAIService:
         self.model_name = "llama3.2:latest"
         self.mock_mode = True  # Enable mock mode for development
         
-    def _check_ollama_availability(self) -> bool:
-        """Check if Ollama is available"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+    async def _check_ollama_availability(self) -> bool:
+        """Check if Ollama is available, using the prober's cached state when it has one"""
+        cached = ollama_client.is_host_healthy(self.base_url)
+        if cached is not None:
+            return cached
+        return await ollama_client.check_host(self.base_url, timeout=5)
     
     async def _generate_mock_content(self, prompt: str, content_type: str = "general") -> str:
         """Generate mock content based on prompt and type"""
@@ -405,28 +405,23 @@ To begin working with {prompt}:
         """Generate content using Llama AI or fallback to mock"""
         try:
             # Check if Ollama is available
-            if not self.mock_mode and self._check_ollama_availability():
-                url = f"{self.base_url}/api/generate"
-                
-                payload = {
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "system": system_prompt or "You are a helpful AI assistant specialized in educational content.",
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": max_tokens,
-                        "top_p": 0.9
-                    }
-                }
-                
-                response = requests.post(url, json=payload, timeout=60)
-                
-                if response.status_code == 200:
-                    result = response.json()
+            if not self.mock_mode and await self._check_ollama_availability():
+                try:
+                    result = await ollama_client.generate(
+                        prompt,
+                        model=self.model_name,
+                        system=system_prompt or "You are a helpful AI assistant specialized in educational content.",
+                        options={
+                            "temperature": 0.7,
+                            "num_predict": max_tokens,
+                            "top_p": 0.9
+                        },
+                        host=self.base_url,
+                        timeout=60
+                    )
                     return result.get("response", "")
-                else:
-                    logger.error(f"Ollama API error: {response.status_code}")
+                except OllamaError as e:
+                    logger.error(f"Ollama API error: {e.status_code}")
                     return await self._generate_mock_content(prompt)
             else:
                 # Use mock content
@@ -0,0 +1,143 @@
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# Prompt budget for conversation history, in estimated tokens
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.environ.get("CHAT_CONTEXT_TOKEN_BUDGET", "1200"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.environ.get("CHAT_SUMMARY_TOKEN_BUDGET", "300"))
+# Upper bound on messages read for the recent window, whatever their size
+CHAT_CONTEXT_MAX_MESSAGES = int(os.environ.get("CHAT_CONTEXT_MAX_MESSAGES", "40"))
+
+# No single message may take more than this share of the window
+MESSAGE_TOKEN_CAP = max(CHAT_CONTEXT_TOKEN_BUDGET // 3, 1)
+SUMMARY_POINT_TOKEN_CAP = 40
+
+SPEAKERS = {"user": "Student", "ai": "Tutor"}
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(max_tokens * 4 - 1, 0)].rstrip() + "…"
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def summarize_message(message: Dict[str, Any]) -> str:
+    """Extractive summary line for one turn: the speaker and the turn's first sentence"""
+    first_sentence = _SENTENCE_END.split(_normalize(message.get("message", "")), 1)[0]
+    speaker = SPEAKERS.get(message.get("sender"), "Note")
+    return f"{speaker}: {clip_to_tokens(first_sentence, SUMMARY_POINT_TOKEN_CAP)}"
+
+
+def fold_summary(points: List[str], messages: List[Dict[str, Any]],
+                 budget: int = CHAT_SUMMARY_TOKEN_BUDGET) -> List[str]:
+    """Append summary lines for messages, then keep the newest lines that fit the budget"""
+    candidates = points + [summarize_message(message) for message in messages]
+    kept, used = [], 0
+    for point in reversed(candidates):
+        cost = estimate_tokens(point) + 1
+        if used + cost > budget:
+            break
+        kept.append(point)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+@dataclass
+class ConversationContext:
+    """Running summary of older turns plus the recent turns that fit the token budget"""
+    summary: List[str] = field(default_factory=list)
+    recent: List[Tuple[str, str]] = field(default_factory=list)  # (speaker, clipped text)
+    last_message_id: Optional[str] = None  # Newest message in the session when the context was built
+
+    def render(self) -> str:
+        blocks = []
+        if self.summary:
+            blocks.append("Summary of the earlier conversation:\n" + "\n".join(f"- {point}" for point in self.summary))
+        if self.recent:
+            blocks.append("Recent conversation:\n" + "\n".join(f"{speaker}: {text}" for speaker, text in self.recent))
+        return "\n\n".join(blocks)
+
+    def token_estimate(self) -> int:
+        return estimate_tokens(self.render())
+
+
+async def build_conversation_context(session: Dict[str, Any],
+                                     budget: int = CHAT_CONTEXT_TOKEN_BUDGET) -> ConversationContext:
+    """Build the history for the next tutor prompt with flat per-turn cost.
+
+    The newest messages are taken from the per-session timestamp index
+    until the token budget is spent. Messages that have slid out of that
+    window since the last turn are folded into the session's running
+    summary, which is stored on the session with the timestamp it covers,
+    so each turn only summarizes the delta.
+    """
+    session_id = session["id"]
+    summary = list(session.get("context_summary") or [])
+    summary_through = session.get("summary_through")
+
+    newest_first = await db.chat_messages.find(
+        {"session_id": session_id},
+        {"_id": 0, "id": 1, "sender": 1, "message": 1, "timestamp": 1}
+    ).sort("timestamp", -1).limit(CHAT_CONTEXT_MAX_MESSAGES).to_list(CHAT_CONTEXT_MAX_MESSAGES)
+
+    window, used = [], 0
+    for message in newest_first:
+        if summary_through is not None and message["timestamp"] <= summary_through:
+            break  # Already covered by the summary
+        text = clip_to_tokens(_normalize(message["message"]), MESSAGE_TOKEN_CAP)
+        cost = estimate_tokens(text) + 2
+        if used + cost > budget:
+            break
+        window.append(message | {"message": text})
+        used += cost
+    window.reverse()
+
+    if window:
+        # Fold everything between the summary's end and the window's start
+        condition: Dict[str, Any] = {"$lt": window[0]["timestamp"]}
+        if summary_through is not None:
+            condition["$gt"] = summary_through
+        slid_out = await db.chat_messages.find(
+            {"session_id": session_id, "timestamp": condition},
+            {"_id": 0, "sender": 1, "message": 1, "timestamp": 1}
+        ).sort("timestamp", 1).to_list(None)
+        if slid_out:
+            summary = fold_summary(summary, slid_out)
+            await _store_summary(session, summary, slid_out[-1]["timestamp"])
+
+    return ConversationContext(
+        summary=summary,
+        recent=[(SPEAKERS.get(message.get("sender"), "Note"), message["message"]) for message in window],
+        last_message_id=newest_first[0].get("id") if newest_first else None
+    )
+
+
+async def _store_summary(session: Dict[str, Any], summary: List[str], through: Any):
+    # Only advance the summary from the state it was computed against; a
+    # concurrent turn that got there first wins and this update is dropped.
+    # None also matches sessions stored before the field existed.
+    query = {"id": session["id"], "summary_through": session.get("summary_through")}
+    result = await db.learning_sessions.update_one(query, {"$set": {
+        "context_summary": summary,
+        "summary_through": through
+    }})
+    if result.matched_count == 0:
+        logger.info(f"Conversation summary for session {session['id']} was advanced concurrently")
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database import db
+
+logger = logging.getLogger(__name__)
+
+# Bytes of blob text kept in process; blobs never change, so entries never go stale
+CONTENT_BLOB_CACHE_BYTES = int(os.environ.get("CONTENT_BLOB_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+# Section fields kept in the shared body blob; everything else (id, title,
+# estimated_time) stays on the per-plan record next to the body reference
+SECTION_BODY_FIELDS = ("content", "code_examples", "key_concepts", "resources", "quiz_questions")
+
+
+def content_ref(data: str) -> str:
+    """Content address of a blob: the SHA-256 of its UTF-8 text"""
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class BlobCache:
+    """LRU of blob text by content address, bounded by the total UTF-8 size of the text"""
+
+    def __init__(self, max_bytes: int = CONTENT_BLOB_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # Text and its encoded size, so eviction does not re-encode
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+
+    def get(self, ref: str) -> Optional[str]:
+        entry = self._entries.get(ref)
+        if entry is None:
+            return None
+        self._entries.move_to_end(ref)
+        return entry[0]
+
+    def set(self, ref: str, data: str, size: Optional[int] = None):
+        """Keep data under ref; size is its UTF-8 length when the caller already has it"""
+        if ref in self._entries:
+            return
+        if size is None:
+            size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._entries[ref] = (data, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+
+
+blob_cache = BlobCache()
+
+
+async def store_blob(data: str) -> str:
+    """Store text once under its content address and return the address"""
+    ref = content_ref(data)
+    if blob_cache.get(ref) is None:
+        size = len(data.encode("utf-8"))
+        # Idempotent: identical content from any plan lands on the same record
+        await db.content_blobs.update_one(
+            {"id": ref},
+            {"$setOnInsert": {"id": ref, "data": data, "size": size}},
+            upsert=True
+        )
+        blob_cache.set(ref, data, size)
+    return ref
+
+
+async def load_blob(ref: str) -> str:
+    data = blob_cache.get(ref)
+    if data is None:
+        blob = await db.content_blobs.find_one({"id": ref}, {"_id": 0, "data": 1})
+        if blob is None:
+            logger.error(f"Content blob {ref} is missing")
+            return ""
+        data = blob["data"]
+        blob_cache.set(ref, data)
+    return data
+
+
+async def dehydrate_section(section: Dict[str, Any]) -> Dict[str, Any]:
+    """Move a section's body into a content-addressed blob and keep only a reference to it.
+
+    Code examples get blobs of their own, referenced from the body. The
+    body is serialized compactly in the section's own field order, so
+    identical sections in any number of plans share one blob. Sections
+    that are already dehydrated pass through unchanged.
+    """
+    if "body_ref" in section or not any(field in section for field in SECTION_BODY_FIELDS):
+        return section
+    body, record = {}, {}
+    for key, value in section.items():
+        if key not in SECTION_BODY_FIELDS:
+            record[key] = value
+            continue
+        if not body:
+            record["body_ref"] = None  # Placeholder keeps the body's position in the record
+        if key == "code_examples":
+            body["code_example_refs"] = [await store_blob(example) for example in value or []]
+        else:
+            body[key] = value
+    record["body_ref"] = await store_blob(json.dumps(body, separators=(",", ":"), ensure_ascii=False, default=str))
+    return record
+
+
+async def hydrate_section(section: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve a section's body reference back into its fields.
+
+    Sections stored inline (before blobs existed) pass through unchanged.
+    """
+    if "body_ref" not in section:
+        return section
+    body = json.loads(await load_blob(section["body_ref"]) or "{}")
+    hydrated = {}
+    for key, value in section.items():
+        if key != "body_ref":
+            hydrated[key] = value
+            continue
+        for field, field_value in body.items():
+            if field == "code_example_refs":
+                hydrated["code_examples"] = [await load_blob(ref) for ref in field_value]
+            else:
+                hydrated[field] = field_value
+    return hydrated
+
+
+async def dehydrate_chapters(chapters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {**chapter, "sections": [await dehydrate_section(section) for section in chapter.get("sections") or []]}
+        for chapter in chapters
+    ]
+
+
+async def hydrate_chapters(chapters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {**chapter, "sections": [await hydrate_section(section) for section in chapter.get("sections") or []]}
+        for chapter in chapters
+    ]
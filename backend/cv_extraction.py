@@ -0,0 +1,206 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # Optional dependency: PDFs are analyzed without text
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+# Worker pool and per-document limits for CV text extraction
+CV_EXTRACTION_WORKERS = int(os.environ.get("CV_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+CV_EXTRACTION_TIMEOUT_SECONDS = float(os.environ.get("CV_EXTRACTION_TIMEOUT_SECONDS", "15"))
+CV_PDF_MAX_PAGES = int(os.environ.get("CV_PDF_MAX_PAGES", "20"))
+CV_TEXT_MAX_CHARS = int(os.environ.get("CV_TEXT_MAX_CHARS", "200000"))
+# Largest word/document.xml accepted once decompressed (guards against zip bombs)
+DOCX_MAX_XML_BYTES = 20 * 1024 * 1024
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOC_TYPE = "application/msword"
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_LEGACY_TEXT_RUN = re.compile(rb"(?:[\x20-\x7e]\x00){4,}|[\x20-\x7e\t\r\n]{4,}")
+
+
+class CVExtractionError(Exception):
+    """Raised when a document cannot be read within the extraction limits"""
+
+
+class _DocumentTimeout(BaseException):
+    """Raised by the worker's alarm; a BaseException so parsers' broad except clauses let it through"""
+
+
+# Runs inside the worker processes
+
+def _on_alarm(signum, frame):
+    raise _DocumentTimeout()
+
+
+def _init_worker():
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def _extract_pdf(data: bytes, max_pages: int, max_chars: int) -> str:
+    reader = PdfReader(io.BytesIO(data))
+    if reader.is_encrypted:
+        reader.decrypt("")  # Many CVs are "encrypted" with an empty user password
+    parts, length = [], 0
+    for page in reader.pages[:max_pages]:
+        text = page.extract_text() or ""
+        parts.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return "\n".join(parts)
+
+
+def _extract_docx(data: bytes, max_chars: int) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        info = archive.getinfo("word/document.xml")
+        if info.file_size > DOCX_MAX_XML_BYTES:
+            raise ValueError("document.xml is too large")
+        xml = archive.read(info)
+
+    parts, length = [], 0
+    for _, element in ElementTree.iterparse(io.BytesIO(xml)):
+        tag = element.tag
+        if tag == f"{_WORD_NS}t" and element.text:
+            parts.append(element.text)
+            length += len(element.text)
+        elif tag == f"{_WORD_NS}tab":
+            parts.append("\t")
+        elif tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr", f"{_WORD_NS}p"):
+            parts.append("\n")
+            if tag == f"{_WORD_NS}p":
+                element.clear()
+        if length >= max_chars:
+            break
+    return "".join(parts)
+
+
+def _extract_legacy_doc(data: bytes) -> str:
+    # Binary Word 97-2003 files keep their text as cp1252 or UTF-16LE runs
+    # inside an OLE container; pulling out printable runs is enough for
+    # keyword analysis without a full parser
+    runs = []
+    for match in _LEGACY_TEXT_RUN.finditer(data):
+        run = match.group()
+        runs.append(run.decode("utf-16-le") if run[1:2] == b"\x00" else run.decode("latin-1"))
+    return "\n".join(runs)
+
+
+def _extract(kind: str, data: bytes, max_pages: int, max_chars: int, timeout: float) -> str:
+    """Worker entry point: extract text from one document before its alarm goes off"""
+    if hasattr(signal, "SIGALRM"):
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        if kind == "pdf":
+            text = _extract_pdf(data, max_pages, max_chars)
+        elif kind == "docx":
+            text = _extract_docx(data, max_chars)
+        else:
+            text = _extract_legacy_doc(data)
+    finally:
+        if hasattr(signal, "SIGALRM"):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return text[:max_chars]
+
+
+# Runs in the server process
+
+_pool: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily start the pool; spawned workers do not inherit the server's threads or sockets"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=CV_EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Kill a pool whose worker is stuck or died; the next call starts a fresh one"""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    for process in list(getattr(pool, "_processes", {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _document_kind(data: bytes, content_type: str) -> Optional[str]:
+    if content_type == PDF_TYPE:
+        return "pdf"
+    if content_type in (DOCX_TYPE, DOC_TYPE):
+        # Browsers label both Word formats loosely; the zip signature decides
+        return "docx" if data[:4] == b"PK\x03\x04" else "doc"
+    return None
+
+
+async def extract_cv_text(data: bytes, content_type: str) -> str:
+    """Extract the text of a PDF or Word CV in the extraction process pool.
+
+    Documents are handed to the pool only when a worker is free, so the
+    timeout covers the extraction itself; further uploads wait their turn
+    here without holding a worker. Each document gets
+    CV_EXTRACTION_TIMEOUT_SECONDS and at most CV_PDF_MAX_PAGES pages, so a
+    huge or malicious file costs one worker for a bounded time and never
+    blocks the event loop.
+    """
+    global _slots
+    kind = _document_kind(data, content_type)
+    if kind is None:
+        raise CVExtractionError(f"Unsupported document type {content_type}")
+    if kind == "pdf" and PdfReader is None:
+        logger.warning("pypdf is not installed; analyzing the PDF without its text")
+        return ""
+
+    if _slots is None:
+        _slots = asyncio.Semaphore(CV_EXTRACTION_WORKERS)
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        pool = _get_pool()
+        future = loop.run_in_executor(
+            pool, _extract, kind, data, CV_PDF_MAX_PAGES, CV_TEXT_MAX_CHARS, CV_EXTRACTION_TIMEOUT_SECONDS
+        )
+        try:
+            # The worker's own alarm normally fires first; this is the backstop
+            return await asyncio.wait_for(future, timeout=CV_EXTRACTION_TIMEOUT_SECONDS + 5)
+        except asyncio.TimeoutError:
+            logger.error("CV extraction worker did not stop after its timeout, restarting the pool")
+            _discard_pool(pool)
+            raise CVExtractionError("Document took too long to process")
+        except _DocumentTimeout:
+            raise CVExtractionError("Document took too long to process")
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise CVExtractionError("Document processing failed")
+        except Exception as e:
+            logger.warning(f"Could not extract text from {kind} upload: {str(e)}")
+            raise CVExtractionError("Could not read the document")
+
+
+def shutdown_extraction_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,83 @@
+import logging
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from .indexes import ensure_indexes
+from .mock_db import MockDB, disable_persistence, enable_persistence, in_memory_db
+from .persistence import PERSISTENCE_DIR, DurableJournal
+from .sqlite_store import SQLiteDB
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Storage backend shared by every route handler:
+#   memory - per-process in-memory database, optionally made durable with PERSISTENCE_DIR
+#   sqlite - one SQLite file in WAL mode, safe to share between uvicorn workers
+#   mongo  - MongoDB through Motor
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "memory").lower()
+SQLITE_PATH = os.environ.get("SQLITE_PATH", str(ROOT_DIR / "data" / "learning.db"))
+
+# For testing purposes, we'll use an in-memory database
+MOCK_DB = STORAGE_BACKEND not in ("sqlite", "mongo")
+
+client = None
+
+# Durable append-only log behind the in-memory database (see PERSISTENCE_DIR)
+durable_journal = None
+
+if STORAGE_BACKEND == "sqlite":
+    db = SQLiteDB(SQLITE_PATH)
+elif STORAGE_BACKEND == "mongo":
+    # MongoDB connection
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('DB_NAME', 'cybersecurity_learning_plans')
+    try:
+        client = AsyncIOMotorClient(mongo_url)
+        db = client[db_name]
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {str(e)}")
+        # Fallback to in-memory database
+        MOCK_DB = True
+        db = MockDB()
+else:
+    if STORAGE_BACKEND != "memory":
+        logger.warning(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}, using the in-memory database")
+    # Use in-memory database
+    db = MockDB()
+
+
+async def open_database():
+    """Startup hook: reconcile MongoDB indexes, or replay durable state into the in-memory database"""
+    global durable_journal
+    if client is not None:
+        try:
+            await ensure_indexes(db)
+        except Exception as e:
+            logger.error(f"Failed to reconcile MongoDB indexes: {str(e)}")
+        return
+    if not MOCK_DB:
+        return
+    if int(os.environ.get("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning("The in-memory database is per process; use STORAGE_BACKEND=sqlite with multiple workers")
+    if PERSISTENCE_DIR:
+        durable_journal = DurableJournal(PERSISTENCE_DIR)
+        enable_persistence(durable_journal)
+        durable_journal.start_compactor(in_memory_db)
+
+
+async def close_database():
+    """Shutdown hook: flush the journal or close the database connection"""
+    global durable_journal
+    if durable_journal is not None:
+        disable_persistence()
+        await durable_journal.close()
+        durable_journal = None
+    if isinstance(db, SQLiteDB):
+        db.close()
+    if client is not None:
+        client.close()
@@ -4,6 +4,7 @@ import uuid
 from datetime import datetime, timedelta
 import asyncio
 from .ai_services import ai_service
+from .database import db
 from .models import (
     RoadmapRequest, RoadmapResponse, LessonRequest, LessonResponse,
     AssessmentRequest, AssessmentResponse, MarketInsightsRequest, MarketInsightsResponse, MarketInsights,
@@ -12,14 +13,6 @@ from .models import (
 
 router = APIRouter(prefix="/api/v2", tags=["Enhanced AI Learning"])
 
-# In-memory storage for demo (replace with actual database)
-roadmaps_db = {}
-lessons_db = {}
-assessments_db = {}
-market_insights_db = {}
-labs_db = {}
-cloud_labs_db = {}
-
 @router.post("/roadmap/generate", response_model=RoadmapResponse)
 async def generate_enhanced_roadmap(request: RoadmapRequest):
     """Generate comprehensive AI-powered career roadmap"""
@@ -48,7 +41,7 @@ async def generate_enhanced_roadmap(request: RoadmapRequest):
         )
         
         # Store in database
-        roadmaps_db[roadmap_id] = roadmap
+        await db.roadmaps.insert_one(roadmap.dict())
         
         return roadmap
         
@@ -58,15 +51,17 @@ async def generate_enhanced_roadmap(request: RoadmapRequest):
 @router.get("/roadmap/{roadmap_id}", response_model=RoadmapResponse)
 async def get_roadmap(roadmap_id: str):
     """Get roadmap by ID"""
-    if roadmap_id not in roadmaps_db:
+    roadmap = await db.roadmaps.find_one({"id": roadmap_id})
+    if not roadmap:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
-    return roadmaps_db[roadmap_id]
+    return RoadmapResponse(**roadmap)
 
 @router.get("/roadmaps", response_model=List[RoadmapResponse])
 async def list_roadmaps():
     """List all roadmaps"""
-    return list(roadmaps_db.values())
+    roadmaps = await db.roadmaps.find().to_list(1000)
+    return [RoadmapResponse(**roadmap) for roadmap in roadmaps]
 
 @router.post("/lesson/generate", response_model=LessonResponse)
 async def generate_lesson(request: LessonRequest):
@@ -95,7 +90,7 @@ async def generate_lesson(request: LessonRequest):
         )
         
         # Store in database
-        lessons_db[lesson_id] = lesson
+        await db.lessons.insert_one(lesson.dict())
         
         return lesson
         
@@ -105,10 +100,11 @@ async def generate_lesson(request: LessonRequest):
 @router.get("/lesson/{lesson_id}", response_model=LessonResponse)
 async def get_lesson(lesson_id: str):
     """Get lesson by ID"""
-    if lesson_id not in lessons_db:
+    lesson = await db.lessons.find_one({"id": lesson_id})
+    if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     
-    return lessons_db[lesson_id]
+    return LessonResponse(**lesson)
 
 @router.post("/assessment/generate", response_model=AssessmentResponse)
 async def generate_assessment(request: AssessmentRequest):
@@ -135,7 +131,7 @@ async def generate_assessment(request: AssessmentRequest):
         )
         
         # Store in database
-        assessments_db[assessment_id] = assessment
+        await db.skill_assessments.insert_one(assessment.dict())
         
         return assessment
         
@@ -177,7 +173,7 @@ async def generate_market_insights(request: MarketInsightsRequest):
         )
         
         # Store in database
-        market_insights_db[insights_id] = insights
+        await db.market_insights.insert_one(insights.dict())
         
         return insights
         
@@ -214,7 +210,7 @@ async def generate_lab_exercise(request: LabExerciseRequest):
         )
         
         # Store in database
-        labs_db[lab_id] = lab
+        await db.lab_exercises.insert_one(lab.dict())
         
         return lab
         
@@ -245,7 +241,7 @@ async def create_cloud_lab(request: CloudLabRequest):
         )
         
         # Store in database
-        cloud_labs_db[lab_id] = lab_env
+        await db.cloud_labs.insert_one(lab_env.dict())
         
         return lab_env
         
@@ -255,18 +251,19 @@ async def create_cloud_lab(request: CloudLabRequest):
 @router.get("/cloud-lab/{lab_id}", response_model=CloudLabEnvironment)
 async def get_cloud_lab(lab_id: str):
     """Get cloud lab environment"""
-    if lab_id not in cloud_labs_db:
+    lab_env = await db.cloud_labs.find_one({"id": lab_id})
+    if not lab_env:
         raise HTTPException(status_code=404, detail="Cloud lab not found")
     
-    return cloud_labs_db[lab_id]
+    return CloudLabEnvironment(**lab_env)
 
 @router.delete("/cloud-lab/{lab_id}")
 async def delete_cloud_lab(lab_id: str):
     """Delete cloud lab environment"""
-    if lab_id not in cloud_labs_db:
+    result = await db.cloud_labs.delete_one({"id": lab_id})
+    if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Cloud lab not found")
     
-    del cloud_labs_db[lab_id]
     return {"message": "Cloud lab deleted successfully"}
 
 @router.get("/career-fields")
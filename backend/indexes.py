@@ -0,0 +1,141 @@
+import logging
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_id() -> IndexModel:
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+# MongoDB indexes declared per collection. Names are stable so that
+# ensure_indexes() can tell a changed declaration from an existing index.
+MONGO_INDEXES: Dict[str, List[IndexModel]] = {
+    "learning_plans": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING)], name="created_at_desc")
+    ],
+    "plan_summaries": [
+        _unique_id(),
+        IndexModel([("created_at", DESCENDING)], name="created_at_desc")
+    ],
+    "plan_chapters": [
+        IndexModel([("plan_id", ASCENDING), ("id", ASCENDING)], name="plan_id_id_unique", unique=True)
+    ],
+    "plan_sections": [
+        IndexModel([("plan_id", ASCENDING), ("id", ASCENDING)], name="plan_id_id_unique", unique=True),
+        IndexModel([("plan_id", ASCENDING), ("chapter_id", ASCENDING), ("position", ASCENDING)],
+                   name="plan_id_chapter_id_position")
+    ],
+    "content_blobs": [_unique_id()],
+    "assessments": [_unique_id()],
+    "assessment_results": [_unique_id()],
+    "learning_sessions": [
+        _unique_id(),
+        IndexModel([("plan_id", ASCENDING)], name="plan_id"),
+        IndexModel([("user_id", ASCENDING)], name="user_id")
+    ],
+    "chat_messages": [
+        _unique_id(),
+        # Chat history is keyset-paginated on (timestamp, id) within a session
+        IndexModel([("session_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)],
+                   name="session_id_timestamp_id")
+    ],
+    "user_progress": [
+        _unique_id(),
+        # One progress record per user; also makes concurrent upserts safe
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True)
+    ],
+    "achievements": [_unique_id()],
+    "cv_analyses": [_unique_id()],
+    "roadmaps": [_unique_id()],
+    "lessons": [_unique_id()],
+    "skill_assessments": [_unique_id()],
+    "market_insights": [_unique_id()],
+    "lab_exercises": [_unique_id()],
+    "cloud_labs": [_unique_id()]
+}
+
+
+# Index options compared by _same_index and carried over when an index is restored
+_INDEX_FLAGS = ("unique", "sparse")
+_INDEX_OPTIONS = _INDEX_FLAGS + ("expireAfterSeconds", "partialFilterExpression")
+
+
+def _same_index(existing: Dict[str, Any], declared: Dict[str, Any]) -> bool:
+    """Compare an index_information() entry with an IndexModel document"""
+    if [tuple(key) for key in existing["key"]] != list(declared["key"].items()):
+        return False
+    for flag in _INDEX_FLAGS:
+        if bool(existing.get(flag)) != bool(declared.get(flag)):
+            return False
+    for option in ("expireAfterSeconds", "partialFilterExpression"):
+        if existing.get(option) != declared.get(option):
+            return False
+    return True
+
+
+def _existing_model(name: str, existing: Dict[str, Any]) -> IndexModel:
+    """IndexModel recreating an index as index_information() describes it"""
+    options = {option: existing[option] for option in _INDEX_OPTIONS if option in existing}
+    return IndexModel([tuple(key) for key in existing["key"]], name=name, **options)
+
+
+async def _rebuild_index(collection, model: IndexModel, current: Dict[str, Any]):
+    """Replace an index whose declaration changed, restoring the old one if the new one cannot be built.
+
+    MongoDB cannot hold two indexes on the same keys, so the old index has
+    to go first; a failed build (e.g. duplicates under a new unique
+    constraint) must not leave the collection without it.
+    """
+    name = model.document["name"]
+    await collection.drop_index(name)
+    try:
+        await collection.create_indexes([model])
+    except Exception:
+        await collection.create_indexes([_existing_model(name, current)])
+        raise
+
+
+async def ensure_indexes(db, declarations: Dict[str, List[IndexModel]] = MONGO_INDEXES) -> Dict[str, int]:
+    """Create missing indexes and rebuild ones whose declaration changed.
+
+    Safe to run on every startup: indexes that already match are left
+    alone, and indexes that are not declared here are reported but never
+    dropped. A declaration that cannot be applied is logged and counted as
+    failed without stopping the reconciliation of the others.
+    """
+    created = rebuilt = failed = 0
+    for collection_name, models in declarations.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.error(f"Could not read indexes of {collection_name}: {str(e)}")
+            failed += len(models)
+            continue
+
+        for model in models:
+            declared = model.document
+            current = existing.get(declared["name"])
+            try:
+                if current is None:
+                    await collection.create_indexes([model])
+                    created += 1
+                elif not _same_index(current, declared):
+                    logger.info(f"Rebuilding index {collection_name}.{declared['name']}")
+                    await _rebuild_index(collection, model, current)
+                    created += 1
+                    rebuilt += 1
+            except Exception as e:
+                logger.error(f"Could not apply index {collection_name}.{declared['name']}: {str(e)}")
+                failed += 1
+
+        declared_names = {model.document["name"] for model in models} | {"_id_"}
+        for name in set(existing) - declared_names:
+            logger.warning(f"Index {collection_name}.{name} is not declared in MONGO_INDEXES")
+
+    logger.info(f"MongoDB indexes reconciled: {created} created ({rebuilt} rebuilt), {failed} failed")
+    return {"created": created, "rebuilt": rebuilt, "failed": failed}
@@ -0,0 +1,90 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text and collapse every whitespace run (including line breaks) to one space"""
+    return " ".join(text.lower().split())
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """Aho–Corasick automaton matching many keywords in one pass over a text.
+
+    The automaton is built once from the keyword list, so scanning costs
+    O(text length + matches) however many keywords there are. Matching is
+    case- and whitespace-insensitive, and only whole words count: a
+    keyword must not be preceded or followed by a letter, digit or
+    underscore, so 'ids' does not match inside 'bids'. Overlapping
+    keywords are all reported ('kali linux' also yields 'linux').
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        # State 0 is the root; each state has goto edges, a failure link and
+        # the keywords (by index) that end there, including via failure links
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen: Dict[str, int] = {}
+        for keyword in keywords:
+            keyword = normalize_text(keyword)
+            if keyword and keyword not in seen:
+                seen[keyword] = len(self.keywords)
+                self.keywords.append(keyword)
+                self._add(keyword, seen[keyword])
+        self._build_failure_links()
+
+    def _add(self, keyword: str, index: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] += (index,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (offset in the normalized text, keyword) for every whole-word match"""
+        text = normalize_text(text)
+        goto, fail, output, keywords = self._goto, self._fail, self._output, self.keywords
+        end_of_text = len(text) - 1
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            if position < end_of_text and _is_word_char(text[position + 1]):
+                continue
+            for index in output[state]:
+                keyword = keywords[index]
+                start = position - len(keyword) + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    yield start, keyword
+
+    def matches(self, text: str) -> Set[str]:
+        """Distinct keywords found in text"""
+        return {keyword for _, keyword in self.finditer(text)}
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Ollama Configuration - Try multiple possible host addresses
+# Since we're in a Kubernetes environment, we need to find the right host address
+# We'll try multiple common Docker host IP addresses in sequence
+OLLAMA_HOSTS = [
+    "http://host.docker.internal:11434",  # Docker Desktop for Mac/Windows
+    "http://172.17.0.1:11434",           # Common Docker bridge network gateway
+    "http://172.18.0.1:11434",           # Alternative Docker bridge network
+    "http://192.168.65.2:11434",         # Docker Desktop for Mac
+    "http://10.0.75.1:11434",            # Docker Desktop for Windows
+    "http://localhost:11434"             # Local machine (unlikely to work in container)
+]
+
+# Connection pool sizing for the shared HTTP client
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "20"))
+OLLAMA_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+
+# Background host prober: steady-state interval and backoff bounds (seconds)
+OLLAMA_PROBE_INTERVAL = float(os.environ.get("OLLAMA_PROBE_INTERVAL", "30"))
+OLLAMA_PROBE_BACKOFF_MIN = float(os.environ.get("OLLAMA_PROBE_BACKOFF_MIN", "1"))
+OLLAMA_PROBE_BACKOFF_MAX = float(os.environ.get("OLLAMA_PROBE_BACKOFF_MAX", "120"))
+OLLAMA_PROBE_TIMEOUT = float(os.environ.get("OLLAMA_PROBE_TIMEOUT", "2"))
+
+# How long Ollama keeps the model (and its KV cache) loaded after a request;
+# empty leaves the server default in place
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+
+class OllamaError(Exception):
+    """Raised when Ollama answers with a non-200 status code"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Ollama API error {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+class OllamaClient:
+    """Async Ollama client sharing one pooled keep-alive HTTP connection pool.
+
+    Every LLM call site in the backend goes through the module-level
+    ``ollama_client`` instance so that long generations never block the
+    event loop and connections to the Ollama host are reused.
+    """
+
+    def __init__(self, hosts: List[str], max_connections: int = OLLAMA_MAX_CONNECTIONS,
+                 max_keepalive: int = OLLAMA_MAX_KEEPALIVE):
+        self.hosts = list(hosts)
+        self.current_host = self.hosts[0]
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Cached discovery state, written only by probe_hosts()
+        self.healthy = False
+        self.latency_ms: Optional[float] = None
+        self.last_checked: Optional[datetime] = None
+        self.host_status: Dict[str, Dict[str, Any]] = {}
+        self.consecutive_failures = 0
+        self._prober_task: Optional[asyncio.Task] = None
+        self._reprobe_event: Optional[asyncio.Event] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the pooled client inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=httpx.Timeout(300.0, connect=5.0))
+        return self._client
+
+    async def check_host(self, host: str, timeout: float = OLLAMA_PROBE_TIMEOUT) -> bool:
+        """Return True if the given host answers the Ollama tags endpoint"""
+        try:
+            response = await self._get_client().get(f"{host}/api/tags", timeout=timeout)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def _probe_one(self, host: str) -> Dict[str, Any]:
+        """Probe a single host and measure its round-trip latency"""
+        started = time.perf_counter()
+        healthy = await self.check_host(host)
+        return {
+            "healthy": healthy,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2) if healthy else None,
+            "checked_at": datetime.utcnow()
+        }
+
+    async def probe_hosts(self) -> bool:
+        """Probe all candidate hosts concurrently and refresh the cached healthy host.
+
+        Hosts keep their configured priority: the first healthy host in
+        ``hosts`` wins, regardless of which one answered fastest.
+        """
+        results = await asyncio.gather(*(self._probe_one(host) for host in self.hosts))
+        self.host_status = dict(zip(self.hosts, results))
+        self.last_checked = datetime.utcnow()
+
+        for host, status in self.host_status.items():
+            if status["healthy"]:
+                if host != self.current_host or not self.healthy:
+                    logger.info(f"Using Ollama host {host} ({status['latency_ms']} ms)")
+                self.current_host = host
+                self.latency_ms = status["latency_ms"]
+                self.healthy = True
+                self.consecutive_failures = 0
+                return True
+
+        if self.healthy:
+            logger.warning("No healthy Ollama host found, keeping last known host")
+        self.healthy = False
+        self.latency_ms = None
+        self.consecutive_failures += 1
+        return False
+
+    def get_host(self) -> str:
+        """Return the cached host without any network I/O"""
+        return self.current_host
+
+    def is_host_healthy(self, host: str) -> Optional[bool]:
+        """Return the cached health of a host, or None if it has never been probed"""
+        status = self.host_status.get(host)
+        return status["healthy"] if status else None
+
+    def report_failure(self, host: str):
+        """Mark a host unhealthy after a failed request and wake the prober"""
+        status = self.host_status.get(host)
+        if status:
+            status["healthy"] = False
+        if host == self.current_host:
+            self.healthy = False
+        if self._reprobe_event is not None:
+            self._reprobe_event.set()
+
+    def next_probe_delay(self) -> float:
+        """Steady interval while healthy, exponential backoff while no host answers"""
+        if self.healthy:
+            return OLLAMA_PROBE_INTERVAL
+        backoff = OLLAMA_PROBE_BACKOFF_MIN * (2 ** max(self.consecutive_failures - 1, 0))
+        return min(backoff, OLLAMA_PROBE_BACKOFF_MAX)
+
+    def health_status(self) -> Dict[str, Any]:
+        """Snapshot of the cached discovery state for the health endpoint"""
+        return {
+            "healthy": self.healthy,
+            "host": self.current_host,
+            "latency_ms": self.latency_ms,
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            "consecutive_failures": self.consecutive_failures
+        }
+
+    async def _prober_loop(self):
+        while True:
+            delay = self.next_probe_delay()
+            try:
+                await asyncio.wait_for(self._reprobe_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            self._reprobe_event.clear()
+            try:
+                await self.probe_hosts()
+            except Exception as e:
+                logger.error(f"Ollama host probe failed: {str(e)}")
+
+    async def start_health_prober(self):
+        """Resolve the host once, then keep re-probing in the background"""
+        if self._prober_task is not None and not self._prober_task.done():
+            return
+        self._reprobe_event = asyncio.Event()
+        await self.probe_hosts()
+        self._prober_task = asyncio.create_task(self._prober_loop())
+
+    async def stop_health_prober(self):
+        if self._prober_task is not None:
+            self._prober_task.cancel()
+            try:
+                await self._prober_task
+            except asyncio.CancelledError:
+                pass
+            self._prober_task = None
+
+    def _generate_payload(self, prompt: str, model: str, options: Optional[Dict[str, Any]],
+                          system: Optional[str], stream: bool, context: Optional[Sequence[int]] = None,
+                          keep_alive: Optional[str] = None) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": options or {}
+        }
+        if system:
+            payload["system"] = system
+        if context:
+            # Token state returned by an earlier call; Ollama continues from it
+            payload["context"] = list(context)
+        keep_alive = OLLAMA_KEEP_ALIVE if keep_alive is None else keep_alive
+        if keep_alive:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    async def generate(self, prompt: str, *, model: str, options: Optional[Dict[str, Any]] = None,
+                       system: Optional[str] = None, host: Optional[str] = None,
+                       context: Optional[Sequence[int]] = None, keep_alive: Optional[str] = None,
+                       timeout: float = 300.0) -> Dict[str, Any]:
+        """Run a non-streaming /api/generate call and return the decoded JSON body.
+
+        Passing the ``context`` of an earlier response continues that
+        conversation instead of prefilling the whole prompt again.
+        """
+        response = await self._get_client().post(
+            f"{host or self.current_host}/api/generate",
+            json=self._generate_payload(prompt, model, options, system, stream=False,
+                                        context=context, keep_alive=keep_alive),
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            raise OllamaError(response.status_code, response.text)
+        return response.json()
+
+    async def stream_generate(self, prompt: str, *, model: str, options: Optional[Dict[str, Any]] = None,
+                              system: Optional[str] = None, host: Optional[str] = None,
+                              context: Optional[Sequence[int]] = None, keep_alive: Optional[str] = None,
+                              timeout: float = 300.0) -> AsyncIterator[Dict[str, Any]]:
+        """Run a streaming /api/generate call and yield each decoded NDJSON chunk.
+
+        The ``timeout`` bounds the wait between chunks rather than the whole
+        generation, so long curricula keep streaming as long as tokens flow.
+        The final chunk carries the ``context`` to continue from.
+        """
+        async with self._get_client().stream(
+            "POST",
+            f"{host or self.current_host}/api/generate",
+            json=self._generate_payload(prompt, model, options, system, stream=True,
+                                        context=context, keep_alive=keep_alive),
+            timeout=timeout
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise OllamaError(response.status_code, body.decode("utf-8", errors="replace"))
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(500, chunk["error"])
+                yield chunk
+                if chunk.get("done"):
+                    break
+
+    async def close(self):
+        """Stop the prober and close the pooled HTTP client"""
+        await self.stop_health_prober()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# Global Ollama client instance shared by all call sites
+ollama_client = OllamaClient(OLLAMA_HOSTS)
@@ -0,0 +1,145 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Scheduler configuration
+LLM_MAX_CONCURRENT_PER_HOST = int(os.environ.get("LLM_MAX_CONCURRENT_PER_HOST", "2"))
+LLM_MAX_QUEUE_DEPTH = int(os.environ.get("LLM_MAX_QUEUE_DEPTH", "32"))
+LLM_RETRY_AFTER_MAX = int(os.environ.get("LLM_RETRY_AFTER_MAX", "300"))
+
+
+class Priority(IntEnum):
+    """Generation priority classes; lower values are served first"""
+    CHAT = 0
+    ASSESSMENT = 1
+    PLAN = 2
+
+
+class QueueFullError(Exception):
+    """Raised when a host's wait queue is at its depth limit"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self):
+        self.active = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self.queued = 0  # Live waiters; cancelled ones stay in the heap until popped
+        self.avg_duration = 30.0  # EWMA of slot hold time in seconds
+
+
+class GenerationScheduler:
+    """Per-host concurrency cap with a priority wait queue in front of the LLM backend.
+
+    At most ``max_concurrent`` generations run against a host at once.
+    Further callers wait in a heap ordered by ``Priority`` (FIFO within a
+    class). When ``max_queue_depth`` callers are already waiting, new ones
+    are rejected with ``QueueFullError`` instead of queueing until they
+    time out.
+    """
+
+    def __init__(self, max_concurrent: int = LLM_MAX_CONCURRENT_PER_HOST,
+                 max_queue_depth: int = LLM_MAX_QUEUE_DEPTH):
+        self.max_concurrent = max_concurrent
+        self.max_queue_depth = max_queue_depth
+        self._hosts: Dict[str, _HostState] = {}
+        self._sequence = itertools.count()
+        self.rejected = 0
+        self.completed = {priority.name: 0 for priority in Priority}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def retry_after(self, host: str) -> int:
+        """Estimate seconds until a queued request would get a slot"""
+        state = self._state(host)
+        estimate = state.avg_duration * (state.queued + 1) / max(self.max_concurrent, 1)
+        return max(1, min(math.ceil(estimate), LLM_RETRY_AFTER_MAX))
+
+    def check_capacity(self, host: str):
+        """Raise QueueFullError if a new request for host would be rejected"""
+        state = self._state(host)
+        if state.active >= self.max_concurrent and state.queued >= self.max_queue_depth:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after(host))
+
+    async def acquire(self, host: str, priority: Priority):
+        state = self._state(host)
+        if state.active < self.max_concurrent and state.queued == 0:
+            state.active += 1
+            return
+
+        self.check_capacity(host)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (int(priority), next(self._sequence), future))
+        state.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed to us just as we were cancelled: pass it on
+                self.release(host)
+            else:
+                future.cancel()
+                state.queued -= 1
+            raise
+
+    def release(self, host: str):
+        state = self._state(host)
+        while state.waiters:
+            _, _, future = heapq.heappop(state.waiters)
+            if future.cancelled():
+                continue
+            # Hand the slot straight to the next waiter; active stays the same
+            state.queued -= 1
+            future.set_result(None)
+            return
+        state.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, host: str, priority: Priority):
+        """Hold one generation slot on host for the duration of the block"""
+        await self.acquire(host, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            state = self._state(host)
+            state.avg_duration = 0.8 * state.avg_duration + 0.2 * (time.monotonic() - started)
+            self.completed[priority.name] += 1
+            self.release(host)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent_per_host": self.max_concurrent,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "completed": dict(self.completed),
+            "hosts": {
+                host: {
+                    "active": state.active,
+                    "queued": state.queued,
+                    "avg_duration_seconds": round(state.avg_duration, 2)
+                }
+                for host, state in self._hosts.items()
+            }
+        }
+
+
+# Global scheduler shared by every generation path
+generation_scheduler = GenerationScheduler()
@@ -0,0 +1,123 @@
+import logging
+import os
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Per-session Ollama context configuration
+OLLAMA_SESSION_MAX_ENTRIES = int(os.environ.get("OLLAMA_SESSION_MAX_ENTRIES", "256"))
+OLLAMA_SESSION_TTL_SECONDS = float(os.environ.get("OLLAMA_SESSION_TTL_SECONDS", "1800"))  # 30 minutes
+# Past this many tokens a session starts over from the summarized history
+OLLAMA_SESSION_MAX_CONTEXT_TOKENS = int(os.environ.get("OLLAMA_SESSION_MAX_CONTEXT_TOKENS", "6144"))
+
+
+@dataclass
+class SessionContext:
+    """Ollama token state after a tutor reply, valid while that reply is the session's newest message"""
+    host: str
+    model: str
+    tokens: array
+    last_message_id: str
+    expires_at: float
+
+
+class OllamaSessionStore:
+    """LRU store of the ``context`` Ollama returns for each chat session.
+
+    A follow-up turn sends only the new message together with the stored
+    tokens, so the tutor preamble and history are not prefilled again. An
+    entry is only reused on the host and model that produced it and while
+    the reply it was stored with is still the newest message in the
+    session; anything else (eviction, expiry, a turn served by another
+    worker, a rejected context) falls back to a fresh prefill.
+    """
+
+    def __init__(self, max_entries: int = OLLAMA_SESSION_MAX_ENTRIES, ttl_seconds: float = OLLAMA_SESSION_TTL_SECONDS,
+                 max_context_tokens: int = OLLAMA_SESSION_MAX_CONTEXT_TOKENS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_context_tokens = max_context_tokens
+        self._entries: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized = 0
+        self.fallbacks = 0
+
+    def get(self, session_id: str, host: str, model: str, last_message_id: Optional[str]) -> Optional[array]:
+        """Return the session's tokens if they still describe its conversation on this host and model"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[session_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if (entry.host, entry.model, entry.last_message_id) != (host, model, last_message_id):
+            del self._entries[session_id]
+            self.stale += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry.tokens
+
+    def set(self, session_id: str, host: str, model: str, tokens: Optional[Sequence[int]], last_message_id: str):
+        """Remember the context returned with a reply, evicting the least recently used sessions"""
+        if self.max_entries <= 0:
+            return
+        if not tokens or len(tokens) > self.max_context_tokens:
+            if tokens:
+                self.oversized += 1
+            self._entries.pop(session_id, None)
+            return
+        self._entries[session_id] = SessionContext(
+            host=host,
+            model=model,
+            tokens=array("i", tokens),  # Token ids fit in 32 bits; a quarter of a list's footprint
+            last_message_id=last_message_id,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, session_id: str, reason: str = ""):
+        """Drop a session's tokens after Ollama rejected them"""
+        if self._entries.pop(session_id, None) is not None:
+            self.fallbacks += 1
+            logger.warning(f"Dropped Ollama context for session {session_id}: {reason}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_context_tokens": self.max_context_tokens,
+            "context_tokens": sum(len(entry.tokens) for entry in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "oversized": self.oversized,
+            "fallbacks": self.fallbacks
+        }
+
+
+# Global per-session context store for the tutor chat
+ollama_sessions = OllamaSessionStore()
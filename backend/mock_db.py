@@ -0,0 +1,671 @@
+import bisect
+import heapq
+import logging
+import operator
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Hash indexes declared per collection; every collection is indexed on "id".
+# A tuple declares a compound index answering equality on all of its fields.
+COLLECTION_INDEXES = {
+    "learning_plans": ["id"],
+    "plan_summaries": ["id"],
+    "assessments": ["id"],
+    "assessment_results": ["id"],
+    "learning_sessions": ["id", "plan_id", "user_id"],
+    "chat_messages": ["id", "session_id"],
+    "user_progress": ["id", "user_id"],
+    "achievements": ["id"],
+    "cv_analyses": ["id"],
+    "plan_chapters": [("plan_id", "id")],
+    "plan_sections": [("plan_id", "id"), ("plan_id", "chapter_id")],
+    "content_blobs": ["id"],
+    "roadmaps": ["id"],
+    "lessons": ["id"],
+    "skill_assessments": ["id"],
+    "market_insights": ["id"],
+    "lab_exercises": ["id"],
+    "cloud_labs": ["id"]
+}
+DEFAULT_INDEXES = ["id"]
+
+# Sorted secondary indexes per collection as (sort_field, partition_field).
+# A partitioned index keeps one ordered list per partition value, e.g. the
+# messages of each chat session ordered by timestamp. A tuple of sort fields
+# orders by each in turn, so (timestamp, id) gives messages sharing a
+# timestamp a stable order that keyset pages can resume from.
+COLLECTION_SORTED_INDEXES = {
+    "learning_plans": [("created_at", None)],
+    "plan_summaries": [("created_at", None)],
+    "chat_messages": [(("timestamp", "id"), "session_id")]
+}
+
+ASCENDING = 1
+DESCENDING = -1
+
+# Update operators understood by apply_update; paths are top-level field names
+UPDATE_OPERATORS = {"$set", "$setOnInsert", "$inc", "$push", "$addToSet"}
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+def index_key(document: Dict[str, Any], field: Union[str, Tuple[str, ...]]) -> Tuple[bool, Any]:
+    """(indexed, key) of a document, or of a query's equality fields, for a hash index"""
+    if isinstance(field, tuple):
+        if not all(name in document for name in field):
+            return False, None
+        value = tuple(document[name] for name in field)
+    else:
+        if field not in document:
+            return False, None
+        value = document[field]
+    return _is_hashable(value), value
+
+
+# Comparison operators accepted in query values, e.g. {"timestamp": {"$gt": since}}
+RANGE_OPERATORS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+
+def _not_equal(actual: Any, value: Any) -> bool:
+    # On an array field, $ne means the array does not contain the value
+    return value not in actual if isinstance(actual, list) else actual != value
+
+
+# Every operator a query value may use; {"$in": [...]} matches any of the listed values
+QUERY_OPERATORS = {**RANGE_OPERATORS, "$in": lambda actual, candidates: actual in candidates, "$ne": _not_equal}
+
+
+def is_operator_condition(value: Any) -> bool:
+    """True for a query value made only of operators; other $-operators are rejected"""
+    if not isinstance(value, dict) or not value or not all(isinstance(key, str) and key.startswith("$") for key in value):
+        return False
+    unsupported = set(value) - set(QUERY_OPERATORS)
+    if unsupported:
+        raise ValueError(f"Unsupported query operators: {sorted(unsupported)}")
+    return True
+
+
+def is_range_condition(value: Any) -> bool:
+    """True for an operator condition that only bounds the value, e.g. {"$gte": a, "$lt": b}"""
+    return is_operator_condition(value) and all(op in RANGE_OPERATORS for op in value)
+
+
+def _matches_condition(actual: Any, condition: Dict[str, Any]) -> bool:
+    try:
+        return all(QUERY_OPERATORS[op](actual, operand) for op, operand in condition.items())
+    except TypeError:
+        # Values of different types never compare equal or ordered, as in MongoDB
+        return False
+
+
+def matches_query(document: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    """Equality or operator match of every query field, Mongo style.
+
+    A missing field matches only None or a $ne condition. A top-level
+    "$or" holds a list of queries, at least one of which must match.
+    """
+    if not query:
+        return True
+    for key, value in query.items():
+        if key == "$or":
+            if not any(matches_query(document, branch) for branch in value):
+                return False
+            continue
+        if key not in document:
+            if value is None or (is_operator_condition(value) and set(value) == {"$ne"}):
+                continue  # A missing field equals None and is not equal to anything else
+            return False
+        if is_operator_condition(value):
+            if not _matches_condition(document[key], value):
+                return False
+        elif document[key] != value:
+            return False
+    return True
+
+
+def apply_projection(document: Optional[Dict[str, Any]], projection: Optional[Dict[str, Any]]):
+    """Mongo-style projection: either an inclusion or an exclusion of top-level fields"""
+    if document is None or not projection:
+        return document
+    included = [field for field, keep in projection.items() if keep and field != "_id"]
+    if included:
+        result = {field: document[field] for field in included if field in document}
+        if "_id" in document and projection.get("_id", 1):
+            result["_id"] = document["_id"]
+        return result
+    excluded = {field for field, keep in projection.items() if not keep}
+    return {field: value for field, value in document.items() if field not in excluded}
+
+
+def validate_update(update: Dict[str, Any]):
+    unsupported = set(update) - UPDATE_OPERATORS
+    if unsupported:
+        raise ValueError(f"Unsupported update operators: {sorted(unsupported)}")
+
+
+def _each(value: Any) -> List[Any]:
+    if isinstance(value, dict) and "$each" in value:
+        return list(value["$each"])
+    return [value]
+
+
+def apply_update(document: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> Dict[str, Any]:
+    """Return the top-level fields an update changes, with their new values.
+
+    The document itself is left untouched so stores can swap in an updated
+    copy. ``$setOnInsert`` only applies when ``inserting`` is True.
+    """
+    validate_update(update)
+    fields: Dict[str, Any] = {}
+
+    def current(field):
+        return fields[field] if field in fields else document.get(field)
+
+    fields.update(update.get("$set", {}))
+    if inserting:
+        fields.update(update.get("$setOnInsert", {}))
+    for field, amount in update.get("$inc", {}).items():
+        fields[field] = (current(field) or 0) + amount
+    for field, value in update.get("$push", {}).items():
+        fields[field] = list(current(field) or []) + _each(value)
+    for field, value in update.get("$addToSet", {}).items():
+        items = list(current(field) or [])
+        for item in _each(value):
+            if item not in items:
+                items.append(item)
+        fields[field] = items
+    return {field: value for field, value in fields.items() if field not in document or document[field] != value}
+
+
+def upsert_document(query: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the document an upsert inserts: the query's equality fields plus the update"""
+    document = {field: value for field, value in (query or {}).items() if not field.startswith("$")}
+    document.update(apply_update(document, update, inserting=True))
+    return document
+
+
+def sort_value(value: Any) -> Tuple[bool, Any]:
+    """Order missing/None values before everything else, as MongoDB does"""
+    return (value is not None, value)
+
+
+class SortedIndex:
+    """Ordered (sort values, document key) lists, optionally one per partition value"""
+
+    def __init__(self, fields: Union[str, Tuple[str, ...]], partition_field: Optional[str] = None):
+        self.fields = fields if isinstance(fields, tuple) else (fields,)
+        self.field = self.fields[0]  # Range conditions are resolved on the leading field
+        self.partition_field = partition_field
+        self.partitions: Dict[Any, List[Tuple[Tuple[bool, Any], int]]] = {}
+
+    def sort_values(self, document: Dict[str, Any]) -> Tuple[Tuple[bool, Any], ...]:
+        return tuple(sort_value(document.get(field)) for field in self.fields)
+
+    def _partition(self, document: Dict[str, Any]):
+        if self.partition_field is None:
+            return None, True
+        value = document.get(self.partition_field)
+        return value, self.partition_field in document and _is_hashable(value)
+
+    def add(self, key: int, document: Dict[str, Any]):
+        partition, indexed = self._partition(document)
+        if indexed:
+            entries = self.partitions.setdefault(partition, [])
+            bisect.insort(entries, (self.sort_values(document), key))
+
+    def remove(self, key: int, document: Dict[str, Any]):
+        partition, indexed = self._partition(document)
+        entries = self.partitions.get(partition) if indexed else None
+        if not entries:
+            return
+        entry = (self.sort_values(document), key)
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+            if not entries and self.partition_field is not None:
+                del self.partitions[partition]
+
+    def covers(self, query: Dict[str, Any]) -> bool:
+        """True if the query can be answered by walking one partition of this index"""
+        if self.partition_field is None:
+            return True
+        value = query.get(self.partition_field)
+        return value is not None and _is_hashable(value)
+
+    def entries_for(self, query: Dict[str, Any]) -> List[Tuple[Tuple[bool, Any], int]]:
+        partition = query.get(self.partition_field) if self.partition_field else None
+        return self.partitions.get(partition, [])
+
+    @staticmethod
+    def bounds(entries: List[Tuple[Tuple[Tuple[bool, Any], ...], int]], condition: Dict[str, Any]) -> Tuple[int, int]:
+        """[lo, hi) positions of the entries whose leading field satisfies a range condition, found by bisection"""
+        lo, hi = 0, len(entries)
+
+        def leading(entry):
+            return entry[0][0]
+
+        try:
+            for op, operand in condition.items():
+                probe = sort_value(operand)
+                if op == "$gt":
+                    lo = max(lo, bisect.bisect_right(entries, probe, key=leading))
+                elif op == "$gte":
+                    lo = max(lo, bisect.bisect_left(entries, probe, key=leading))
+                elif op == "$lt":
+                    hi = min(hi, bisect.bisect_left(entries, probe, key=leading))
+                elif op == "$lte":
+                    hi = min(hi, bisect.bisect_right(entries, probe, key=leading))
+        except TypeError:
+            return 0, 0
+        return lo, max(lo, hi)
+
+
+class DocumentStore:
+    """Documents of one collection plus hash indexes on the declared fields.
+
+    Documents live in an insertion-ordered dict keyed by an internal
+    sequence number, so deletes are O(1). Each index maps a field value to
+    the ordered set of document keys holding it, which turns equality
+    lookups on indexed fields into O(1) point lookups or O(k) bucket scans.
+    """
+
+    def __init__(self, name: str, indexed_fields: List[Union[str, Tuple[str, ...]]],
+                 sorted_indexes: Optional[List[Tuple[str, Optional[str]]]] = None):
+        self.name = name
+        self.documents: Dict[int, Dict[str, Any]] = {}
+        self.indexes: Dict[Any, Dict[Any, Dict[int, None]]] = {field: {} for field in indexed_fields}
+        self.sorted_indexes = [SortedIndex(field, partition) for field, partition in (sorted_indexes or [])]
+        self._next_key = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _index_add(self, key: int, document: Dict[str, Any]):
+        for field, index in self.indexes.items():
+            indexed, value = index_key(document, field)
+            if indexed:
+                index.setdefault(value, {})[key] = None
+        for sorted_index in self.sorted_indexes:
+            sorted_index.add(key, document)
+
+    def _index_remove(self, key: int, document: Dict[str, Any]):
+        for field, index in self.indexes.items():
+            indexed, value = index_key(document, field)
+            if indexed:
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.pop(key, None)
+                    if not bucket:
+                        del index[value]
+        for sorted_index in self.sorted_indexes:
+            sorted_index.remove(key, document)
+
+    def insert(self, document: Dict[str, Any]) -> int:
+        key = self._next_key
+        self._next_key += 1
+        self.documents[key] = document
+        self._index_add(key, document)
+        if journal is not None:
+            journal.record_insert(self.name, key, document)
+        return key
+
+    def remove(self, key: int):
+        self.discard(key)
+        if journal is not None:
+            journal.record_delete(self.name, key)
+
+    def set_fields(self, key: int, fields: Dict[str, Any]):
+        """Replace top-level fields of a stored document and journal the change"""
+        self.apply_fields(key, fields)
+        if journal is not None:
+            journal.record_set(self.name, key, fields)
+
+    # Replay primitives: mutate the store without journaling
+
+    def restore(self, key: int, document: Dict[str, Any]):
+        if key in self.documents:
+            self.discard(key)
+        self.documents[key] = document
+        self._index_add(key, document)
+        self._next_key = max(self._next_key, key + 1)
+
+    def discard(self, key: int):
+        document = self.documents.pop(key, None)
+        if document is not None:
+            self._index_remove(key, document)
+
+    def apply_fields(self, key: int, fields: Dict[str, Any]):
+        """Copy-on-write update so snapshots and readers never see a half-applied change"""
+        old = self.documents.get(key)
+        if old is None:
+            return
+        updated = dict(old)
+        updated.update(fields)
+        self._index_remove(key, old)
+        self.documents[key] = updated
+        self._index_add(key, updated)
+
+    def _candidate_keys(self, query: Optional[Dict[str, Any]]) -> Optional[Dict[int, None]]:
+        """Smallest index bucket that covers an equality in the query, or None for a full scan"""
+        best = None
+        for field, index in self.indexes.items():
+            indexed, value = index_key(query or {}, field)
+            if not indexed or None in (value if isinstance(field, tuple) else (value,)):
+                continue  # Documents missing the field match None but are not in its bucket
+            bucket = index.get(value, {})
+            if best is None or len(bucket) < len(best):
+                best = bucket
+                if not best:
+                    break
+        return best
+
+    def iter_matches(self, query: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (key, document) pairs matching query in insertion order"""
+        candidates = self._candidate_keys(query)
+        if candidates is None:
+            items = list(self.documents.items())
+        else:
+            items = [(key, self.documents[key]) for key in list(candidates)]
+        for key, document in items:
+            if matches_query(document, query):
+                yield key, document
+
+    def count(self, query: Optional[Dict[str, Any]] = None) -> int:
+        if not query:
+            return len(self.documents)
+        return sum(1 for _ in self.iter_matches(query))
+
+    def sorted_index_for(self, fields: Tuple[str, ...], query: Dict[str, Any]) -> Optional[SortedIndex]:
+        """A sorted index ordering by fields (or by fields followed by others) that covers the query"""
+        for sorted_index in self.sorted_indexes:
+            if sorted_index.fields[:len(fields)] == fields and sorted_index.covers(query):
+                return sorted_index
+        return None
+
+    def find_sorted(self, query: Dict[str, Any], sort_keys: List[Tuple[str, int]],
+                    skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Matching documents ordered by sort_keys, after skip, at most limit of them.
+
+        A sort in one direction on the fields of a covering sorted index (or
+        a prefix of them) walks the index from the matching end: O(log n + k)
+        when the query is fully answered by the index partition; otherwise
+        the walk filters as it goes. A range condition on the leading sort
+        field is resolved by bisection, so keyset pages cost the same as the
+        first page. An equality on a hash-indexed field whose bucket is
+        smaller than the index entries the walk would cover is answered from
+        that bucket instead. Without a usable index, a bounded page is
+        selected with a heap in O(n log k) instead of sorting every match.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        if len({direction for _, direction in sort_keys}) == 1:
+            sorted_index = self.sorted_index_for(tuple(field for field, _ in sort_keys), query)
+            if sorted_index is not None:
+                candidates = self._candidate_keys(query)
+                if candidates is None or len(candidates) >= len(sorted_index.entries_for(query)):
+                    return self._walk_sorted_index(sorted_index, query, sort_keys[0][1], skip, limit)
+
+        matches = [document for _, document in self.iter_matches(query)]
+        if len(sort_keys) == 1 and limit is not None:
+            field, direction = sort_keys[0]
+            select = heapq.nsmallest if direction == ASCENDING else heapq.nlargest
+            page = select(skip + limit, matches, key=lambda document: sort_value(document.get(field)))
+            return page[skip:]
+        # Multi-key sort: stable sorts from the least to the most significant key
+        for field, direction in reversed(sort_keys):
+            matches.sort(key=lambda document: sort_value(document.get(field)), reverse=direction == DESCENDING)
+        end = None if limit is None else skip + limit
+        return matches[skip:end]
+
+    def _walk_sorted_index(self, sorted_index: SortedIndex, query: Dict[str, Any], direction: int,
+                           skip: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+        entries = sorted_index.entries_for(query)
+        residual = {key: value for key, value in query.items() if key != sorted_index.partition_field}
+        lo, hi = 0, len(entries)
+        condition = residual.get(sorted_index.field)
+        if is_range_condition(condition):
+            # A range on the sort field narrows the walk to a contiguous slice of the index
+            lo, hi = sorted_index.bounds(entries, condition)
+            del residual[sorted_index.field]
+        if not residual:
+            # The index alone answers the query: slice the page directly
+            if direction == ASCENDING:
+                start = lo + skip
+                end = hi if limit is None else min(hi, start + limit)
+                page = entries[start:end]
+            else:
+                stop = hi - skip
+                start = lo if limit is None else max(stop - limit, lo)
+                page = entries[start:max(stop, lo)][::-1]
+            return [self.documents[key] for _, key in page]
+
+        results = []
+        positions = range(lo, hi) if direction == ASCENDING else range(hi - 1, lo - 1, -1)
+        for position in positions:
+            key = entries[position][1]
+            document = self.documents[key]
+            if not matches_query(document, residual):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            results.append(document)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+# In-memory database for testing: collection name -> indexed document store
+in_memory_db: Dict[str, DocumentStore] = {}
+
+# Optional DurableJournal receiving every write; see enable_persistence()
+journal = None
+
+
+def get_store(collection_name: str) -> DocumentStore:
+    store = in_memory_db.get(collection_name)
+    if store is None:
+        indexed_fields = COLLECTION_INDEXES.get(collection_name, DEFAULT_INDEXES)
+        store = in_memory_db[collection_name] = DocumentStore(
+            collection_name,
+            indexed_fields,
+            COLLECTION_SORTED_INDEXES.get(collection_name)
+        )
+    return store
+
+
+for _collection_name in COLLECTION_INDEXES:
+    get_store(_collection_name)
+
+
+def enable_persistence(durable_journal) -> int:
+    """Replay durable state into the stores and journal every later write"""
+    global journal
+    applied = durable_journal.load(in_memory_db, get_store)
+    journal = durable_journal
+    return applied
+
+
+def disable_persistence():
+    global journal
+    journal = None
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id: Any):
+        self.inserted_id = inserted_id
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids: List[Any]):
+        self.inserted_ids = inserted_ids
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, modified_count: int, upserted_id: Any = None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class MockCursor:
+    """Lazy Motor-style cursor: sort, skip and limit are recorded and applied in to_list"""
+
+    def __init__(self, collection: "MockCollection", query: Optional[Dict[str, Any]] = None,
+                 projection: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.sort_keys: List[Tuple[str, int]] = []
+        self.skip_count = 0
+        self.limit_count: Optional[int] = None
+
+    def sort(self, key_or_list: Union[str, List[Tuple[str, int]]], direction: int = ASCENDING):
+        # This is not an async method, it returns self
+        if isinstance(key_or_list, str):
+            self.sort_keys = [(key_or_list, direction)]
+        else:
+            self.sort_keys = list(key_or_list)
+        return self
+
+    def skip(self, n):
+        # This is not an async method, it returns self
+        self.skip_count = max(int(n), 0)
+        return self
+
+    def limit(self, n):
+        # This is not an async method, it returns self; 0 means no limit, as in pymongo
+        self.limit_count = int(n) or None
+        return self
+
+    async def to_list(self, length):
+        # This is an async method that returns the actual list
+        limit = self.limit_count
+        if length is not None:
+            limit = length if limit is None else min(limit, length)
+
+        store = self.collection.store
+        if self.sort_keys:
+            results = store.find_sorted(self.query, self.sort_keys, self.skip_count, limit)
+            return [apply_projection(document, self.projection) for document in results]
+
+        results = []
+        skip = self.skip_count
+        for _, document in store.iter_matches(self.query):
+            if skip:
+                skip -= 1
+                continue
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(apply_projection(document, self.projection))
+        return results
+
+
+class MockCollection:
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+        self.store = get_store(collection_name)
+
+    async def find_one(self, query=None, projection=None):
+        for _, document in self.store.iter_matches(query):
+            return apply_projection(document, projection)
+        return None
+
+    async def insert_one(self, document):
+        self.store.insert(document)
+        return InsertOneResult(document.get("id"))
+
+    async def insert_many(self, documents):
+        for document in documents:
+            self.store.insert(document)
+        return InsertManyResult([document.get("id") for document in documents])
+
+    async def delete_one(self, query):
+        for key, _ in self.store.iter_matches(query):
+            self.store.remove(key)
+            return DeleteResult(1)
+        return DeleteResult(0)
+
+    async def delete_many(self, query):
+        keys = [key for key, _ in self.store.iter_matches(query)]
+        for key in keys:
+            self.store.remove(key)
+        return DeleteResult(len(keys))
+
+    def _modify(self, query, update, upsert):
+        """Update the first match (or upsert) with no await in between, so it is atomic on the event loop.
+
+        Returns (document before, document after, upserted); before is None
+        when nothing matched.
+        """
+        validate_update(update)
+        for key, document in self.store.iter_matches(query):
+            fields = apply_update(document, update)
+            if fields:
+                self.store.set_fields(key, fields)
+            return document, self.store.documents[key], False
+        if upsert:
+            document = upsert_document(query, update)
+            self.store.insert(document)
+            return None, document, True
+        return None, None, False
+
+    async def update_one(self, query, update, upsert=False):
+        """Apply $set / $setOnInsert / $inc / $push / $addToSet to the first matching document"""
+        before, after, upserted = self._modify(query, update, upsert)
+        if upserted:
+            return UpdateResult(0, 0, after.get("id"))
+        if before is None:
+            return UpdateResult(0, 0)
+        return UpdateResult(1, int(after is not before))
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False):
+        """Update like update_one and return the document before it, or after it if return_document is truthy"""
+        before, after, _ = self._modify(query, update, upsert)
+        return after if return_document else before
+
+    def find(self, query=None, projection=None):
+        # This is not an async method, it returns a cursor
+        return MockCursor(self, query, projection)
+
+    async def count_documents(self, query):
+        return self.store.count(query)
+
+
+class MockDB:
+    def __init__(self):
+        self.learning_plans = MockCollection("learning_plans")
+        self.plan_summaries = MockCollection("plan_summaries")
+        self.plan_chapters = MockCollection("plan_chapters")
+        self.plan_sections = MockCollection("plan_sections")
+        self.content_blobs = MockCollection("content_blobs")
+        self.assessments = MockCollection("assessments")
+        self.assessment_results = MockCollection("assessment_results")
+        self.learning_sessions = MockCollection("learning_sessions")
+        self.chat_messages = MockCollection("chat_messages")
+        self.user_progress = MockCollection("user_progress")
+        self.achievements = MockCollection("achievements")
+        self.cv_analyses = MockCollection("cv_analyses")
+        self.roadmaps = MockCollection("roadmaps")
+        self.lessons = MockCollection("lessons")
+        self.skill_assessments = MockCollection("skill_assessments")
+        self.market_insights = MockCollection("market_insights")
+        self.lab_exercises = MockCollection("lab_exercises")
+        self.cloud_labs = MockCollection("cloud_labs")
+
+    def __getitem__(self, collection_name):
+        if hasattr(self, collection_name):
+            return getattr(self, collection_name)
+        return MockCollection(collection_name)
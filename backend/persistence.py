@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Durable storage configuration; persistence is disabled when PERSISTENCE_DIR is unset
+PERSISTENCE_DIR = os.environ.get("PERSISTENCE_DIR", "")
+PERSISTENCE_FSYNC = os.environ.get("PERSISTENCE_FSYNC", "false").lower() == "true"
+PERSISTENCE_SNAPSHOT_INTERVAL = float(os.environ.get("PERSISTENCE_SNAPSHOT_INTERVAL", "300"))
+PERSISTENCE_COMPACT_BYTES = int(os.environ.get("PERSISTENCE_COMPACT_BYTES", str(64 * 1024 * 1024)))
+
+SNAPSHOT_FILE = "snapshot.jsonl"
+SNAPSHOT_VERSION = 1
+
+
+def encode_value(value: Any) -> Any:
+    """Convert a document value to JSON, tagging datetimes so they round-trip"""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """Inverse of encode_value"""
+    if isinstance(value, dict):
+        if len(value) == 1 and "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+def dumps_document(document: Any) -> str:
+    return json.dumps(encode_value(document), ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_document(line: str) -> Any:
+    return decode_value(json.loads(line))
+
+
+class JournalCorruptError(Exception):
+    """Raised at startup when a WAL record other than the newest one cannot be read"""
+
+
+class DurableJournal:
+    """Write-ahead append log plus periodic compacted snapshots for the mock database.
+
+    Every insert, field update and delete is appended to the current
+    ``wal-<generation>.jsonl`` file before the call returns. Compaction
+    rotates to a new generation, writes every collection to
+    ``snapshot.jsonl`` in a worker thread, atomically renames it into place
+    and then deletes the WAL generations it covers. Startup replays the
+    snapshot followed by the newer WAL generations.
+    """
+
+    def __init__(self, data_dir: str, fsync: bool = PERSISTENCE_FSYNC):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.generation = 0
+        self._wal = None
+        self._wal_bytes = 0
+        self._compactor_task: Optional[asyncio.Task] = None
+        self._compacting = False
+
+    def _wal_path(self, generation: int) -> Path:
+        return self.data_dir / f"wal-{generation:08d}.jsonl"
+
+    def _wal_generations(self) -> List[int]:
+        generations = []
+        for path in self.data_dir.glob("wal-*.jsonl"):
+            try:
+                generations.append(int(path.stem.split("-", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(generations)
+
+    def _open_wal(self, generation: int):
+        if self._wal is not None:
+            self._wal.close()
+        self.generation = generation
+        path = self._wal_path(generation)
+        self._wal = open(path, "a", encoding="utf-8")
+        self._wal_bytes = path.stat().st_size
+
+    # Replay
+
+    def load(self, stores: Dict[str, Any], get_store) -> int:
+        """Replay snapshot and WAL into the document stores; returns the number of records applied"""
+        started = time.perf_counter()
+        applied = 0
+        first_generation = 0
+
+        snapshot_path = self.data_dir / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path, "r", encoding="utf-8") as snapshot:
+                header = json.loads(snapshot.readline() or "{}")
+                first_generation = header.get("next_generation", 0)
+                for line in snapshot:
+                    record = loads_document(line)
+                    get_store(record["c"]).restore(record["k"], record["d"])
+                    applied += 1
+
+        generations = [generation for generation in self._wal_generations() if generation >= first_generation]
+        for generation in generations:
+            applied += self._replay_wal(self._wal_path(generation), get_store, newest=generation == generations[-1])
+
+        self._open_wal(max(generations + [first_generation]))
+        logger.info(f"Replayed {applied} durable records in {time.perf_counter() - started:.2f}s")
+        return applied
+
+    def _replay_wal(self, path: Path, get_store, newest: bool) -> int:
+        applied = 0
+        intact = 0  # Bytes of complete records read so far
+        with open(path, "rb+") as wal:
+            for line in wal:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record has no terminating newline")
+                    record = loads_document(line.decode("utf-8"))
+                except ValueError as e:
+                    # Only the newest generation's final record can be torn by a crash
+                    # mid-write. Anything else is corruption: dropping the rest of the
+                    # file would leave later generations applied on top of a gap.
+                    if not newest or wal.read(1):
+                        raise JournalCorruptError(f"Unreadable record at byte {intact} of {path.name}: {e}") from e
+                    # Cut it off so records appended after recovery start on a line
+                    # of their own instead of being glued to the fragment.
+                    logger.warning(f"Discarding truncated record at byte {intact} of {path.name}")
+                    wal.truncate(intact)
+                    break
+                intact += len(line)
+                store = get_store(record["c"])
+                if record["op"] == "i":
+                    store.restore(record["k"], record["d"])
+                elif record["op"] == "s":
+                    store.apply_fields(record["k"], record["f"])
+                elif record["op"] == "d":
+                    store.discard(record["k"])
+                applied += 1
+        return applied
+
+    # Write-ahead logging
+
+    def _append(self, record: Dict[str, Any]):
+        line = dumps_document(record) + "\n"
+        self._wal.write(line)
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_bytes += len(line.encode("utf-8"))
+
+    def record_insert(self, collection: str, key: int, document: Dict[str, Any]):
+        self._append({"op": "i", "c": collection, "k": key, "d": document})
+
+    def record_set(self, collection: str, key: int, fields: Dict[str, Any]):
+        self._append({"op": "s", "c": collection, "k": key, "f": fields})
+
+    def record_delete(self, collection: str, key: int):
+        self._append({"op": "d", "c": collection, "k": key})
+
+    # Compaction
+
+    def needs_compaction(self) -> bool:
+        return self._wal_bytes >= PERSISTENCE_COMPACT_BYTES
+
+    async def compact(self, stores: Dict[str, Any]):
+        """Write a snapshot of all stores and drop the WAL generations it covers"""
+        if self._compacting:
+            return
+        self._compacting = True
+        try:
+            # Freeze a consistent view and start a new WAL generation in one step
+            # on the event loop; documents are replaced, never mutated, on update.
+            view = [(name, list(store.documents.items())) for name, store in stores.items()]
+            covered = self.generation
+            self._open_wal(covered + 1)
+            await asyncio.to_thread(self._write_snapshot, view, covered + 1)
+            for generation in self._wal_generations():
+                if generation <= covered:
+                    self._wal_path(generation).unlink(missing_ok=True)
+            logger.info(f"Compacted durable store into snapshot (next WAL generation {covered + 1})")
+        finally:
+            self._compacting = False
+
+    def _write_snapshot(self, view, next_generation: int):
+        temporary = self.data_dir / f"{SNAPSHOT_FILE}.tmp"
+        with open(temporary, "w", encoding="utf-8") as snapshot:
+            snapshot.write(json.dumps({"version": SNAPSHOT_VERSION, "next_generation": next_generation}) + "\n")
+            for name, items in view:
+                for key, document in items:
+                    snapshot.write(dumps_document({"c": name, "k": key, "d": document}) + "\n")
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, self.data_dir / SNAPSHOT_FILE)
+
+    async def _compactor_loop(self, stores: Dict[str, Any]):
+        last_snapshot = time.monotonic()
+        while True:
+            await asyncio.sleep(min(PERSISTENCE_SNAPSHOT_INTERVAL, 10))
+            due = time.monotonic() - last_snapshot >= PERSISTENCE_SNAPSHOT_INTERVAL and self._wal_bytes > 0
+            if due or self.needs_compaction():
+                try:
+                    await self.compact(stores)
+                    last_snapshot = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Durable store compaction failed: {str(e)}")
+
+    def start_compactor(self, stores: Dict[str, Any]):
+        if self._compactor_task is None or self._compactor_task.done():
+            self._compactor_task = asyncio.create_task(self._compactor_loop(stores))
+
+    async def close(self):
+        if self._compactor_task is not None:
+            self._compactor_task.cancel()
+            try:
+                await self._compactor_task
+            except asyncio.CancelledError:
+                pass
+            self._compactor_task = None
+        if self._wal is not None:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._wal.close()
+            self._wal = None
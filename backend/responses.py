@@ -0,0 +1,204 @@
+import hashlib
+import json
+import math
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Hashable, Optional
+from uuid import UUID
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .compression import encoded_etag, identity_etag, negotiate_encoding, precompress
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: fall back to the standard library encoder
+    orjson = None
+
+# Bytes of rendered documents kept in process
+RENDERED_CACHE_MAX_BYTES = int(os.environ.get("RENDERED_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def _encode_default(value: Any) -> Any:
+    """Types the encoders do not handle natively, converted the way jsonable_encoder would"""
+    if isinstance(value, BaseModel):
+        # Models serialize their own fields (e.g. UTC datetimes as "Z"), so defer to them
+        return jsonable_encoder(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """Copy of value with NaN and infinities replaced by None, as orjson writes them"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, BaseModel):
+        return _finite(jsonable_encoder(value))
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _dump_json_stdlib(content: Any) -> str:
+    return json.dumps(
+        content,
+        default=_encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    )
+
+
+def dump_json(content: Any) -> bytes:
+    """Serialize a response body; datetimes and pydantic models are handled directly.
+
+    NaN and infinities become null with either encoder, so a body does not
+    depend on whether orjson is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        text = _dump_json_stdlib(content)
+    except ValueError:
+        # Rare: only bodies holding a non-finite float pay for the extra pass
+        text = _dump_json_stdlib(_finite(content))
+    return text.encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    As the app's default response class it only replaces the final
+    rendering step; handlers that return one directly also skip FastAPI's
+    jsonable_encoder pass over the content.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a representation identified by its version or content parts"""
+    return f'"{hashlib.blake2b(dump_json(parts), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> Optional[str]:
+    """If-None-Match check using the weak comparison RFC 9110 prescribes for GET.
+
+    The tags of the compressed variants of etag (see encoded_etag) match
+    too. Returns the client's matching tag, which the 304 must carry so the
+    cache can tell which stored variant it refreshes, or None.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if identity_etag(tag) == etag:
+            return tag
+    return None
+
+
+def caching_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """304 answer to a matching If-None-Match; no body is built"""
+    # Same Vary as the 200 it stands in for, which may have been compressed
+    headers = {**caching_headers(etag, cache_control), "Vary": "Accept-Encoding"}
+    return Response(status_code=304, headers=headers)
+
+
+@dataclass
+class RenderedDocument:
+    """Serialized body of a stored document at one version, with its precompressed variants"""
+    body: bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content: Any) -> "RenderedDocument":
+        body = dump_json(content)
+        return cls(body=body, variants=precompress(body))
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in self.variants.values())
+
+    def response(self, request: Optional[Request] = None, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        """Serve the variant the client accepts; the compression middleware leaves it as is"""
+        headers = dict(headers or {})
+        body = self.body
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = negotiate_encoding(request.headers.get("accept-encoding")) if request is not None else None
+            if encoding in self.variants:
+                body = self.variants[encoding]
+                headers["Content-Encoding"] = encoding
+                if "ETag" in headers:
+                    headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+        return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+class RenderedDocumentCache:
+    """LRU of rendered documents, bounded by total size including compressed variants.
+
+    Keys must include the document's version (e.g. its updated_at), so an
+    update makes the old entry unreachable rather than stale.
+    """
+
+    def __init__(self, max_bytes: int = RENDERED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, RenderedDocument]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[RenderedDocument]:
+        document = self._entries.get(key)
+        if document is not None:
+            self._entries.move_to_end(key)
+        return document
+
+    def render(self, key: Hashable, content: Any) -> RenderedDocument:
+        """Serialize and precompress content and keep the result under key"""
+        document = RenderedDocument.build(content)
+        size = document.size
+        if size > self.max_bytes:
+            return document
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self._entries[key] = document
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+        return document
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+
+# Global cache of rendered plan documents
+rendered_documents = RenderedDocumentCache()
@@ -1,24 +1,37 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Form
 from fastapi.responses import StreamingResponse, JSONResponse
+from pymongo import ReturnDocument
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Mapping, Tuple
 import uuid
-from datetime import datetime
-import requests
+from dataclasses import dataclass
+from types import MappingProxyType
+from datetime import datetime, timezone
 import asyncio
+import httpx
 import json
 import re
-import tempfile
-import shutil
 
 # Import enhanced AI services and routes
 from backend.ai_services import ai_service
+from backend.database import close_database, db, open_database
+from backend.chat_context import ConversationContext, build_conversation_context
+from backend.llm_client import OLLAMA_HOSTS, OllamaError, ollama_client
+from backend.llm_cache import generation_flight, llm_cache
+from backend.llm_sessions import ollama_sessions
+from backend.keyword_matcher import KeywordMatcher
+from backend.uploads import receive_file
+from backend.cv_extraction import CVExtractionError, extract_cv_text, shutdown_extraction_pool
+from backend.content_store import dehydrate_chapters, hydrate_chapters, hydrate_section
+from backend.responses import (FastJSONResponse, RenderedDocument, caching_headers, etag_matches, make_etag,
+                               not_modified, rendered_documents)
+from backend.compression import CompressionMiddleware
+from backend.llm_scheduler import Priority, QueueFullError, generation_scheduler
 from backend.enhanced_routes import router as enhanced_router
 
 # CV Analysis Models
@@ -30,16 +43,6 @@ class CVAnalysisResult(BaseModel):
     recommended_duration: int = 4
     recommendations: Dict[str, List[str]] = {}
 
-# Mock database for this example (replace with actual database in production)
-assessments_db = {}
-assessment_results_db = {}
-learning_plans_db = {}
-learning_sessions_db = {}
-chat_messages_db = {}
-user_progress_db = {}
-achievements_db = {}
-cv_analyses = {}
-
 # CV Analysis Models
 class CVAnalysisResult(BaseModel):
     skills: List[str] = []
@@ -59,268 +62,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# For testing purposes, we'll use an in-memory database
-MOCK_DB = True  # Set to False in production
-
-# In-memory database for testing
-in_memory_db = {
-    "learning_plans": [],
-    "assessments": [],
-    "assessment_results": [],
-    "learning_sessions": [],
-    "chat_messages": [],
-    "user_progress": [],
-    "achievements": [],
-    "cv_analyses": []  # For storing CV analysis results
-}
-
-class MockCollection:
-    def __init__(self, collection_name):
-        self.collection_name = collection_name
-        
-    async def find_one(self, query=None):
-        if query is None:
-            return None
-            
-        collection_data = in_memory_db.get(self.collection_name, [])
-        for item in collection_data:
-            if query.get("id") and item.get("id") == query.get("id"):
-                return item
-            # Support other query fields
-            match = True
-            for key, value in query.items():
-                if key in item and item[key] != value:
-                    match = False
-                    break
-            if match:
-                return item
-        return None
-        
-    async def insert_one(self, document):
-        if self.collection_name in in_memory_db:
-            in_memory_db[self.collection_name].append(document)
-            
-    async def delete_one(self, query):
-        if self.collection_name in in_memory_db:
-            collection_data = in_memory_db[self.collection_name]
-            for i, item in enumerate(collection_data):
-                match = True
-                for key, value in query.items():
-                    if key in item and item[key] != value:
-                        match = False
-                        break
-                if match:
-                    del collection_data[i]
-                    return type('obj', (object,), {'deleted_count': 1})
-            return type('obj', (object,), {'deleted_count': 0})
-            
-    def find(self, query=None):
-        # This is not an async method, it returns self
-        self.query = query  # Store the query for later use in to_list
-        return self
-            
-    def sort(self, field, direction):
-        # This is not an async method, it returns self
-        return self
-            
-    def skip(self, n):
-        # This is not an async method, it returns self
-        return self
-            
-    def limit(self, n):
-        # This is not an async method, it returns self
-        return self
-            
-    async def to_list(self, length):
-        # This is an async method that returns the actual list
-        collection_data = in_memory_db.get(self.collection_name, [])
-        
-        # Apply query filter if it exists
-        if hasattr(self, 'query') and self.query:
-            filtered_data = []
-            for item in collection_data:
-                match = True
-                for key, value in self.query.items():
-                    if key in item and item[key] != value:
-                        match = False
-                        break
-                if match:
-                    filtered_data.append(item)
-            return filtered_data[:length]
-        
-        return collection_data[:length]
-            
-    async def count_documents(self, query):
-        collection_data = in_memory_db.get(self.collection_name, [])
-        if not query:
-            return len(collection_data)
-        
-        count = 0
-        for item in collection_data:
-            match = True
-            for key, value in query.items():
-                if key in item and item[key] != value:
-                    match = False
-                    break
-            if match:
-                count += 1
-        return count
-
-class MockDB:
-    def __init__(self):
-        self.learning_plans = MockCollection("learning_plans")
-        self.assessments = MockCollection("assessments")
-        self.assessment_results = MockCollection("assessment_results")
-        self.learning_sessions = MockCollection("learning_sessions")
-        self.chat_messages = MockCollection("chat_messages")
-        self.user_progress = MockCollection("user_progress")
-        self.achievements = MockCollection("achievements")
-        
-    def __getitem__(self, collection_name):
-        if hasattr(self, collection_name):
-            return getattr(self, collection_name)
-        return MockCollection(collection_name)
-
-if MOCK_DB:
-    # Use in-memory database
-    db = MockDB()
-else:
-    # MongoDB connection
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    db_name = os.environ.get('DB_NAME', 'cybersecurity_learning_plans')
-    try:
-        client = AsyncIOMotorClient(mongo_url)
-        db = client[db_name]
-    except Exception as e:
-        logger.error(f"Failed to connect to MongoDB: {str(e)}")
-        # Fallback to in-memory database
-        MOCK_DB = True
-        db = MockDB()
+# The database (in-memory, SQLite or MongoDB) is selected by STORAGE_BACKEND in backend/database.py
 
 # Create the main app without a prefix
-app = FastAPI(title="Cybersecurity Learning Plans API", version="1.0.0")
+app = FastAPI(title="Cybersecurity Learning Plans API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# CV uploads
+CV_MAX_BYTES = 5 * 1024 * 1024
+CV_ALLOWED_TYPES = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'text/plain']
+
+# The body is parsed by receive_file() rather than an UploadFile parameter,
+# so the multipart schema is declared here for the API docs
+CV_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
 # CV Upload endpoint
-@api_router.post("/analyze-cv")
-async def analyze_cv(file: UploadFile = File(...)):
+@api_router.post("/analyze-cv", openapi_extra=CV_UPLOAD_OPENAPI)
+async def analyze_cv(request: Request):
     """Analyze uploaded CV/Resume for cybersecurity skills and experience"""
     try:
-        # Validate file type
-        allowed_types = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'text/plain']
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Invalid file type. Only PDF, DOC, DOCX, and TXT files are supported")
+        # Stream the upload, validating file type and size (max 5MB) as it arrives
+        file = await receive_file(
+            request,
+            "file",
+            max_bytes=CV_MAX_BYTES,
+            allowed_types=CV_ALLOWED_TYPES,
+            too_large_detail="File too large. Maximum 5MB allowed",
+            invalid_type_detail="Invalid file type. Only PDF, DOC, DOCX, and TXT files are supported"
+        )
         
-        # Validate file size (max 5MB)
-        content = await file.read()
-        if len(content) > 5 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large. Maximum 5MB allowed")
+        try:
+            # Extract text based on file type; PDF and Word parsing runs in the extraction pool
+            if file.content_type == 'text/plain':
+                extracted_text = file.file.read().decode('utf-8', errors='ignore')
+            else:
+                extracted_text = await extract_cv_text(file.file.read(), file.content_type)
+        except CVExtractionError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        finally:
+            file.close()
+        
+        # Analyze the extracted text
+        analysis_result = analyze_cv_text(extracted_text)
+        
+        # Store analysis result
+        cv_analysis_id = str(uuid.uuid4())
+        cv_analysis = {
+            "id": cv_analysis_id,
+            "filename": file.filename,
+            "analysis": analysis_result.dict(),
+            "analyzed_at": datetime.utcnow().isoformat()
+        }
         
-        # Reset file pointer
-        await file.seek(0)
+        # Store analysis result
+        await db.cv_analyses.insert_one(cv_analysis)
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file.filename.split('.')[-1]}") as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
+        return {
+            "analysis_id": cv_analysis_id,
+            "filename": file.filename,
+            **analysis_result.dict()
+        }
         
-        try:
-            # Extract text based on file type
-            extracted_text = ""
-            if file.content_type == 'application/pdf':
-                extracted_text = extract_text_from_pdf(tmp_file_path)
-            elif file.content_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-                extracted_text = extract_text_from_doc(tmp_file_path)
-            else:  # text/plain
-                with open(tmp_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    extracted_text = f.read()
-            
-            # Analyze the extracted text
-            analysis_result = analyze_cv_text(extracted_text)
-            
-            # Store analysis result
-            cv_analysis_id = str(uuid.uuid4())
-            cv_analysis = {
-                "id": cv_analysis_id,
-                "filename": file.filename,
-                "analysis": analysis_result.dict(),
-                "analyzed_at": datetime.utcnow().isoformat()
-            }
-            
-            # Store in mock database
-            in_memory_db["cv_analyses"].append(cv_analysis)
-            
-            return {
-                "analysis_id": cv_analysis_id,
-                "filename": file.filename,
-                **analysis_result.dict()
-            }
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(tmp_file_path)
-            except:
-                pass
-                
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing CV: {str(e)}")
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF file using simple text extraction"""
-    try:
-        # Simplified PDF text extraction (in production, use pdfminer or PyPDF2)
-        with open(file_path, 'rb') as file:
-            # For now, return empty string and use filename for basic analysis
-            return ""
-    except:
-        return ""
-
-def extract_text_from_doc(file_path: str) -> str:
-    """Extract text from DOC/DOCX file"""
-    try:
-        # Simplified DOC text extraction (in production, use python-docx)
-        with open(file_path, 'rb') as file:
-            # For now, return empty string and use filename for basic analysis
-            return ""
-    except:
-        return ""
+# Cybersecurity skills keywords
+CYBERSEC_SKILLS = {
+    'network_security': ['network security', 'firewall', 'vpn', 'intrusion detection', 'ids', 'ips', 'network monitoring'],
+    'penetration_testing': ['penetration testing', 'pen testing', 'ethical hacking', 'vulnerability assessment', 'metasploit', 'burp suite', 'nmap'],
+    'incident_response': ['incident response', 'forensics', 'malware analysis', 'threat hunting', 'soc', 'siem'],
+    'compliance': ['compliance', 'audit', 'iso 27001', 'nist', 'gdpr', 'hipaa', 'pci dss'],
+    'cloud_security': ['cloud security', 'aws security', 'azure security', 'gcp security', 'devops', 'devsecops'],
+    'programming': ['python', 'powershell', 'bash', 'javascript', 'c++', 'java', 'sql', 'scripting'],
+    'tools': ['wireshark', 'splunk', 'qradar', 'nessus', 'openvas', 'kali linux', 'windows', 'linux']
+}
+
+# Experience level keywords
+EXPERIENCE_KEYWORDS = {
+    'senior': ['senior', 'lead', 'manager', 'director', 'architect', 'principal', 'expert'],
+    'mid': ['analyst', 'engineer', 'specialist', 'consultant', 'administrator'],
+    'junior': ['junior', 'associate', 'intern', 'trainee', 'entry', 'assistant']
+}
+
+# One automaton over both taxonomies, built at import
+CV_KEYWORD_MATCHER = KeywordMatcher(
+    keyword
+    for taxonomy in (CYBERSEC_SKILLS, EXPERIENCE_KEYWORDS)
+    for keywords in taxonomy.values()
+    for keyword in keywords
+)
 
 def analyze_cv_text(text: str) -> CVAnalysisResult:
     """Analyze extracted text for cybersecurity skills and experience"""
     
-    # Cybersecurity skills keywords
-    cybersec_skills = {
-        'network_security': ['network security', 'firewall', 'vpn', 'intrusion detection', 'ids', 'ips', 'network monitoring'],
-        'penetration_testing': ['penetration testing', 'pen testing', 'ethical hacking', 'vulnerability assessment', 'metasploit', 'burp suite', 'nmap'],
-        'incident_response': ['incident response', 'forensics', 'malware analysis', 'threat hunting', 'soc', 'siem'],
-        'compliance': ['compliance', 'audit', 'iso 27001', 'nist', 'gdpr', 'hipaa', 'pci dss'],
-        'cloud_security': ['cloud security', 'aws security', 'azure security', 'gcp security', 'devops', 'devsecops'],
-        'programming': ['python', 'powershell', 'bash', 'javascript', 'c++', 'java', 'sql', 'scripting'],
-        'tools': ['wireshark', 'splunk', 'qradar', 'nessus', 'openvas', 'kali linux', 'windows', 'linux']
-    }
-    
-    # Experience level keywords
-    experience_keywords = {
-        'senior': ['senior', 'lead', 'manager', 'director', 'architect', 'principal', 'expert'],
-        'mid': ['analyst', 'engineer', 'specialist', 'consultant', 'administrator'],
-        'junior': ['junior', 'associate', 'intern', 'trainee', 'entry', 'assistant']
-    }
-    
-    # Convert text to lowercase for analysis
-    text_lower = text.lower()
+    # Every whole-word keyword occurring in the CV, found in a single pass
+    found = CV_KEYWORD_MATCHER.matches(text)
     
     # Identify skills
     identified_skills = []
     skill_categories = []
     
-    for category, keywords in cybersec_skills.items():
+    for category, keywords in CYBERSEC_SKILLS.items():
         category_skills = []
         for keyword in keywords:
-            if keyword in text_lower:
+            if keyword in found:
                 category_skills.append(keyword.title())
                 identified_skills.append(keyword.title())
         if category_skills:
@@ -328,11 +190,11 @@ def analyze_cv_text(text: str) -> CVAnalysisResult:
     
     # Determine experience level
     experience_level = "beginner"
-    if any(keyword in text_lower for keyword in experience_keywords['senior']):
+    if any(keyword in found for keyword in EXPERIENCE_KEYWORDS['senior']):
         experience_level = "expert"
-    elif any(keyword in text_lower for keyword in experience_keywords['mid']):
+    elif any(keyword in found for keyword in EXPERIENCE_KEYWORDS['mid']):
         experience_level = "advanced"
-    elif any(keyword in text_lower for keyword in experience_keywords['junior']):
+    elif any(keyword in found for keyword in EXPERIENCE_KEYWORDS['junior']):
         experience_level = "intermediate"
     
     # If no clear indicators and has some skills, assume intermediate
@@ -355,7 +217,7 @@ def analyze_cv_text(text: str) -> CVAnalysisResult:
             break
     
     # Identify gaps
-    all_categories = set(cybersec_skills.keys())
+    all_categories = set(CYBERSEC_SKILLS.keys())
     covered_categories = set(skill_categories)
     gap_categories = all_categories - covered_categories
     
@@ -539,6 +401,21 @@ class LearningPlan(BaseModel):
     toc_approved: bool = Field(default=False)  # New field for TOC approval
     personalization_notes: Optional[str] = None
 
+class LearningPlanSummary(BaseModel):
+    """Small per-plan record kept in plan_summaries for listings"""
+    id: str
+    topic: str
+    level: str
+    duration_weeks: int
+    focus_areas: List[str] = Field(default_factory=list)
+    approved: bool = False
+    toc_approved: bool = False
+    total_chapters: int = 0
+    total_sections: int = 0
+    total_estimated_time: int = 0
+    created_at: datetime
+    updated_at: datetime
+
 class LearningPlanResponse(BaseModel):
     success: bool
     plan_id: str
@@ -558,6 +435,8 @@ class LearningSession(BaseModel):
     time_spent: int = 0  # minutes
     questions_asked: int = 0
     ai_interactions: int = 0
+    context_summary: List[str] = Field(default_factory=list)  # Running summary of turns outside the prompt window
+    summary_through: Optional[datetime] = None  # Timestamp of the last message folded into context_summary
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -591,30 +470,18 @@ class UserProgress(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-# Ollama Configuration - Try multiple possible host addresses
-# Since we're in a Kubernetes environment, we need to find the right host address
-# We'll try multiple common Docker host IP addresses in sequence
-OLLAMA_HOSTS = [
-    "http://host.docker.internal:11434",  # Docker Desktop for Mac/Windows
-    "http://172.17.0.1:11434",           # Common Docker bridge network gateway
-    "http://172.18.0.1:11434",           # Alternative Docker bridge network
-    "http://192.168.65.2:11434",         # Docker Desktop for Mac
-    "http://10.0.75.1:11434",            # Docker Desktop for Windows
-    "http://localhost:11434"             # Local machine (unlikely to work in container)
-]
+def new_user_progress_fields(user_id: str) -> Dict[str, Any]:
+    """Fields of a fresh progress record for $setOnInsert; user_id comes from the upsert query"""
+    fields = UserProgress(user_id=user_id).dict()
+    fields.pop("user_id")
+    return fields
+
 OLLAMA_URL = OLLAMA_HOSTS[0]  # Default to first option
 OLLAMA_MODEL = "llama3:70b"  # Best model for 64GB RAM
 
 def get_working_ollama_host():
-    """Try to find a working Ollama host from the list of possible hosts"""
-    for host in OLLAMA_HOSTS:
-        try:
-            response = requests.get(f"{host}/api/tags", timeout=2)
-            if response.status_code == 200:
-                return host
-        except:
-            continue
-    return OLLAMA_HOSTS[0]  # Default to first option if none work
+    """Return the cached Ollama host chosen by the background health prober"""
+    return ollama_client.get_host()
 
 # Cybersecurity Topics Configuration
 CYBERSECURITY_TOPICS = {
@@ -789,7 +656,58 @@ Include questions that help assess their background (student, professional exper
     
     return prompt
 
+# Sampling options for each generation type; also part of the response cache key
+ASSESSMENT_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_tokens": 4096
+}
+CURRICULUM_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_tokens": 8192
+}
+
+def generation_cache_key(prompt: str, options: Dict[str, Any]) -> str:
+    """Cache key for a prompt, kept separate for mock and real generations"""
+    return llm_cache.make_key("mock" if MOCK_OLLAMA else OLLAMA_MODEL, prompt, options)
+
+def generation_busy_error(e: QueueFullError) -> HTTPException:
+    """429 response telling the client when the LLM queue should have room again"""
+    return HTTPException(
+        status_code=429,
+        detail="AI generation queue is full, please retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def ensure_generation_capacity():
+    """Reject a request up front when the current Ollama host's queue is full"""
+    try:
+        generation_scheduler.check_capacity(get_working_ollama_host())
+    except QueueFullError as e:
+        raise generation_busy_error(e)
+
+async def run_scheduled(priority: Priority, producer) -> str:
+    """Run a generation once the scheduler grants a slot on the current Ollama host"""
+    try:
+        async with generation_scheduler.slot(get_working_ollama_host(), priority):
+            return await producer()
+    except QueueFullError as e:
+        raise generation_busy_error(e)
+
+async def cached_generation(key: str, producer, priority: Priority) -> str:
+    """Serve a generation from the cache, coalescing identical in-flight misses into one scheduled call"""
+    return await llm_cache.get_or_generate(
+        key,
+        lambda: generation_flight.do(key, lambda: run_scheduled(priority, producer))
+    )
+
 async def generate_assessment_with_ollama(prompt: str) -> str:
+    """Generate assessment JSON, serving repeated prompts from the response cache"""
+    key = generation_cache_key(prompt, ASSESSMENT_OPTIONS)
+    return await cached_generation(key, lambda: generate_assessment_uncached(prompt), Priority.ASSESSMENT)
+
+async def generate_assessment_uncached(prompt: str) -> str:
     """Generate assessment using Ollama API or mock implementation"""
     if MOCK_OLLAMA:
         # Mock implementation for testing - return sample assessment
@@ -893,30 +811,23 @@ async def generate_assessment_with_ollama(prompt: str) -> str:
             if working_host:
                 OLLAMA_URL = working_host
             
-            response = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={
-                    "model": OLLAMA_MODEL,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 4096
-                    }
-                },
-                timeout=180  # 3 minutes timeout
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=500, detail=f"Assessment generation failed: {response.text}")
+            try:
+                result = await ollama_client.generate(
+                    prompt,
+                    model=OLLAMA_MODEL,
+                    options=ASSESSMENT_OPTIONS,
+                    host=OLLAMA_URL,
+                    timeout=180  # 3 minutes timeout
+                )
+            except OllamaError as e:
+                logger.error(f"Ollama API error: {e.status_code} - {e.text}")
+                raise HTTPException(status_code=500, detail=f"Assessment generation failed: {e.text}")
             
-            result = response.json()
             return result.get("response", "")
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Ollama connection error: {str(e)}")
+            ollama_client.report_failure(OLLAMA_URL)
             raise HTTPException(status_code=503, detail=f"Could not connect to Ollama service: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error during assessment generation: {str(e)}")
@@ -1076,32 +987,28 @@ Please ensure all recommendations are current, practical, and aligned with indus
 # In a real production environment, we would need to properly configure the connection to Ollama
 MOCK_OLLAMA = True  # Set to False in production
 
-async def generate_with_ollama(prompt: str) -> str:
-    """Generate content using Ollama API or a mock implementation for testing"""
-    if MOCK_OLLAMA:
-        # Mock implementation for testing
-        logger.info("Using mock implementation of Ollama API")
-        
-        # Generate a mock curriculum based on the prompt
-        topic = "Unknown Topic"
-        level = "Unknown Level"
-        duration = "Unknown Duration"
-        
-        # Extract topic, level, and duration from the prompt
-        if "TOPIC:" in prompt:
-            topic_line = prompt.split("TOPIC:")[1].split("\n")[0].strip()
-            topic = topic_line
-        
-        if "SKILL LEVEL:" in prompt:
-            level_line = prompt.split("SKILL LEVEL:")[1].split("\n")[0].strip()
-            level = level_line
-        
-        if "DURATION:" in prompt:
-            duration_line = prompt.split("DURATION:")[1].split("\n")[0].strip()
-            duration = duration_line
-        
-        # Generate a mock curriculum
-        mock_curriculum = f"""
+def create_mock_curriculum(prompt: str) -> str:
+    """Build the mock curriculum returned when MOCK_OLLAMA is enabled"""
+    # Generate a mock curriculum based on the prompt
+    topic = "Unknown Topic"
+    level = "Unknown Level"
+    duration = "Unknown Duration"
+    
+    # Extract topic, level, and duration from the prompt
+    if "TOPIC:" in prompt:
+        topic_line = prompt.split("TOPIC:")[1].split("\n")[0].strip()
+        topic = topic_line
+    
+    if "SKILL LEVEL:" in prompt:
+        level_line = prompt.split("SKILL LEVEL:")[1].split("\n")[0].strip()
+        level = level_line
+    
+    if "DURATION:" in prompt:
+        duration_line = prompt.split("DURATION:")[1].split("\n")[0].strip()
+        duration = duration_line
+    
+    # Generate a mock curriculum
+    mock_curriculum = f"""
 ## 🎯 LEARNING OBJECTIVES
 - Understand fundamental concepts of {topic}
 - Learn key terminology and frameworks
@@ -1230,6 +1137,22 @@ async def generate_with_ollama(prompt: str) -> str:
 - Network with security professionals
 - Stay current with security news
 """
+    
+    return mock_curriculum
+
+async def generate_with_ollama(prompt: str, use_cache: bool = True, priority: Priority = Priority.PLAN) -> str:
+    """Generate content, serving repeated prompts from the response cache"""
+    if not use_cache:
+        return await run_scheduled(priority, lambda: generate_curriculum_uncached(prompt))
+    key = generation_cache_key(prompt, CURRICULUM_OPTIONS)
+    return await cached_generation(key, lambda: generate_curriculum_uncached(prompt), priority)
+
+async def generate_curriculum_uncached(prompt: str) -> str:
+    """Generate content using Ollama API or a mock implementation for testing"""
+    if MOCK_OLLAMA:
+        # Mock implementation for testing
+        logger.info("Using mock implementation of Ollama API")
+        mock_curriculum = create_mock_curriculum(prompt)
         
         # Simulate a delay to mimic the generation process
         await asyncio.sleep(2)
@@ -1246,46 +1169,106 @@ async def generate_with_ollama(prompt: str) -> str:
             if working_host:
                 OLLAMA_URL = working_host
             
-            response = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={
-                    "model": OLLAMA_MODEL,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 8192
-                    }
-                },
-                timeout=300  # 5 minutes timeout for comprehensive generation
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-                raise HTTPException(status_code=500, detail=f"Ollama generation failed: {response.text}")
+            try:
+                result = await ollama_client.generate(
+                    prompt,
+                    model=OLLAMA_MODEL,
+                    options=CURRICULUM_OPTIONS,
+                    host=OLLAMA_URL,
+                    timeout=300  # 5 minutes timeout for comprehensive generation
+                )
+            except OllamaError as e:
+                logger.error(f"Ollama API error: {e.status_code} - {e.text}")
+                raise HTTPException(status_code=500, detail=f"Ollama generation failed: {e.text}")
             
-            result = response.json()
             return result.get("response", "")
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Ollama connection error: {str(e)}")
+            ollama_client.report_failure(OLLAMA_URL)
             raise HTTPException(status_code=503, detail=f"Could not connect to Ollama service: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error during generation: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Generation error: {str(e)}")
 
-def create_structured_learning_content(topic: str, level: str) -> Dict[str, Any]:
-    """Create structured learning content like shown in the screenshots"""
+# Server-Sent Events helpers for the streaming endpoints
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens reach the browser immediately
+}
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_with_ollama(prompt: str, mock_text: str, max_tokens: int = 8192, timeout: int = 300,
+                             cache_key: Optional[str] = None, priority: Priority = Priority.PLAN,
+                             context: Optional[List[int]] = None,
+                             final: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """Yield generated text token by token while holding a scheduler slot.
+    
+    With a cache_key, a cached response is replayed in one chunk and a
+    completed stream is stored for later requests. A context continues an
+    earlier Ollama conversation, and final receives Ollama's closing chunk.
+    """
+    if cache_key:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for token in stream_with_ollama(prompt, mock_text, max_tokens, timeout, priority=priority):
+            chunks.append(token)
+            yield token
+        if chunks:
+            llm_cache.set(cache_key, "".join(chunks))
+        return
     
-    # Create content based on topic - using React Hooks as example like in screenshots
-    if "network-security" in topic.lower():
-        return create_network_security_content()
-    elif "ethical-hacking" in topic.lower():
-        return create_ethical_hacking_content()
-    else:
-        # Default to network security structure
-        return create_network_security_content()
+    try:
+        async with generation_scheduler.slot(get_working_ollama_host(), priority):
+            async for token in stream_ollama_tokens(prompt, mock_text, max_tokens, timeout, context, final):
+                yield token
+    except QueueFullError as e:
+        raise generation_busy_error(e)
+
+async def stream_ollama_tokens(prompt: str, mock_text: str, max_tokens: int, timeout: int,
+                               context: Optional[List[int]] = None,
+                               final: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """Yield generated text token by token from Ollama, or replay mock_text in mock mode"""
+    if MOCK_OLLAMA:
+        logger.info("Using mock implementation of Ollama streaming API")
+        for token in re.findall(r"\S+\s*|\s+", mock_text):
+            yield token
+            await asyncio.sleep(0)
+        return
+    
+    global OLLAMA_URL
+    OLLAMA_URL = get_working_ollama_host()
+    try:
+        async for chunk in ollama_client.stream_generate(
+            prompt,
+            model=OLLAMA_MODEL,
+            options={
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": max_tokens
+            },
+            host=OLLAMA_URL,
+            context=context,
+            timeout=timeout
+        ):
+            token = chunk.get("response", "")
+            if token:
+                yield token
+            if chunk.get("done") and final is not None:
+                final.update(chunk, host=OLLAMA_URL)
+    except OllamaError as e:
+        logger.error(f"Ollama API error: {e.status_code} - {e.text}")
+        raise HTTPException(status_code=500, detail=f"Ollama generation failed: {e.text}")
+    except httpx.HTTPError as e:
+        logger.error(f"Ollama connection error: {str(e)}")
+        ollama_client.report_failure(OLLAMA_URL)
+        raise HTTPException(status_code=503, detail=f"Could not connect to Ollama service: {str(e)}")
 
 def create_network_security_content() -> Dict[str, Any]:
     """Create network security learning content similar to the React Hooks example in screenshots"""
@@ -1508,21 +1491,114 @@ sqlmap -u "http://target.com/page?id=1" --dbs"""
         "chapters": chapters
     }
 
+# Structured content builders by topic; the first one is the default
+STRUCTURED_CONTENT_BUILDERS = {
+    "network-security": create_network_security_content,
+    "ethical-hacking": create_ethical_hacking_content
+}
+
+def freeze_content(value: Any) -> Any:
+    """Deep read-only view of JSON-like data: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_content(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_content(item) for item in value)
+    return value
+
+def thaw_content(value: Any) -> Any:
+    """Fresh mutable copy of frozen content, ready to store or serialize"""
+    if isinstance(value, Mapping):
+        return {key: thaw_content(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_content(item) for item in value]
+    return value
+
+@dataclass(frozen=True)
+class StructuredContentTemplate:
+    """Structured content for one topic, validated once and shared by every plan built from it.
+    
+    The content is held as the validated models' output, deep-frozen, so no
+    plan can change it for the others; plans store copies from thaw_content.
+    """
+    name: str
+    table_of_contents: Mapping[str, Any]
+    chapters: Tuple[Mapping[str, Any], ...]
+
+def compile_content_template(name: str, content: Dict[str, Any]) -> StructuredContentTemplate:
+    """Validate builder output and check that the table of contents matches the chapters"""
+    toc = TableOfContents(**content["table_of_contents"])
+    chapters = [LearningChapter(**chapter_data) for chapter_data in content["chapters"]]
+    if toc.total_chapters != len(toc.chapters):
+        raise ValueError(f"{name}: total_chapters is {toc.total_chapters} but {len(toc.chapters)} chapters are listed")
+    # Written chapters may cover only part of the outline, but never go beyond it
+    outline = {entry["id"]: {section["id"] for section in entry.get("sections", [])} for entry in toc.chapters}
+    for chapter in chapters:
+        if chapter.id not in outline:
+            raise ValueError(f"{name}: chapter {chapter.id} is missing from the table of contents")
+        unlisted = [section.id for section in chapter.sections if section.id not in outline[chapter.id]]
+        if unlisted:
+            raise ValueError(f"{name}: sections {unlisted} of chapter {chapter.id} are missing from the table of contents")
+    return StructuredContentTemplate(
+        name=name,
+        table_of_contents=freeze_content(toc.dict()),
+        chapters=tuple(freeze_content(chapter.dict()) for chapter in chapters)
+    )
+
+# Built at import so a broken template fails startup instead of a request
+STRUCTURED_CONTENT_TEMPLATES = {
+    name: compile_content_template(name, builder())
+    for name, builder in STRUCTURED_CONTENT_BUILDERS.items()
+}
+
+# Dehydrated chapter records per template name. Template section bodies never
+# change, so their blobs are stored and their refs computed on first use only
+DEHYDRATED_TEMPLATE_CHAPTERS: Dict[str, Tuple[Mapping[str, Any], ...]] = {}
+
+async def get_dehydrated_chapters(template: StructuredContentTemplate) -> List[Dict[str, Any]]:
+    """A plan's copy of the template chapters, with section bodies already replaced by blob refs"""
+    chapters = DEHYDRATED_TEMPLATE_CHAPTERS.get(template.name)
+    if chapters is None:
+        chapters = freeze_content(await dehydrate_chapters(thaw_content(template.chapters)))
+        DEHYDRATED_TEMPLATE_CHAPTERS[template.name] = chapters
+    return thaw_content(chapters)
+
+def get_content_template(topic: str) -> StructuredContentTemplate:
+    """Pick the structured content template for a plan topic"""
+    topic = topic.lower()
+    for name, template in STRUCTURED_CONTENT_TEMPLATES.items():
+        if name in topic:
+            return template
+    # Default to network security structure
+    return STRUCTURED_CONTENT_TEMPLATES["network-security"]
+
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "Cybersecurity Learning Plans API", "version": "2.0.0"}
 
+# Cache-Control per resource: the catalog only changes on deploy, chapter and
+# section records never change once stored, and plans change on approval
+TOPICS_CACHE_CONTROL = "public, max-age=3600"
+PLAN_CONTENT_CACHE_CONTROL = "private, max-age=3600"
+PLAN_CACHE_CONTROL = "private, no-cache"
+
+# The topic catalog is static, so its body, compressed variants and ETag are computed once
+TOPICS_DOCUMENT = RenderedDocument.build({
+    "topics": CYBERSECURITY_TOPICS,
+    "levels": SKILL_LEVELS,
+    "focus_areas": FOCUS_AREAS,
+    "career_goals": CAREER_GOALS,
+    "question_types": QUESTION_TYPES
+})
+TOPICS_ETAG = make_etag(TOPICS_DOCUMENT.body.decode("utf-8"))
+
 @api_router.get("/topics")
-async def get_topics():
+async def get_topics(request: Request):
     """Get available cybersecurity topics"""
-    return {
-        "topics": CYBERSECURITY_TOPICS,
-        "levels": SKILL_LEVELS,
-        "focus_areas": FOCUS_AREAS,
-        "career_goals": CAREER_GOALS,
-        "question_types": QUESTION_TYPES
-    }
+    matched = etag_matches(request, TOPICS_ETAG)
+    if matched:
+        return not_modified(matched, TOPICS_CACHE_CONTROL)
+    return TOPICS_DOCUMENT.response(request, headers=caching_headers(TOPICS_ETAG, TOPICS_CACHE_CONTROL))
 
 # Assessment endpoints
 @api_router.post("/generate-assessment")
@@ -1581,7 +1657,7 @@ async def generate_assessment(topic: str, level: str, career_goal: str = "studen
         
         logger.info(f"Assessment created with ID: {assessment.id}")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "assessment_id": assessment.id,
             "topic": topic,
@@ -1599,7 +1675,7 @@ async def generate_assessment(topic: str, level: str, career_goal: str = "studen
                     "points": q.points
                 } for q in questions
             ]
-        }
+        })
         
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse assessment JSON: {str(e)}")
@@ -1725,7 +1801,7 @@ async def get_assessment_result(result_id: str):
     # Remove MongoDB _id if present
     if "_id" in result:
         result.pop("_id", None)
-    return result
+    return FastJSONResponse(result)
 
 # Learning session endpoints
 @api_router.post("/start-learning-session")
@@ -1733,7 +1809,7 @@ async def start_learning_session(plan_id: str, user_id: str = "anonymous"):
     """Start a new learning session"""
     
     # Verify plan exists
-    plan = await db.learning_plans.find_one({"id": plan_id})
+    plan = await db.learning_plans.find_one({"id": plan_id}, {"_id": 0, "id": 1})
     if not plan:
         raise HTTPException(status_code=404, detail="Learning plan not found")
     
@@ -1768,9 +1844,59 @@ async def get_learning_session(session_id: str):
         session.pop("_id", None)
     return session
 
-@api_router.post("/chat-with-ai")
-async def chat_with_ai(session_id: str, message: str):
-    """Chat with AI tutor during learning session"""
+def build_chat_prompt(plan: Dict[str, Any], session: Dict[str, Any], message: str,
+                      context: Optional[ConversationContext] = None) -> str:
+    """Build the AI tutor prompt for a chat turn, with bounded conversation history"""
+    history = context.render() if context else ""
+    history_block = f"{history}\n\n" if history else ""
+    return f"""
+You are an expert cybersecurity tutor helping a student learn {plan['topic']}. 
+The student is at {plan['level']} level and currently studying: {session['current_module']}.
+
+{history_block}Student's question/message: {message}
+
+Provide a helpful, clear, and educational response. Be encouraging and provide practical examples when possible.
+Keep responses concise but informative. If the student asks about a specific topic, provide step-by-step explanations.
+"""
+
+def build_chat_followup_prompt(message: str) -> str:
+    """Prompt for a turn that continues the session's Ollama context, which already holds the tutor instructions and history"""
+    return f"""
+Student's question/message: {message}
+"""
+
+def create_mock_chat_response(plan: Dict[str, Any], message: str) -> str:
+    """Build a context-aware mock tutor reply when MOCK_OLLAMA is enabled"""
+    # Create context-aware mock responses
+    topic = plan['topic'].replace('-', ' ')
+    level = plan['level']
+    
+    # Generate response based on message keywords
+    if any(word in message.lower() for word in ['hello', 'hi', 'start', 'begin']):
+        return f"Hello! I'm excited to help you learn {topic}. Since you're at the {level} level, I'll tailor my explanations accordingly. What specific aspect would you like to explore first?"
+    
+    elif any(word in message.lower() for word in ['what', 'explain', 'how']):
+        return f"Great question! Let me break this down for you:\n\n1. In {topic}, this concept is fundamental because it helps protect systems and data.\n\n2. At the {level} level, you should focus on understanding the basic principles first.\n\n3. Here's a practical example: Think of it like securing your house - you need multiple layers of protection.\n\nWould you like me to go deeper into any of these points?"
+    
+    elif any(word in message.lower() for word in ['example', 'practical', 'real-world']):
+        return f"Absolutely! Here's a real-world example related to {topic}:\n\n🔍 **Scenario**: Imagine you're working at a company and notice unusual network traffic.\n\n📋 **Steps you'd take**:\n1. Document what you observed\n2. Check monitoring tools and logs\n3. Follow incident response procedures\n4. Communicate with your team\n\nThis demonstrates key {topic} principles in action. Want to practice with another scenario?"
+    
+    elif any(word in message.lower() for word in ['help', 'stuck', 'confused', 'difficult']):
+        return f"Don't worry - {topic} can be challenging at first! Let's break it down step by step:\n\n✅ **What you should focus on**:\n- Start with the fundamentals\n- Practice with simple examples\n- Build up to more complex scenarios\n\n💡 **Study tip**: Try to connect new concepts to things you already know. For example, network security is like protecting a building - you need guards, locks, and monitoring systems.\n\nWhat specific part is giving you trouble?"
+    
+    elif any(word in message.lower() for word in ['next', 'continue', 'proceed']):
+        return f"Excellent progress! 🎉 Based on your current understanding of {topic}, here's what I recommend next:\n\n🎯 **Next Learning Goals**:\n1. Practice hands-on exercises\n2. Review real-world case studies\n3. Start working on certification material\n\n📚 **Resources to explore**:\n- Lab environments for {topic}\n- Industry best practices\n- Current threat landscapes\n\nShall we dive into any of these areas?"
+    
+    elif any(word in message.lower() for word in ['quiz', 'test', 'question']):
+        return f"Great idea! Let's test your knowledge of {topic}. Here's a question appropriate for your {level} level:\n\n❓ **Question**: What are the three main components of the CIA triad in cybersecurity?\n\nTake your time to think about it, and then let me know your answer. I'll provide feedback and explain each component in detail.\n\nRemember, this is about learning, not getting everything perfect right away!"
+    
+    return f"I understand you're asking about {topic}. Let me help you with that!\n\nAs someone at the {level} level, it's important to approach this systematically:\n\n🔑 **Key concepts to remember**:\n- Security is about confidentiality, integrity, and availability\n- Defense in depth uses multiple security layers\n- Regular monitoring and updates are essential\n\n💬 **Feel free to ask me**:\n- Specific technical questions\n- For practical examples\n- About career advice\n- For study strategies\n\nWhat would be most helpful for you right now?"
+
+# Plan fields the tutor prompt and mock replies need
+CHAT_PLAN_PROJECTION = {"_id": 0, "id": 1, "topic": 1, "level": 1}
+
+async def start_chat_turn(session_id: str, message: str) -> Tuple[Dict[str, Any], Dict[str, Any], ConversationContext]:
+    """Load the session, plan and conversation context for a chat turn and save the user's message"""
     
     # Verify session exists
     session = await db.learning_sessions.find_one({"id": session_id})
@@ -1778,10 +1904,13 @@ async def chat_with_ai(session_id: str, message: str):
         raise HTTPException(status_code=404, detail="Learning session not found")
     
     # Get the learning plan for context
-    plan = await db.learning_plans.find_one({"id": session["plan_id"]})
+    plan = await db.learning_plans.find_one({"id": session["plan_id"]}, CHAT_PLAN_PROJECTION)
     if not plan:
         raise HTTPException(status_code=404, detail="Learning plan not found")
     
+    # History is gathered before this turn's message is stored
+    context = await build_conversation_context(session)
+    
     # Create user message
     user_message = ChatMessage(
         session_id=session_id,
@@ -1792,72 +1921,145 @@ async def chat_with_ai(session_id: str, message: str):
     # Save user message
     await db.chat_messages.insert_one(user_message.dict())
     
-    # Generate AI response using the same mock approach as other AI functions
-    ai_prompt = f"""
-You are an expert cybersecurity tutor helping a student learn {plan['topic']}. 
-The student is at {plan['level']} level and currently studying: {session['current_module']}.
+    return session, plan, context
+
+async def generate_tutor_reply(session_id: str, ai_prompt: str, message: str,
+                               context: ConversationContext, reply_id: str) -> str:
+    """Generate a tutor reply, continuing the session's Ollama context while it is still current.
+    
+    The context Ollama returns is remembered against reply_id, so the next
+    turn sends only its own message. A stored context that Ollama rejects is
+    dropped and the full prompt is prefilled instead, in the same slot.
+    """
+    async def producer() -> str:
+        global OLLAMA_URL
+        OLLAMA_URL = get_working_ollama_host()
+        tokens = ollama_sessions.get(session_id, OLLAMA_URL, OLLAMA_MODEL, context.last_message_id)
+        result = None
+        try:
+            if tokens is not None:
+                try:
+                    result = await ollama_client.generate(
+                        build_chat_followup_prompt(message),
+                        model=OLLAMA_MODEL,
+                        options=CURRICULUM_OPTIONS,
+                        host=OLLAMA_URL,
+                        context=tokens,
+                        timeout=300
+                    )
+                except OllamaError as e:
+                    ollama_sessions.invalidate(session_id, f"{e.status_code} - {e.text}")
+            if result is None:
+                result = await ollama_client.generate(
+                    ai_prompt,
+                    model=OLLAMA_MODEL,
+                    options=CURRICULUM_OPTIONS,
+                    host=OLLAMA_URL,
+                    timeout=300
+                )
+        except OllamaError as e:
+            logger.error(f"Ollama API error: {e.status_code} - {e.text}")
+            raise HTTPException(status_code=500, detail=f"Ollama generation failed: {e.text}")
+        except httpx.HTTPError as e:
+            logger.error(f"Ollama connection error: {str(e)}")
+            ollama_client.report_failure(OLLAMA_URL)
+            raise HTTPException(status_code=503, detail=f"Could not connect to Ollama service: {str(e)}")
+        
+        ollama_sessions.set(session_id, OLLAMA_URL, OLLAMA_MODEL, result.get("context"), reply_id)
+        return result.get("response", "")
+    
+    return await run_scheduled(Priority.CHAT, producer)
 
-Student's question/message: {message}
+async def stream_tutor_reply(session_id: str, ai_prompt: str, message: str, context: ConversationContext,
+                             reply_id: str, mock_text: str) -> AsyncIterator[str]:
+    """Streaming counterpart of generate_tutor_reply.
+    
+    Only a rejection before the first token falls back to the full prompt;
+    once text has reached the client the error is passed on.
+    """
+    tokens = None
+    if not MOCK_OLLAMA:
+        tokens = ollama_sessions.get(session_id, get_working_ollama_host(), OLLAMA_MODEL, context.last_message_id)
+    
+    final: Dict[str, Any] = {}
+    if tokens is not None:
+        streamed = False
+        try:
+            async for token in stream_with_ollama(
+                build_chat_followup_prompt(message),
+                mock_text=mock_text,
+                max_tokens=8192,
+                priority=Priority.CHAT,
+                context=tokens,
+                final=final
+            ):
+                streamed = True
+                yield token
+        except HTTPException as e:
+            if streamed or e.status_code != 500:
+                raise
+            ollama_sessions.invalidate(session_id, str(e.detail))
+            tokens = None
+    
+    if tokens is None:
+        async for token in stream_with_ollama(
+            ai_prompt,
+            mock_text=mock_text,
+            max_tokens=8192,
+            priority=Priority.CHAT,
+            final=final
+        ):
+            yield token
+    
+    if final:
+        ollama_sessions.set(session_id, final["host"], OLLAMA_MODEL, final.get("context"), reply_id)
+
+async def record_ai_reply(session_id: str, ai_response_text: str, reply_id: str) -> ChatMessage:
+    """Save the tutor's reply and bump the session's interaction counters"""
+    
+    # Create AI message
+    ai_message = ChatMessage(
+        id=reply_id,
+        session_id=session_id,
+        sender="ai",
+        message=ai_response_text,
+        message_type="explanation"
+    )
+    
+    # Save AI message
+    await db.chat_messages.insert_one(ai_message.dict())
+    
+    # Update session stats
+    await db.learning_sessions.update_one({"id": session_id}, {
+        "$inc": {"ai_interactions": 1, "questions_asked": 1},
+        "$set": {"updated_at": datetime.utcnow()}
+    })
+    
+    return ai_message
 
-Provide a helpful, clear, and educational response. Be encouraging and provide practical examples when possible.
-Keep responses concise but informative. If the student asks about a specific topic, provide step-by-step explanations.
-"""
+@api_router.post("/chat-with-ai")
+async def chat_with_ai(session_id: str, message: str):
+    """Chat with AI tutor during learning session"""
+    
+    session, plan, context = await start_chat_turn(session_id, message)
+    
+    # Generate AI response using the same mock approach as other AI functions
+    ai_prompt = build_chat_prompt(plan, session, message, context)
+    reply_id = str(uuid.uuid4())
     
     try:
         if MOCK_OLLAMA:
             # Mock AI response based on the message content
             logger.info("Using mock implementation for AI chat response")
-            
-            # Create context-aware mock responses
-            topic = plan['topic'].replace('-', ' ')
-            level = plan['level']
-            
-            # Generate response based on message keywords
-            if any(word in message.lower() for word in ['hello', 'hi', 'start', 'begin']):
-                ai_response_text = f"Hello! I'm excited to help you learn {topic}. Since you're at the {level} level, I'll tailor my explanations accordingly. What specific aspect would you like to explore first?"
-            
-            elif any(word in message.lower() for word in ['what', 'explain', 'how']):
-                ai_response_text = f"Great question! Let me break this down for you:\n\n1. In {topic}, this concept is fundamental because it helps protect systems and data.\n\n2. At the {level} level, you should focus on understanding the basic principles first.\n\n3. Here's a practical example: Think of it like securing your house - you need multiple layers of protection.\n\nWould you like me to go deeper into any of these points?"
-            
-            elif any(word in message.lower() for word in ['example', 'practical', 'real-world']):
-                ai_response_text = f"Absolutely! Here's a real-world example related to {topic}:\n\n🔍 **Scenario**: Imagine you're working at a company and notice unusual network traffic.\n\n📋 **Steps you'd take**:\n1. Document what you observed\n2. Check monitoring tools and logs\n3. Follow incident response procedures\n4. Communicate with your team\n\nThis demonstrates key {topic} principles in action. Want to practice with another scenario?"
-            
-            elif any(word in message.lower() for word in ['help', 'stuck', 'confused', 'difficult']):
-                ai_response_text = f"Don't worry - {topic} can be challenging at first! Let's break it down step by step:\n\n✅ **What you should focus on**:\n- Start with the fundamentals\n- Practice with simple examples\n- Build up to more complex scenarios\n\n💡 **Study tip**: Try to connect new concepts to things you already know. For example, network security is like protecting a building - you need guards, locks, and monitoring systems.\n\nWhat specific part is giving you trouble?"
-            
-            elif any(word in message.lower() for word in ['next', 'continue', 'proceed']):
-                ai_response_text = f"Excellent progress! 🎉 Based on your current understanding of {topic}, here's what I recommend next:\n\n🎯 **Next Learning Goals**:\n1. Practice hands-on exercises\n2. Review real-world case studies\n3. Start working on certification material\n\n📚 **Resources to explore**:\n- Lab environments for {topic}\n- Industry best practices\n- Current threat landscapes\n\nShall we dive into any of these areas?"
-            
-            elif any(word in message.lower() for word in ['quiz', 'test', 'question']):
-                ai_response_text = f"Great idea! Let's test your knowledge of {topic}. Here's a question appropriate for your {level} level:\n\n❓ **Question**: What are the three main components of the CIA triad in cybersecurity?\n\nTake your time to think about it, and then let me know your answer. I'll provide feedback and explain each component in detail.\n\nRemember, this is about learning, not getting everything perfect right away!"
-            
-            else:
-                ai_response_text = f"I understand you're asking about {topic}. Let me help you with that!\n\nAs someone at the {level} level, it's important to approach this systematically:\n\n🔑 **Key concepts to remember**:\n- Security is about confidentiality, integrity, and availability\n- Defense in depth uses multiple security layers\n- Regular monitoring and updates are essential\n\n💬 **Feel free to ask me**:\n- Specific technical questions\n- For practical examples\n- About career advice\n- For study strategies\n\nWhat would be most helpful for you right now?"
+            ai_response_text = create_mock_chat_response(plan, message)
             
             # Simulate a delay
             await asyncio.sleep(1)
         else:
-            # Real implementation using Ollama API (same as before)
-            ai_response_text = await generate_with_ollama(ai_prompt)
+            # Real implementation using Ollama API; tutor replies are never cached
+            ai_response_text = await generate_tutor_reply(session_id, ai_prompt, message, context, reply_id)
         
-        # Create AI message
-        ai_message = ChatMessage(
-            session_id=session_id,
-            sender="ai",
-            message=ai_response_text,
-            message_type="explanation"
-        )
-        
-        # Save AI message
-        await db.chat_messages.insert_one(ai_message.dict())
-        
-        # Update session stats - work with in-memory database
-        for i, stored_session in enumerate(in_memory_db["learning_sessions"]):
-            if stored_session.get("id") == session_id:
-                in_memory_db["learning_sessions"][i]["ai_interactions"] = stored_session.get("ai_interactions", 0) + 1
-                in_memory_db["learning_sessions"][i]["questions_asked"] = stored_session.get("questions_asked", 0) + 1
-                in_memory_db["learning_sessions"][i]["updated_at"] = datetime.utcnow()
-                break
+        ai_message = await record_ai_reply(session_id, ai_response_text, reply_id)
         
         return {
             "success": True,
@@ -1865,36 +2067,129 @@ Keep responses concise but informative. If the student asks about a specific top
             "message_id": ai_message.id
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating AI response: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate AI response: {str(e)}")
 
-@api_router.get("/chat-history/{session_id}")
-async def get_chat_history(session_id: str, limit: int = 50):
-    """Get chat history for a learning session"""
+@api_router.post("/chat-with-ai/stream")
+async def chat_with_ai_stream(session_id: str, message: str):
+    """Stream the AI tutor's reply as Server-Sent Events, saving it once complete"""
     
-    # Get messages without sorting in the database
-    cursor = db.chat_messages.find({"session_id": session_id})
-    messages = await cursor.to_list(length=limit)
+    ensure_generation_capacity()
+    session, plan, context = await start_chat_turn(session_id, message)
+    ai_prompt = build_chat_prompt(plan, session, message, context)
+    reply_id = str(uuid.uuid4())
     
-    # Remove MongoDB _id from all messages
-    for message in messages:
-        if "_id" in message:
-            message.pop("_id", None)
+    async def event_stream():
+        chunks = []
+        try:
+            async for token in stream_tutor_reply(
+                session_id,
+                ai_prompt,
+                message,
+                context,
+                reply_id,
+                mock_text=create_mock_chat_response(plan, message)
+            ):
+                chunks.append(token)
+                yield format_sse("token", {"token": token})
+            
+            ai_response_text = "".join(chunks)
+            ai_message = await record_ai_reply(session_id, ai_response_text, reply_id)
+            yield format_sse("done", {
+                "success": True,
+                "ai_response": ai_response_text,
+                "message_id": ai_message.id
+            })
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail, "headers": e.headers})
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {str(e)}")
+            yield format_sse("error", {"status_code": 500, "detail": f"Failed to generate AI response: {str(e)}"})
     
-    # Sort messages by timestamp in Python
-    # This works around the issue with MockCollection.sort() not actually sorting
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def resolve_chat_cursor(session_id: str, cursor: str) -> Tuple[datetime, Optional[str]]:
+    """Turn a message id or ISO timestamp into the (timestamp, id) key the page is keyed on.
+    
+    A timestamp cursor has no id: the page starts strictly after (or before) that instant.
+    """
+    message = await db.chat_messages.find_one(
+        {"session_id": session_id, "id": cursor}, {"_id": 0, "timestamp": 1, "id": 1}
+    )
+    if message:
+        return message["timestamp"], message["id"]
     try:
-        # Sort messages by timestamp
-        messages = sorted(messages, key=lambda x: x.get("timestamp", datetime.min))
-    except Exception as e:
-        logger.warning(f"Error sorting chat messages: {str(e)}")
-        # Continue with unsorted messages if sorting fails
+        timestamp = datetime.fromisoformat(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor must be a message id or an ISO timestamp")
+    if timestamp.tzinfo is not None:
+        # Stored timestamps are naive UTC
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp, None
+
+def chat_page_condition(timestamp: datetime, message_id: Optional[str], direction: int) -> Dict[str, Any]:
+    """Query fields selecting the messages after (direction 1) or before (-1) a cursor key.
+    
+    Messages are ordered by (timestamp, id), so messages written in the same
+    millisecond (a cached reply lands with its question) are split across
+    pages by id instead of being skipped. The plain timestamp bound is
+    redundant with the $or but lets the index seek straight to the cursor.
+    """
+    strict, inclusive = ("$gt", "$gte") if direction == 1 else ("$lt", "$lte")
+    if message_id is None:
+        return {"timestamp": {strict: timestamp}}
+    return {
+        "timestamp": {inclusive: timestamp},
+        "$or": [
+            {"timestamp": {strict: timestamp}},
+            {"timestamp": timestamp, "id": {strict: message_id}}
+        ]
+    }
+
+@api_router.get("/chat-history/{session_id}")
+async def get_chat_history(session_id: str, limit: int = 50, before: Optional[str] = None,
+                           after: Optional[str] = None, since: Optional[str] = None):
+    """Get chat history for a learning session, keyset-paginated by message timestamp and id.
+    
+    Without a cursor the oldest `limit` messages are returned. `after` (or
+    its alias `since`, for polling) returns the messages following a message
+    id or timestamp; `before` returns the page just before one. Pages are
+    always in ascending timestamp order.
+    """
+    if sum(cursor is not None for cursor in (before, after, since)) > 1:
+        raise HTTPException(status_code=400, detail="Use only one of before, after and since")
+    limit = max(limit, 1)
+    after = after if after is not None else since
+    
+    # Pages are bisected out of the per-session (session_id, timestamp, id) index
+    query: Dict[str, Any] = {"session_id": session_id}
+    if before is not None:
+        direction = -1
+        query.update(chat_page_condition(*await resolve_chat_cursor(session_id, before), direction))
+    else:
+        direction = 1
+        if after is not None:
+            query.update(chat_page_condition(*await resolve_chat_cursor(session_id, after), direction))
+    
+    # One extra message tells us whether another page exists
+    cursor = db.chat_messages.find(query, {"_id": 0}).sort([("timestamp", direction), ("id", direction)])
+    cursor = cursor.limit(limit + 1)
+    messages = await cursor.to_list(length=limit + 1)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if direction == -1:
+        messages.reverse()
     
     return {
         "session_id": session_id,
         "messages": messages,
-        "total": len(messages)
+        "total": len(messages),
+        "has_more": has_more,
+        "prev_cursor": messages[0]["id"] if messages else before,
+        "next_cursor": messages[-1]["id"] if messages else after
     }
 
 @api_router.post("/update-progress")
@@ -1902,17 +2197,14 @@ async def update_learning_progress(session_id: str, progress_percentage: float,
     """Update learning progress for a session"""
     
     try:
-        # Find and update the session in in-memory database
-        session_found = False
-        for i, session in enumerate(in_memory_db["learning_sessions"]):
-            if session.get("id") == session_id:
-                in_memory_db["learning_sessions"][i]["progress_percentage"] = progress_percentage
-                in_memory_db["learning_sessions"][i]["time_spent"] = time_spent
-                in_memory_db["learning_sessions"][i]["updated_at"] = datetime.utcnow()
-                session_found = True
-                break
+        # Find and update the session
+        result = await db.learning_sessions.update_one({"id": session_id}, {"$set": {
+            "progress_percentage": progress_percentage,
+            "time_spent": time_spent,
+            "updated_at": datetime.utcnow()
+        }})
         
-        if not session_found:
+        if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Learning session not found")
         
         return {
@@ -1921,6 +2213,8 @@ async def update_learning_progress(session_id: str, progress_percentage: float,
             "time_spent": time_spent
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating progress: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update progress: {str(e)}")
@@ -1937,12 +2231,13 @@ async def get_all_achievements():
 async def get_user_progress(user_id: str = "anonymous"):
     """Get user progress and achievements"""
     
-    progress = await db.user_progress.find_one({"user_id": user_id})
-    if not progress:
-        # Create new progress record
-        progress = UserProgress(user_id=user_id)
-        await db.user_progress.insert_one(progress.dict())
-        progress = progress.dict()
+    # Get or create the progress record in one atomic upsert
+    progress = await db.user_progress.find_one_and_update(
+        {"user_id": user_id},
+        {"$setOnInsert": new_user_progress_fields(user_id)},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
     
     if "_id" in progress:
         progress.pop("_id", None)
@@ -1975,47 +2270,31 @@ async def award_achievement(user_id: str, achievement_id: str):
         raise HTTPException(status_code=404, detail="Achievement not found")
     
     try:
-        # Get or create user progress
-        progress = None
-        progress_index = -1
-        
-        # Find existing progress
-        for i, prog in enumerate(in_memory_db["user_progress"]):
-            if prog.get("user_id") == user_id:
-                progress = prog
-                progress_index = i
-                break
+        # Make sure the user has a progress record; idempotent, so it is safe to retry
+        await db.user_progress.update_one(
+            {"user_id": user_id},
+            {"$setOnInsert": new_user_progress_fields(user_id)},
+            upsert=True
+        )
         
-        # Create new progress if not found
-        if not progress:
-            progress = {
-                "id": str(uuid.uuid4()),
-                "user_id": user_id,
-                "total_points": 0,
-                "achievements": [],
-                "skill_levels": {},
-                "learning_streak": 0,
-                "total_time_spent": 0,
-                "assessments_completed": 0,
-                "plans_completed": 0,
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
+        # Record the achievement and its points in one write. Only a record that
+        # does not have it yet matches, so exactly one concurrent call awards it
+        awarded = await db.user_progress.find_one_and_update(
+            {"user_id": user_id, "achievements": {"$ne": achievement_id}},
+            {
+                "$push": {"achievements": achievement_id},
+                "$inc": {"total_points": achievement["points"]},
+                "$set": {"updated_at": datetime.utcnow()}
             }
-            in_memory_db["user_progress"].append(progress)
-            progress_index = len(in_memory_db["user_progress"]) - 1
+        )
         
         # Check if user already has this achievement
-        if achievement_id in progress.get("achievements", []):
+        if awarded is None:
             return {
                 "success": False,
                 "message": "User already has this achievement"
             }
         
-        # Award achievement
-        in_memory_db["user_progress"][progress_index]["achievements"].append(achievement_id)
-        in_memory_db["user_progress"][progress_index]["total_points"] += achievement["points"]
-        in_memory_db["user_progress"][progress_index]["updated_at"] = datetime.utcnow()
-        
         return {
             "success": True,
             "achievement": achievement,
@@ -2032,15 +2311,12 @@ async def approve_table_of_contents(plan_id: str, approved: bool = True):
     
     try:
         # Find and update the plan
-        plan_found = False
-        for i, plan in enumerate(in_memory_db["learning_plans"]):
-            if plan.get("id") == plan_id:
-                in_memory_db["learning_plans"][i]["toc_approved"] = approved
-                in_memory_db["learning_plans"][i]["updated_at"] = datetime.utcnow()
-                plan_found = True
-                break
+        result = await update_learning_plan(plan_id, {
+            "toc_approved": approved,
+            "updated_at": datetime.utcnow()
+        })
         
-        if not plan_found:
+        if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Learning plan not found")
         
         return {
@@ -2049,59 +2325,67 @@ async def approve_table_of_contents(plan_id: str, approved: bool = True):
             "toc_approved": approved
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error approving table of contents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to approve table of contents: {str(e)}")
 
+# Bookkeeping fields of plan_chapters / plan_sections records that API responses leave out
+CHAPTER_PROJECTION = {"_id": 0, "plan_id": 0, "section_ids": 0}
+SECTION_PROJECTION = {"_id": 0, "plan_id": 0, "chapter_id": 0, "position": 0}
+
+async def ensure_plan_exists(plan_id: str):
+    if not await db.learning_plans.find_one({"id": plan_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="Learning plan not found")
+
 @api_router.get("/learning-plans/{plan_id}/chapter/{chapter_id}")
-async def get_chapter_content(plan_id: str, chapter_id: str):
+async def get_chapter_content(plan_id: str, chapter_id: str, request: Request):
     """Get detailed content for a specific chapter"""
     try:
-        plan = await db.learning_plans.find_one({"id": plan_id})
-        if not plan:
-            raise HTTPException(status_code=404, detail="Learning plan not found")
-        
-        # Find the specific chapter
-        chapters = plan.get("chapters", [])
-        chapter = None
-        for ch in chapters:
-            if ch.get("id") == chapter_id:
-                chapter = ch
-                break
-        
+        # Direct lookup on the (plan_id, id) index instead of scanning the plan's chapters
+        chapter = await db.plan_chapters.find_one({"plan_id": plan_id, "id": chapter_id}, CHAPTER_PROJECTION)
         if not chapter:
+            await ensure_plan_exists(plan_id)
             raise HTTPException(status_code=404, detail="Chapter not found")
         
-        return chapter
+        cursor = db.plan_sections.find({"plan_id": plan_id, "chapter_id": chapter_id}, SECTION_PROJECTION)
+        sections = await cursor.sort("position", 1).to_list(None)
+        
+        # Stored records reference section bodies by content hash, so their
+        # hash identifies the full chapter without loading any body
+        etag = make_etag("chapter", plan_id, chapter, sections)
+        matched = etag_matches(request, etag)
+        if matched:
+            return not_modified(matched, PLAN_CONTENT_CACHE_CONTROL)
         
+        chapter["sections"] = [await hydrate_section(section) for section in sections]
+        return FastJSONResponse(chapter, headers=caching_headers(etag, PLAN_CONTENT_CACHE_CONTROL))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving chapter content: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve chapter content")
 
 @api_router.get("/learning-plans/{plan_id}/section/{section_id}")
-async def get_section_content(plan_id: str, section_id: str):
+async def get_section_content(plan_id: str, section_id: str, request: Request):
     """Get detailed content for a specific section"""
     try:
-        plan = await db.learning_plans.find_one({"id": plan_id})
-        if not plan:
-            raise HTTPException(status_code=404, detail="Learning plan not found")
-        
-        # Find the specific section across all chapters
-        chapters = plan.get("chapters", [])
-        section = None
-        for chapter in chapters:
-            for sect in chapter.get("sections", []):
-                if sect.get("id") == section_id:
-                    section = sect
-                    break
-            if section:
-                break
-        
+        # Sections are stored on their own, so this never loads the rest of the plan
+        section = await db.plan_sections.find_one({"plan_id": plan_id, "id": section_id}, SECTION_PROJECTION)
         if not section:
+            await ensure_plan_exists(plan_id)
             raise HTTPException(status_code=404, detail="Section not found")
         
-        return section
+        etag = make_etag("section", plan_id, section)
+        matched = etag_matches(request, etag)
+        if matched:
+            return not_modified(matched, PLAN_CONTENT_CACHE_CONTROL)
+        return FastJSONResponse(await hydrate_section(section), headers=caching_headers(etag, PLAN_CONTENT_CACHE_CONTROL))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving section content: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve section content")
@@ -2112,17 +2396,13 @@ async def approve_learning_plan(plan_id: str, approved: bool = True):
     
     # Find and update the plan
     try:
-        plan = await db.learning_plans.find_one({"id": plan_id})
-        if not plan:
+        result = await update_learning_plan(plan_id, {
+            "approved": approved,
+            "updated_at": datetime.utcnow()
+        })
+        if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Learning plan not found")
         
-        # Update the plan - note: this is a simplified update for in-memory database
-        for i, stored_plan in enumerate(in_memory_db["learning_plans"]):
-            if stored_plan.get("id") == plan_id:
-                in_memory_db["learning_plans"][i]["approved"] = approved
-                in_memory_db["learning_plans"][i]["updated_at"] = datetime.utcnow()
-                break
-        
         # Award achievement for first approved plan
         if approved:
             try:
@@ -2136,15 +2416,14 @@ async def approve_learning_plan(plan_id: str, approved: bool = True):
             "approved": approved
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error approving plan: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to approve plan: {str(e)}")
 
-@api_router.post("/generate-learning-plan", response_model=LearningPlanResponse)
-async def generate_learning_plan(request: LearningPlanRequest):
-    """Generate a comprehensive cybersecurity learning plan with structured content"""
-    
-    logger.info(f"Generating learning plan for topic: {request.topic}, level: {request.level}")
+def validate_learning_plan_request(request: LearningPlanRequest):
+    """Reject learning plan requests for unknown topics or levels"""
     
     # Validate topic
     if request.topic not in CYBERSECURITY_TOPICS:
@@ -2153,6 +2432,9 @@ async def generate_learning_plan(request: LearningPlanRequest):
     # Validate level
     if request.level not in SKILL_LEVELS:
         raise HTTPException(status_code=400, detail=f"Invalid level. Available levels: {list(SKILL_LEVELS.keys())}")
+
+async def build_learning_plan_prompt(request: LearningPlanRequest) -> Tuple[str, str]:
+    """Build the full generation prompt and the personalization notes for a learning plan"""
     
     # Get assessment result if provided for personalization
     personalization_notes = ""
@@ -2185,28 +2467,95 @@ Include foundational concepts and practical exercises appropriate for their stat
     
     # Create comprehensive prompt with personalization
     base_prompt = create_comprehensive_prompt(request)
-    full_prompt = base_prompt + personalization_notes
-    
-    # Generate content using Ollama (for traditional curriculum)
-    curriculum = await generate_with_ollama(full_prompt)
-    
-    if not curriculum:
-        raise HTTPException(status_code=500, detail="Failed to generate curriculum content")
-    
-    # Generate structured learning content (like screenshots)
-    structured_content = create_structured_learning_content(request.topic, request.level)
-    table_of_contents = TableOfContents(**structured_content["table_of_contents"])
-    chapters = [LearningChapter(**chapter_data) for chapter_data in structured_content["chapters"]]
-    
-    # Create learning plan object with structured content
+    return base_prompt + personalization_notes, personalization_notes
+
+def build_plan_summary(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary record for a stored learning plan document"""
+    table_of_contents = plan.get("table_of_contents") or {}
+    chapters = plan.get("chapters") or []
+    return LearningPlanSummary(
+        id=plan["id"],
+        topic=plan["topic"],
+        level=plan["level"],
+        duration_weeks=plan["duration_weeks"],
+        focus_areas=plan.get("focus_areas") or [],
+        approved=plan.get("approved", False),
+        toc_approved=plan.get("toc_approved", False),
+        total_chapters=table_of_contents.get("total_chapters", len(chapters)),
+        total_sections=sum(len(chapter.get("sections", [])) for chapter in chapters),
+        total_estimated_time=table_of_contents.get("total_estimated_time", 0),
+        created_at=plan["created_at"],
+        updated_at=plan["updated_at"]
+    ).dict()
+
+async def store_plan_content(plan_id: str, chapters: List[Dict[str, Any]]):
+    """Store a plan's chapters and sections as individual records keyed by (plan_id, id).
+    
+    Section bodies and code examples go to the shared content blobs; the
+    records only carry their references. Records the plan already has are
+    replaced, so a re-save or a repeated backfill leaves no stale sections.
+    """
+    await delete_plan_content(plan_id)
+    chapter_records, section_records = [], []
+    for chapter in await dehydrate_chapters(chapters):
+        sections = chapter.get("sections") or []
+        chapter_record = {key: value for key, value in chapter.items() if key != "sections"}
+        chapter_record.update(plan_id=plan_id, section_ids=[section["id"] for section in sections])
+        chapter_records.append(chapter_record)
+        for position, section in enumerate(sections):
+            section_records.append({**section, "plan_id": plan_id, "chapter_id": chapter["id"], "position": position})
+    if chapter_records:
+        await db.plan_chapters.insert_many(chapter_records)
+    if section_records:
+        await db.plan_sections.insert_many(section_records)
+
+async def delete_plan_content(plan_id: str):
+    await db.plan_chapters.delete_many({"plan_id": plan_id})
+    await db.plan_sections.delete_many({"plan_id": plan_id})
+
+async def update_learning_plan(plan_id: str, fields: Dict[str, Any]):
+    """$set fields on a plan and mirror the ones its summary carries"""
+    result = await db.learning_plans.update_one({"id": plan_id}, {"$set": fields})
+    summary_fields = {key: value for key, value in fields.items() if key in LearningPlanSummary.__fields__}
+    if result.matched_count and summary_fields:
+        await db.plan_summaries.update_one({"id": plan_id}, {"$set": summary_fields})
+    return result
+
+async def backfill_plan_records() -> int:
+    """Create summaries and chapter/section records for plans stored before those collections existed"""
+    summarized = {summary["id"] for summary in await db.plan_summaries.find({}, {"_id": 0, "id": 1}).to_list(None)}
+    indexed = {chapter["plan_id"] for chapter in await db.plan_chapters.find({}, {"_id": 0, "plan_id": 1}).to_list(None)}
+    plan_ids = [plan["id"] for plan in await db.learning_plans.find({}, {"_id": 0, "id": 1}).to_list(None)]
+    repaired = 0
+    for plan_id in plan_ids:
+        if plan_id in summarized and plan_id in indexed:
+            continue
+        plan = await db.learning_plans.find_one({"id": plan_id}, {"_id": 0, "curriculum": 0, "personalization_notes": 0})
+        if not plan:
+            continue
+        if plan_id not in summarized:
+            await db.plan_summaries.insert_one(build_plan_summary(plan))
+        if plan_id not in indexed and plan.get("chapters"):
+            await store_plan_content(plan_id, plan["chapters"])
+        repaired += 1
+    if repaired:
+        logger.info(f"Backfilled summary and content records for {repaired} learning plans")
+    return repaired
+
+async def save_learning_plan(request: LearningPlanRequest, curriculum: str, personalization_notes: str) -> LearningPlanResponse:
+    """Attach structured content to a generated curriculum and persist the learning plan"""
+    
+    # Structured learning content (like screenshots) comes from the precompiled template
+    template = get_content_template(request.topic)
+    table_of_contents = thaw_content(template.table_of_contents)
+    
+    # Create learning plan object; the template content was validated when it was compiled
     learning_plan = LearningPlan(
         topic=request.topic,
         level=request.level,
         duration_weeks=request.duration_weeks,
         focus_areas=request.focus_areas,
         curriculum=curriculum,
-        table_of_contents=table_of_contents,
-        chapters=chapters,
         user_background=request.user_background,
         assessment_result_id=request.assessment_result_id,
         personalization_notes=personalization_notes,
@@ -2216,7 +2565,12 @@ Include foundational concepts and practical exercises appropriate for their stat
     # Save to database
     try:
         plan_dict = learning_plan.dict()
+        plan_dict["table_of_contents"] = table_of_contents
+        # Plans built from the same template share one copy of every section body
+        plan_dict["chapters"] = await get_dehydrated_chapters(template)
         await db.learning_plans.insert_one(plan_dict)
+        await db.plan_summaries.insert_one(build_plan_summary(plan_dict))
+        await store_plan_content(learning_plan.id, plan_dict["chapters"])
         logger.info(f"Learning plan saved with ID: {learning_plan.id}")
     except Exception as e:
         logger.error(f"Database error: {str(e)}")
@@ -2232,36 +2586,110 @@ Include foundational concepts and practical exercises appropriate for their stat
         duration_weeks=request.duration_weeks
     )
 
+@api_router.post("/generate-learning-plan", response_model=LearningPlanResponse)
+async def generate_learning_plan(request: LearningPlanRequest):
+    """Generate a comprehensive cybersecurity learning plan with structured content"""
+    
+    logger.info(f"Generating learning plan for topic: {request.topic}, level: {request.level}")
+    
+    validate_learning_plan_request(request)
+    full_prompt, personalization_notes = await build_learning_plan_prompt(request)
+    
+    # Generate content using Ollama (for traditional curriculum)
+    curriculum = await generate_with_ollama(full_prompt)
+    
+    if not curriculum:
+        raise HTTPException(status_code=500, detail="Failed to generate curriculum content")
+    
+    return FastJSONResponse(await save_learning_plan(request, curriculum, personalization_notes))
+
+@api_router.post("/generate-learning-plan/stream")
+async def generate_learning_plan_stream(request: LearningPlanRequest):
+    """Stream learning plan generation as Server-Sent Events and persist the plan once complete"""
+    
+    logger.info(f"Streaming learning plan for topic: {request.topic}, level: {request.level}")
+    
+    validate_learning_plan_request(request)
+    ensure_generation_capacity()
+    full_prompt, personalization_notes = await build_learning_plan_prompt(request)
+    
+    async def event_stream():
+        chunks = []
+        try:
+            async for token in stream_with_ollama(
+                full_prompt,
+                mock_text=create_mock_curriculum(full_prompt),
+                max_tokens=CURRICULUM_OPTIONS["max_tokens"],
+                cache_key=generation_cache_key(full_prompt, CURRICULUM_OPTIONS)
+            ):
+                chunks.append(token)
+                yield format_sse("token", {"token": token})
+            
+            curriculum = "".join(chunks)
+            if not curriculum:
+                raise HTTPException(status_code=500, detail="Failed to generate curriculum content")
+            
+            plan_response = await save_learning_plan(request, curriculum, personalization_notes)
+            yield format_sse("done", plan_response.dict())
+        except HTTPException as e:
+            yield format_sse("error", {"status_code": e.status_code, "detail": e.detail, "headers": e.headers})
+        except Exception as e:
+            logger.error(f"Error streaming learning plan: {str(e)}")
+            yield format_sse("error", {"status_code": 500, "detail": f"Generation error: {str(e)}"})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @api_router.get("/learning-plans/{plan_id}")
-async def get_learning_plan(plan_id: str):
+async def get_learning_plan(plan_id: str, request: Request):
     """Retrieve a specific learning plan"""
     try:
-        plan = await db.learning_plans.find_one({"id": plan_id})
-        if not plan:
+        # Plans only change through update_learning_plan, which bumps updated_at,
+        # so the rendered body is cached per (plan, updated_at)
+        version = await db.learning_plans.find_one({"id": plan_id}, {"_id": 0, "updated_at": 1})
+        if not version:
             raise HTTPException(status_code=404, detail="Learning plan not found")
-        
-        # Remove MongoDB _id from response if it exists
-        if "_id" in plan:
-            plan.pop("_id", None)
-        return plan
-        
+        cache_key = ("learning_plan", plan_id, version["updated_at"])
+        etag = make_etag(*cache_key)
+        matched = etag_matches(request, etag)
+        if matched:
+            return not_modified(matched, PLAN_CACHE_CONTROL)
+        
+        rendered = rendered_documents.get(cache_key)
+        if rendered is None:
+            plan = await db.learning_plans.find_one({"id": plan_id}, {"_id": 0})
+            if not plan:
+                raise HTTPException(status_code=404, detail="Learning plan not found")
+            plan["chapters"] = await hydrate_chapters(plan.get("chapters") or [])
+            rendered = rendered_documents.render(cache_key, plan)
+        return rendered.response(request, headers=caching_headers(etag, PLAN_CACHE_CONTROL))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving learning plan: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve learning plan")
 
+def summary_projection(fields: Optional[str]) -> Dict[str, int]:
+    """Inclusion projection for a comma-separated ?fields= selection; id is always included"""
+    projection = {"_id": 0}
+    if not fields:
+        return projection
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(LearningPlanSummary.__fields__)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown plan summary fields: {', '.join(sorted(unknown))}")
+    projection.update({field: 1 for field in LearningPlanSummary.__fields__ if field in requested or field == "id"})
+    return projection
+
 @api_router.get("/learning-plans")
-async def list_learning_plans(limit: int = 20, offset: int = 0):
-    """List all learning plans with pagination"""
+async def list_learning_plans(limit: int = 20, offset: int = 0, fields: Optional[str] = None):
+    """List learning plan summaries with pagination and optional field selection"""
+    projection = summary_projection(fields)
     try:
-        cursor = db.learning_plans.find().sort("created_at", -1).skip(offset).limit(limit)
+        cursor = db.plan_summaries.find({}, projection).sort("created_at", -1).skip(offset).limit(limit)
         plans = await cursor.to_list(length=limit)
         
-        # Remove MongoDB _id from all plans if it exists
-        for plan in plans:
-            if "_id" in plan:
-                plan.pop("_id", None)
-        
-        total_count = await db.learning_plans.count_documents({})
+        total_count = await db.plan_summaries.count_documents({})
         
         return {
             "plans": plans,
@@ -2279,11 +2707,15 @@ async def delete_learning_plan(plan_id: str):
     """Delete a specific learning plan"""
     try:
         result = await db.learning_plans.delete_one({"id": plan_id})
+        await db.plan_summaries.delete_one({"id": plan_id})
+        await delete_plan_content(plan_id)
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Learning plan not found")
         
         return {"message": "Learning plan deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting learning plan: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to delete learning plan")
@@ -2291,26 +2723,22 @@ async def delete_learning_plan(plan_id: str):
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint"""
+    global OLLAMA_URL
+    ollama_probe = None
     try:
         # For testing purposes, we'll use a mock implementation
         if MOCK_OLLAMA:
             ollama_status = "healthy"  # Pretend Ollama is healthy
             logger.info("Using mock implementation for Ollama health check")
         else:
-            # Try to find a working Ollama host
-            working_host = get_working_ollama_host()
-            
-            # Test Ollama connection with the working host
-            response = requests.get(f"{working_host}/api/tags", timeout=5)
-            ollama_status = "healthy" if response.status_code == 200 else "unhealthy"
-            
-            # If we found a working host, update the global OLLAMA_URL
-            global OLLAMA_URL
+            # Report the state cached by the background prober instead of probing inline
+            ollama_probe = ollama_client.health_status()
+            ollama_status = "healthy" if ollama_probe["healthy"] else "unhealthy"
             if ollama_status == "healthy":
-                OLLAMA_URL = working_host
+                OLLAMA_URL = ollama_probe["host"]
         
         # Test database connection
-        await db.learning_plans.find_one()
+        await db.learning_plans.find_one({}, {"_id": 1})
         db_status = "healthy"
         
     except Exception as e:
@@ -2327,13 +2755,28 @@ async def health_check():
         "database": db_status,
         "model": OLLAMA_MODEL,
         "ollama_url": OLLAMA_URL,
+        "ollama_latency_ms": ollama_probe["latency_ms"] if ollama_probe else None,
+        "ollama_last_checked": ollama_probe["last_checked"] if ollama_probe else None,
         "mock_mode": MOCK_OLLAMA
     }
 
+@api_router.get("/llm-stats")
+async def llm_stats():
+    """Generation cache, request coalescing, scheduler and chat context counters"""
+    return {
+        "cache": llm_cache.stats(),
+        "coalescing": generation_flight.stats(),
+        "scheduler": generation_scheduler.stats(),
+        "chat_contexts": ollama_sessions.stats()
+    }
+
 # Include the routers in the main app
 app.include_router(api_router)
 app.include_router(enhanced_router)  # Add the enhanced AI-powered routes
 
+# Compresses JSON bodies for slow mobile links; event streams pass through untouched
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -2342,7 +2785,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-if not MOCK_DB:
-    @app.on_event("shutdown")
-    async def shutdown_db_client():
-        client.close()
\ No newline at end of file
+@app.on_event("startup")
+async def startup_db_client():
+    await open_database()
+    try:
+        await backfill_plan_records()
+    except Exception as e:
+        logger.error(f"Failed to backfill learning plan records: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await close_database()
+
+@app.on_event("startup")
+async def start_ollama_prober():
+    # Resolve the Ollama host once at startup and keep it fresh in the background
+    if not MOCK_OLLAMA:
+        await ollama_client.start_health_prober()
+
+@app.on_event("shutdown")
+async def shutdown_ollama_client():
+    await ollama_client.close()
+
+@app.on_event("shutdown")
+async def shutdown_cv_extraction():
+    shutdown_extraction_pool()
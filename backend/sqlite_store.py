@@ -0,0 +1,413 @@
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .mock_db import (
+    ASCENDING, COLLECTION_INDEXES, COLLECTION_SORTED_INDEXES, DEFAULT_INDEXES,
+    DeleteResult, InsertManyResult, InsertOneResult, UpdateResult,
+    apply_projection, apply_update, is_operator_condition, matches_query, sort_value, upsert_document,
+    validate_update
+)
+from .persistence import dumps_document, loads_document
+
+logger = logging.getLogger(__name__)
+
+# How long a writer waits for another process holding the write lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Collection and field names are inlined into SQL, so only plain identifiers qualify
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Query values compared in SQL; anything else is matched in Python after decoding
+_SQL_COMPARABLE = (str, int, float)
+
+_SQL_RANGE_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _field_expr(field: str) -> str:
+    # Must be spelled exactly like the index expressions for SQLite to use them
+    return f"json_extract(doc, '$.{field}')"
+
+
+def _pushable(field: str, value: Any) -> bool:
+    return bool(_IDENTIFIER.match(field)) and _sql_operand(value) is not None
+
+
+def _sql_operand(value: Any) -> Any:
+    """SQL parameter for an operator's operand, or None if it must be checked in Python.
+
+    json_extract returns tagged datetimes as their JSON text, and ISO
+    timestamps order correctly as text, so datetimes compare as encoded.
+    """
+    if type(value) in _SQL_COMPARABLE:
+        return value
+    if isinstance(value, datetime):
+        return dumps_document(value)
+    return None
+
+
+def _document_expr(projection: Optional[Dict[str, Any]]) -> str:
+    """Strip excluded fields inside SQLite so large payloads are never decoded"""
+    excluded = [field for field, keep in (projection or {}).items() if not keep and field != "_id"]
+    if not excluded or any(keep for field, keep in projection.items() if field != "_id"):
+        return "doc"
+    if not all(_IDENTIFIER.match(field) for field in excluded):
+        return "doc"
+    paths = ", ".join(f"'$.{field}'" for field in excluded)
+    return f"json_remove(doc, {paths})"
+
+
+class SQLiteCursor:
+    """Lazy Motor-style cursor over one SQLite collection table"""
+
+    def __init__(self, collection: "SQLiteCollection", query: Optional[Dict[str, Any]] = None,
+                 projection: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self.sort_keys: List[Tuple[str, int]] = []
+        self.skip_count = 0
+        self.limit_count: Optional[int] = None
+
+    def sort(self, key_or_list: Union[str, List[Tuple[str, int]]], direction: int = ASCENDING):
+        if isinstance(key_or_list, str):
+            self.sort_keys = [(key_or_list, direction)]
+        else:
+            self.sort_keys = list(key_or_list)
+        return self
+
+    def skip(self, n):
+        self.skip_count = max(int(n), 0)
+        return self
+
+    def limit(self, n):
+        # 0 means no limit, as in pymongo
+        self.limit_count = int(n) or None
+        return self
+
+    async def to_list(self, length):
+        limit = self.limit_count
+        if length is not None:
+            limit = length if limit is None else min(limit, length)
+        documents = await self.collection.database.run(
+            self.collection._find, self.query, self.sort_keys, self.skip_count, limit, self.projection
+        )
+        return [apply_projection(document, self.projection) for document in documents]
+
+
+class SQLiteCollection:
+    """One collection stored as a table of JSON documents.
+
+    Equality, range and ``$in`` filters on string, numeric and datetime
+    fields, ``$or`` of such filters, sorts, skip and limit are pushed into
+    SQL against ``json_extract`` expression indexes; other filters are
+    applied to the decoded documents.
+    """
+
+    def __init__(self, database: "SQLiteDB", name: str):
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        self.database = database
+        self.name = name
+        self._table_ready = False
+
+    # Schema
+
+    def _ensure_table(self, connection: sqlite3.Connection):
+        if self._table_ready:
+            return
+        connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.name}" (seq INTEGER PRIMARY KEY AUTOINCREMENT, doc TEXT NOT NULL)'
+        )
+        declared = [list(field) if isinstance(field, tuple) else [field]
+                    for field in COLLECTION_INDEXES.get(self.name, DEFAULT_INDEXES)]
+        for fields, partition in COLLECTION_SORTED_INDEXES.get(self.name, []):
+            fields = list(fields) if isinstance(fields, tuple) else [fields]
+            declared.append(fields if partition is None else [partition] + fields)
+        for columns in declared:
+            expressions = ", ".join(_field_expr(column) for column in columns)
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS "ix_{self.name}_{"_".join(columns)}" ON "{self.name}" ({expressions})'
+            )
+        self._table_ready = True
+
+    # Query compilation
+
+    def _where(self, query: Optional[Dict[str, Any]]) -> Tuple[str, List[Any], Dict[str, Any]]:
+        """Split a query into a SQL WHERE clause and a residual matched in Python"""
+        clauses, params, residual = self._compile(query)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params, residual
+
+    def _compile(self, query: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any], Dict[str, Any]]:
+        clauses, params, residual = [], [], {}
+        for field, value in (query or {}).items():
+            if field == "$or":
+                # Pushed down only when every branch compiles completely
+                branches = [self._compile(branch) for branch in value]
+                if not branches or any(branch_residual or not branch_clauses
+                                       for branch_clauses, _, branch_residual in branches):
+                    residual[field] = value
+                    continue
+                alternatives = [f"({' AND '.join(branch_clauses)})" for branch_clauses, _, _ in branches]
+                clauses.append(f"({' OR '.join(alternatives)})")
+                for _, branch_params, _ in branches:
+                    params.extend(branch_params)
+            elif _pushable(field, value):
+                clauses.append(f"{_field_expr(field)} = ?")
+                params.append(_sql_operand(value))
+            elif _IDENTIFIER.match(field) and is_operator_condition(value):
+                compiled = self._compile_condition(field, value)
+                if compiled is None:
+                    residual[field] = value
+                    continue
+                clauses.extend(compiled[0])
+                params.extend(compiled[1])
+            else:
+                residual[field] = value
+        return clauses, params, residual
+
+    @staticmethod
+    def _compile_condition(field: str, condition: Dict[str, Any]) -> Optional[Tuple[List[str], List[Any]]]:
+        """SQL clauses and parameters for an operator condition, or None if any operand is not SQL comparable"""
+        clauses, params = [], []
+        for op, operand in condition.items():
+            if op == "$in":
+                if not isinstance(operand, (list, tuple)):
+                    return None
+                values = [_sql_operand(value) for value in operand]
+                if any(value is None for value in values):
+                    return None
+                clauses.append(f"{_field_expr(field)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+                continue
+            value = _sql_operand(operand)
+            if value is None or op not in _SQL_RANGE_OPERATORS:
+                return None
+            clauses.append(f"{_field_expr(field)} {_SQL_RANGE_OPERATORS[op]} ?")
+            params.append(value)
+        return clauses, params
+
+    def _select(self, connection: sqlite3.Connection, query: Optional[Dict[str, Any]],
+                order_by: str = " ORDER BY seq", limit: Optional[int] = None, skip: int = 0,
+                projection: Optional[Dict[str, Any]] = None):
+        """Yield (seq, document) for matching rows; limit and skip go to SQL only when exact"""
+        self._ensure_table(connection)
+        where, params, residual = self._where(query)
+        # Residual filters need the whole document, so projections only go to SQL without them
+        document_expr = "doc" if residual else _document_expr(projection)
+        sql = f'SELECT seq, {document_expr} FROM "{self.name}"{where}{order_by}'
+        if not residual and (limit is not None or skip):
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [-1 if limit is None else limit, skip]
+        for seq, doc in connection.execute(sql, params):
+            document = loads_document(doc)
+            if residual and not matches_query(document, residual):
+                continue
+            yield seq, document
+
+    # Operations, run on the database worker thread
+
+    def _find_one(self, connection, query, projection=None):
+        for _, document in self._select(connection, query, limit=1, projection=projection):
+            return document
+        return None
+
+    def _find(self, connection, query, sort_keys, skip, limit, projection=None):
+        if limit is not None and limit <= 0:
+            return []
+        _, _, residual = self._where(query)
+        if all(_IDENTIFIER.match(field) for field, _ in sort_keys):
+            terms = [f"{_field_expr(field)} {'ASC' if direction == ASCENDING else 'DESC'}"
+                     for field, direction in sort_keys]
+            order_by = f" ORDER BY {', '.join(terms + ['seq'])}"
+            rows = self._select(connection, query, order_by, limit, skip, projection)
+            if not residual:
+                return [document for _, document in rows]
+            documents = [document for _, document in rows]
+        else:
+            documents = [document for _, document in self._select(connection, query)]
+            for field, direction in reversed(sort_keys):
+                documents.sort(key=lambda document: sort_value(document.get(field)),
+                               reverse=direction != ASCENDING)
+        end = None if limit is None else skip + limit
+        return documents[skip:end]
+
+    def _count(self, connection, query):
+        where, params, residual = self._where(query)
+        if residual:
+            return sum(1 for _ in self._select(connection, query))
+        self._ensure_table(connection)
+        return connection.execute(f'SELECT COUNT(*) FROM "{self.name}"{where}', params).fetchone()[0]
+
+    def _insert_one(self, connection, document):
+        self._ensure_table(connection)
+        with self.database.write_transaction(connection):
+            connection.execute(f'INSERT INTO "{self.name}" (doc) VALUES (?)', (dumps_document(document),))
+        return InsertOneResult(document.get("id"))
+
+    def _insert_many(self, connection, documents):
+        self._ensure_table(connection)
+        with self.database.write_transaction(connection):
+            connection.executemany(
+                f'INSERT INTO "{self.name}" (doc) VALUES (?)',
+                [(dumps_document(document),) for document in documents]
+            )
+        return InsertManyResult([document.get("id") for document in documents])
+
+    def _delete_one(self, connection, query):
+        self._ensure_table(connection)
+        with self.database.write_transaction(connection):
+            for seq, _ in self._select(connection, query, limit=1):
+                connection.execute(f'DELETE FROM "{self.name}" WHERE seq = ?', (seq,))
+                return DeleteResult(1)
+        return DeleteResult(0)
+
+    def _delete_many(self, connection, query):
+        self._ensure_table(connection)
+        with self.database.write_transaction(connection):
+            seqs = [(seq,) for seq, _ in self._select(connection, query)]
+            connection.executemany(f'DELETE FROM "{self.name}" WHERE seq = ?', seqs)
+        return DeleteResult(len(seqs))
+
+    def _modify(self, connection, query, update, upsert):
+        """Update the first match (or upsert); returns (document before, document after, upserted)"""
+        validate_update(update)
+        self._ensure_table(connection)
+        # Read and write inside one IMMEDIATE transaction so concurrent workers serialize
+        with self.database.write_transaction(connection):
+            for seq, document in self._select(connection, query, limit=1):
+                fields = apply_update(document, update)
+                if not fields:
+                    return document, document, False
+                updated = {**document, **fields}
+                connection.execute(
+                    f'UPDATE "{self.name}" SET doc = ? WHERE seq = ?', (dumps_document(updated), seq)
+                )
+                return document, updated, False
+            if upsert:
+                document = upsert_document(query, update)
+                connection.execute(f'INSERT INTO "{self.name}" (doc) VALUES (?)', (dumps_document(document),))
+                return None, document, True
+        return None, None, False
+
+    def _update_one(self, connection, query, update, upsert):
+        before, after, upserted = self._modify(connection, query, update, upsert)
+        if upserted:
+            return UpdateResult(0, 0, after.get("id"))
+        if before is None:
+            return UpdateResult(0, 0)
+        return UpdateResult(1, int(after is not before))
+
+    def _find_one_and_update(self, connection, query, update, upsert, return_document):
+        before, after, _ = self._modify(connection, query, update, upsert)
+        return after if return_document else before
+
+    # Motor-compatible API
+
+    async def find_one(self, query=None, projection=None):
+        return apply_projection(await self.database.run(self._find_one, query, projection), projection)
+
+    async def insert_one(self, document):
+        return await self.database.run(self._insert_one, document)
+
+    async def insert_many(self, documents):
+        return await self.database.run(self._insert_many, documents)
+
+    async def delete_one(self, query):
+        return await self.database.run(self._delete_one, query)
+
+    async def delete_many(self, query):
+        return await self.database.run(self._delete_many, query)
+
+    async def update_one(self, query, update, upsert=False):
+        """Apply $set / $setOnInsert / $inc / $push / $addToSet to the first matching document"""
+        return await self.database.run(self._update_one, query, update, upsert)
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False):
+        """Update like update_one and return the document before it, or after it if return_document is truthy"""
+        return await self.database.run(self._find_one_and_update, query, update, upsert, return_document)
+
+    def find(self, query=None, projection=None):
+        # This is not an async method, it returns a cursor
+        return SQLiteCursor(self, query, projection)
+
+    async def count_documents(self, query):
+        return await self.database.run(self._count, query)
+
+
+class _WriteTransaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        # Take the database write lock up front instead of upgrading a read lock later
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class SQLiteDB:
+    """Motor-style database backed by one SQLite file in WAL mode.
+
+    Every uvicorn worker opens its own connection to the same file; WAL
+    lets readers proceed while one writer commits, and writes take the
+    lock with ``BEGIN IMMEDIATE`` so read-modify-write updates from
+    different processes never interleave. Blocking SQLite calls run in a
+    worker thread, serialized per process by a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._collections: Dict[str, SQLiteCollection] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly by writers
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._connection = connection
+            logger.info(f"Opened SQLite database at {self.path}")
+        return self._connection
+
+    def _call(self, operation, *args):
+        with self._lock:
+            return operation(self._connect(), *args)
+
+    async def run(self, operation, *args):
+        return await asyncio.to_thread(self._call, operation, *args)
+
+    def write_transaction(self, connection: sqlite3.Connection) -> _WriteTransaction:
+        return _WriteTransaction(connection)
+
+    def __getitem__(self, collection_name: str) -> SQLiteCollection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._collections[collection_name] = SQLiteCollection(self, collection_name)
+        return collection
+
+    def __getattr__(self, collection_name: str) -> SQLiteCollection:
+        if collection_name.startswith("_"):
+            raise AttributeError(collection_name)
+        return self[collection_name]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
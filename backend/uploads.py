@@ -0,0 +1,130 @@
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Uploads are buffered in memory up to this size, then spill to a temporary file
+UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+
+@dataclass
+class ReceivedFile:
+    """A file part read from a multipart request body, rewound and ready to read"""
+    filename: str
+    content_type: str
+    file: tempfile.SpooledTemporaryFile
+    size: int = 0
+
+    def close(self):
+        self.file.close()
+
+
+@dataclass
+class _Part:
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+async def receive_file(request: Request, field_name: str, max_bytes: int,
+                       allowed_types: Optional[List[str]] = None,
+                       too_large_detail: str = "File too large",
+                       invalid_type_detail: str = "Invalid file type") -> ReceivedFile:
+    """Stream one file field of a multipart/form-data body into a spooled buffer.
+
+    The body is parsed chunk by chunk as it arrives, so the size limit and
+    the part's declared content type are enforced before the rest of the
+    upload is read: an oversized request is rejected from its
+    Content-Length alone, and an oversized part as soon as it crosses
+    max_bytes. Other form fields are skipped.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(status_code=400, detail=too_large_detail)
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    received: Optional[ReceivedFile] = None
+    target: Optional[_Part] = None  # The part being written to buffer
+    part = _Part()
+    header_field = bytearray()
+    header_value = bytearray()
+
+    def on_part_begin():
+        nonlocal part
+        part = _Part()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        part.headers[header_field.decode("latin-1").lower()] = header_value.decode("latin-1")
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        nonlocal received, target
+        _, disposition = parse_options_header(part.headers.get("content-disposition"))
+        if received is not None or disposition.get(b"name", b"").decode("utf-8", errors="replace") != field_name:
+            return  # Other fields, and repeats of this one, are skipped
+        part_type = part.headers.get("content-type", "application/octet-stream")
+        if allowed_types is not None and part_type not in allowed_types:
+            raise HTTPException(status_code=400, detail=invalid_type_detail)
+        received = ReceivedFile(
+            filename=disposition.get(b"filename", b"").decode("utf-8", errors="replace"),
+            content_type=part_type,
+            file=buffer
+        )
+        target = part
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part is not target:
+            return
+        received.size += end - start
+        if received.size > max_bytes:
+            raise HTTPException(status_code=400, detail=too_large_detail)
+        buffer.write(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data
+    })
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                parser.write(chunk)
+        parser.finalize()
+    except HTTPException:
+        buffer.close()
+        raise
+    except Exception as e:
+        buffer.close()
+        logger.warning(f"Malformed multipart upload: {str(e)}")
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+
+    if received is None:
+        buffer.close()
+        raise HTTPException(status_code=400, detail=f"Missing file field '{field_name}'")
+    received.file.seek(0)
+    return received
@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import mock_db
+
+
+@pytest.fixture
+def empty_db():
+    """Clear every in-memory collection before and after a test"""
+    def clear():
+        for store in mock_db.in_memory_db.values():
+            for key in list(store.documents):
+                store.discard(key)
+    clear()
+    yield mock_db.in_memory_db
+    clear()
+
+
+@pytest.fixture
+def client(empty_db):
+    """The API on the in-memory database; startup hooks (and the Ollama prober) are not run"""
+    from backend.server import app
+    return TestClient(app)
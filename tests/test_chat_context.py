@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.chat_context import build_conversation_context
+from backend.database import db
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+# 20 estimated tokens per message, 22 with the per-message overhead
+PADDING = " Some more detail about the topic." * 2
+
+
+async def add_messages(first: int, count: int):
+    for number in range(first, first + count):
+        await db.chat_messages.insert_one({
+            "id": f"m{number:02d}",
+            "session_id": "s1",
+            "sender": "user" if number % 2 == 0 else "ai",
+            "message": f"Message {number:02d}.{PADDING}",
+            "timestamp": START + timedelta(seconds=number)
+        })
+
+
+async def load_session():
+    return await db.learning_sessions.find_one({"id": "s1"})
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_window_keeps_the_newest_messages_within_the_budget(empty_db):
+    async def scenario():
+        await db.learning_sessions.insert_one({"id": "s1", "context_summary": [], "summary_through": None})
+        await add_messages(0, 10)
+        return await build_conversation_context(await load_session(), budget=70)
+
+    context = run(scenario())
+    # Three messages at 22 tokens fit in 70; the fourth would not
+    assert [text.split(".")[0] for _, text in context.recent] == ["Message 07", "Message 08", "Message 09"]
+    assert context.recent[0][0] == "Tutor"
+    assert context.last_message_id == "m09"
+    assert context.summary == [f"{'Student' if n % 2 == 0 else 'Tutor'}: Message {n:02d}." for n in range(7)]
+
+
+def test_slid_out_messages_are_folded_once(empty_db):
+    async def scenario():
+        await db.learning_sessions.insert_one({"id": "s1", "context_summary": [], "summary_through": None})
+        await add_messages(0, 5)
+        first = await build_conversation_context(await load_session(), budget=70)
+        stored = await load_session()
+        # Nothing new: the same summary is reused, not folded again
+        again = await build_conversation_context(stored, budget=70)
+        unchanged = await load_session()
+        # One new message pushes exactly one more out of the window
+        await add_messages(5, 1)
+        later = await build_conversation_context(unchanged, budget=70)
+        return first, stored, again, unchanged, later, await load_session()
+
+    first, stored, again, unchanged, later, final = run(scenario())
+    assert first.summary == ["Student: Message 00.", "Tutor: Message 01."]
+    assert stored["summary_through"] == START + timedelta(seconds=1)
+    assert again.summary == first.summary
+    assert unchanged["context_summary"] == stored["context_summary"]
+    assert later.summary == ["Student: Message 00.", "Tutor: Message 01.", "Student: Message 02."]
+    assert final["context_summary"] == later.summary
+    assert final["summary_through"] == START + timedelta(seconds=2)
+
+
+def test_a_lost_race_does_not_overwrite_a_newer_summary(empty_db):
+    async def scenario():
+        # Stored before sessions had summary fields
+        await db.learning_sessions.insert_one({"id": "s1"})
+        await add_messages(0, 5)
+        stale = await load_session()
+        await build_conversation_context(await load_session(), budget=70)
+        await add_messages(5, 3)
+        await build_conversation_context(await load_session(), budget=70)
+        newer = await load_session()
+        # A turn that read the session before either update finishes last,
+        # having folded fewer messages (its window was larger)
+        await build_conversation_context(stale, budget=120)
+        return newer, await load_session()
+
+    newer, final = run(scenario())
+    assert newer["summary_through"] == START + timedelta(seconds=4)
+    assert final["context_summary"] == newer["context_summary"]
+    assert final["summary_through"] == newer["summary_through"]
@@ -0,0 +1,92 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.compression import CompressionMiddleware, negotiate_encoding, supported_encodings
+
+BODY = {"content": "Network segmentation limits lateral movement. " * 100}
+ETAG = '"0123456789abcdef"'
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+@app.get("/section")
+def section():
+    return JSONResponse(BODY, headers={"ETag": ETAG})
+
+
+@app.get("/small")
+def small():
+    return JSONResponse({"ok": True}, headers={"ETag": ETAG})
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((b"x" * 600 + b"\n" for _ in range(5)), media_type="text/plain")
+
+
+@app.get("/events")
+def events():
+    return StreamingResponse((b"data: token\n\n" for _ in range(100)), media_type="text/event-stream")
+
+
+@app.get("/unchanged")
+def unchanged():
+    return Response(status_code=304, headers={"ETag": ETAG})
+
+
+client = TestClient(app)
+
+
+def get(path, encoding="gzip"):
+    # httpx decodes the body but keeps the response headers as sent
+    return client.get(path, headers={"Accept-Encoding": encoding})
+
+
+def test_compressed_body_gets_an_encoded_etag():
+    response = get("/section")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"0123456789abcdef-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == BODY
+
+
+def test_identity_body_keeps_the_handler_etag():
+    response = get("/section", "identity")
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_small_bodies_are_not_compressed():
+    response = get("/small")
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+
+def test_streamed_bodies_are_compressed_without_a_length():
+    response = get("/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"x" * 600 + b"\n" + (b"x" * 600 + b"\n") * 4
+
+
+def test_event_streams_and_not_modified_pass_through():
+    events = get("/events")
+    assert "content-encoding" not in events.headers
+    assert events.content == b"data: token\n\n" * 100
+    unchanged = get("/unchanged")
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == ETAG
+
+
+def test_negotiation_honours_quality_values():
+    # gzip is refused outright; the wildcard only admits brotli, when it is installed
+    expected = "br" if "br" in supported_encodings() else None
+    assert negotiate_encoding("gzip;q=0, *;q=0.5") == expected
+    assert negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
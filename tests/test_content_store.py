@@ -0,0 +1,53 @@
+import asyncio
+
+from backend.content_store import BlobCache, blob_cache, dehydrate_section, hydrate_section, store_blob
+from backend.database import db
+
+SECTION = {
+    "id": "1.1",
+    "title": "Défense en profondeur",
+    "content": "Segmentation réseau — pare-feu, IDS/IPS et journalisation",
+    "code_examples": ["nmap -sV cible", "tcpdump -i eth0 port 443"],
+    "key_concepts": ["Segmentation"],
+    "estimated_time": 15
+}
+
+
+def test_blob_cache_is_bounded_by_encoded_size():
+    cache = BlobCache(max_bytes=12)
+    cache.set("a", "ééé")  # 3 characters, 6 bytes
+    cache.set("b", "ééé")
+    assert cache.bytes == 12
+    cache.set("c", "é")
+    assert cache.get("a") is None
+    assert cache.get("b") == "ééé"
+    assert cache.bytes == 8
+
+
+def test_blob_cache_skips_text_larger_than_the_budget():
+    cache = BlobCache(max_bytes=4)
+    cache.set("a", "ééé")
+    assert cache.get("a") is None
+    assert cache.bytes == 0
+
+
+def test_section_round_trip_through_blobs():
+    async def scenario():
+        record = await dehydrate_section(dict(SECTION))
+        return record, await hydrate_section(record)
+
+    record, hydrated = asyncio.run(scenario())
+    assert list(record) == ["id", "title", "body_ref", "estimated_time"]
+    assert hydrated == SECTION
+    assert list(hydrated) == list(SECTION)
+
+
+def test_stored_blob_size_is_in_utf8_bytes(empty_db):
+    async def scenario():
+        ref = await store_blob("Défense — réseau")
+        return ref, await db.content_blobs.find_one({"id": ref})
+
+    ref, blob = asyncio.run(scenario())
+    assert blob["size"] == len("Défense — réseau".encode("utf-8")) == 20
+    # The record and the cache charge the same size
+    assert blob_cache._entries[ref][1] == blob["size"]
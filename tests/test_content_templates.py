@@ -0,0 +1,90 @@
+import copy
+import dataclasses
+
+import pytest
+from pydantic import ValidationError
+
+from backend.server import (STRUCTURED_CONTENT_BUILDERS, STRUCTURED_CONTENT_TEMPLATES, compile_content_template,
+                            freeze_content, get_content_template, thaw_content)
+
+CONTENT = {
+    "table_of_contents": {
+        "chapters": [
+            {"id": "1", "number": 1, "title": "Basics", "sections": [{"id": "1.1", "title": "Intro"}, {"id": "1.2", "title": "Ports"}]},
+            {"id": "2", "number": 2, "title": "Tools", "sections": [{"id": "2.1", "title": "nmap"}]}
+        ],
+        "total_chapters": 2,
+        "total_estimated_time": 90,
+        "difficulty_level": "Beginner"
+    },
+    "chapters": [{
+        "id": "1",
+        "chapter_number": 1,
+        "title": "Basics",
+        "description": "Network basics",
+        "sections": [{"id": "1.1", "title": "Intro", "content": "Hosts and ports", "code_examples": ["nmap -sn 10.0.0.0/24"]}]
+    }]
+}
+
+
+def broken(change):
+    content = copy.deepcopy(CONTENT)
+    change(content)
+    return content
+
+
+def test_valid_template_compiles_to_the_models_output():
+    template = compile_content_template("test", CONTENT)
+    assert thaw_content(template.table_of_contents) == CONTENT["table_of_contents"]
+    chapter = thaw_content(template.chapters[0])
+    # Validated through the models, so defaults are filled in
+    assert chapter["sections"][0]["estimated_time"] == 10
+    assert chapter["prerequisites"] == []
+
+
+@pytest.mark.parametrize("change, message", [
+    (lambda content: content["table_of_contents"].update(total_chapters=3), "total_chapters is 3"),
+    (lambda content: content["chapters"].append({**content["chapters"][0], "id": "9"}), "chapter 9 is missing"),
+    (lambda content: content["chapters"][0]["sections"].append({"id": "1.9", "title": "Extra", "content": "..."}),
+     r"sections \['1.9'\] of chapter 1")
+])
+def test_template_inconsistent_with_its_outline_is_rejected(change, message):
+    with pytest.raises(ValueError, match=message):
+        compile_content_template("test", broken(change))
+
+
+def test_template_failing_model_validation_is_rejected():
+    with pytest.raises(ValidationError):
+        compile_content_template("test", broken(lambda content: content["chapters"][0]["sections"][0].pop("content")))
+    with pytest.raises(ValidationError):
+        compile_content_template("test", broken(lambda content: content["table_of_contents"].pop("difficulty_level")))
+
+
+def test_compiled_templates_cannot_be_mutated():
+    template = STRUCTURED_CONTENT_TEMPLATES["network-security"]
+    section = template.chapters[0]["sections"][0]
+    with pytest.raises(TypeError):
+        section["content"] = "changed"
+    with pytest.raises(TypeError):
+        template.table_of_contents["chapters"][0]["title"] = "changed"
+    with pytest.raises(AttributeError):
+        section["code_examples"].append("rm -rf /")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        template.chapters = ()
+
+
+def test_thaw_round_trips_and_returns_an_independent_copy():
+    original = STRUCTURED_CONTENT_BUILDERS["ethical-hacking"]()
+    frozen = freeze_content(original)
+    thawed = thaw_content(frozen)
+    assert thawed == original
+    assert list(thawed["chapters"][0]) == list(original["chapters"][0])
+
+    thawed["chapters"][0]["sections"][0]["code_examples"].append("extra")
+    again = thaw_content(frozen)
+    assert again["chapters"][0]["sections"][0]["code_examples"] == original["chapters"][0]["sections"][0]["code_examples"]
+
+
+def test_topics_pick_their_template_and_fall_back_to_the_default():
+    assert get_content_template("ethical-hacking").name == "ethical-hacking"
+    assert get_content_template("cloud-security").name == "network-security"
@@ -0,0 +1,102 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from backend import cv_extraction
+from backend.cv_extraction import DOC_TYPE, DOCX_TYPE, PDF_TYPE, CVExtractionError, extract_cv_text
+
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+    '<w:p><w:r><w:t>Security analyst</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Splunk</w:t><w:tab/><w:t>Wireshark</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+
+def make_docx() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", DOCUMENT_XML)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A fresh extraction pool per test, shut down afterwards"""
+    monkeypatch.setattr(cv_extraction, "CV_EXTRACTION_WORKERS", 1)
+    monkeypatch.setattr(cv_extraction, "_slots", None)
+    yield
+    cv_extraction.shutdown_extraction_pool()
+
+
+def test_docx_text_is_extracted(pool):
+    text = asyncio.run(extract_cv_text(make_docx(), DOCX_TYPE))
+    assert text.split("\n") == ["Security analyst", "Splunk\tWireshark", ""]
+
+
+def test_corrupt_pdf_is_rejected_and_the_pool_keeps_working(pool):
+    pytest.importorskip("pypdf")
+
+    async def scenario():
+        with pytest.raises(CVExtractionError):
+            await extract_cv_text(b"%PDF-1.7\n" + b"\x00garbage" * 64, PDF_TYPE)
+        return await extract_cv_text(make_docx(), DOCX_TYPE)
+
+    assert "Security analyst" in asyncio.run(scenario())
+
+
+def test_document_over_its_time_budget_is_rejected_and_the_pool_recovers(pool, monkeypatch):
+    # Millions of short text runs keep the legacy .doc scanner busy far longer than 50ms
+    slow_document = b"\xd0\xcf\x11\xe0" + b"skill \x01" * 4_000_000
+    monkeypatch.setattr(cv_extraction, "CV_EXTRACTION_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        with pytest.raises(CVExtractionError, match="too long"):
+            await extract_cv_text(slow_document, DOC_TYPE)
+        return await extract_cv_text(make_docx(), DOCX_TYPE)
+
+    assert "Wireshark" in asyncio.run(scenario())
+
+
+def test_unsupported_type_is_rejected_without_the_pool(pool):
+    with pytest.raises(CVExtractionError):
+        asyncio.run(extract_cv_text(b"plain text", "text/plain"))
+    assert cv_extraction._pool is None
+
+
+def _busy_parser_that_swallows_errors(data: bytes) -> str:
+    while True:
+        try:
+            sum(range(10_000))
+        except Exception:
+            pass  # The recovery loop some parsers run around malformed objects
+
+
+def _extract_with_swallowing_parser(kind, data, max_pages, max_chars, timeout):
+    # Runs in the worker, which imports this module by name under spawn
+    cv_extraction._extract_legacy_doc = _busy_parser_that_swallows_errors
+    return cv_extraction._extract(kind, data, max_pages, max_chars, timeout)
+
+
+def test_timeout_fires_inside_a_parser_that_catches_exception(pool, monkeypatch):
+    monkeypatch.setattr(cv_extraction, "_extract", _extract_with_swallowing_parser)
+    monkeypatch.setattr(cv_extraction, "CV_EXTRACTION_TIMEOUT_SECONDS", 0.05)
+    discarded = []
+    discard_pool = cv_extraction._discard_pool
+    monkeypatch.setattr(cv_extraction, "_discard_pool", lambda pool: (discarded.append(pool), discard_pool(pool)))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(CVExtractionError, match="too long"):
+            await extract_cv_text(b"\xd0\xcf\x11\xe0", DOC_TYPE)
+        return loop.time() - started
+
+    pool_before = cv_extraction._get_pool()
+    # Well inside the parent's timeout + 5s backstop, and the same workers carry on
+    assert asyncio.run(scenario()) < 3
+    assert discarded == []
+    assert cv_extraction._pool is pool_before
@@ -0,0 +1,54 @@
+import asyncio
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from backend.indexes import ensure_indexes
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for index reconciliation"""
+
+    def __init__(self, indexes=None, reject_unique=False):
+        self.indexes = {"_id_": {"key": [("_id", 1)]}, **(indexes or {})}
+        self.reject_unique = reject_unique
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+    async def create_indexes(self, models):
+        for model in models:
+            document = model.document
+            if self.reject_unique and document.get("unique"):
+                raise DuplicateKeyError("E11000 duplicate key error")
+            info = {"key": list(document["key"].items())}
+            info.update({option: document[option] for option in ("unique", "sparse") if option in document})
+            self.indexes[document["name"]] = info
+
+
+def test_failed_rebuild_restores_the_old_index_and_continues():
+    database = {
+        "user_progress": FakeCollection({"user_id": {"key": [("user_id", 1)]}}, reject_unique=True),
+        "chat_messages": FakeCollection()
+    }
+    declarations = {
+        "user_progress": [IndexModel([("user_id", ASCENDING)], name="user_id", unique=True)],
+        "chat_messages": [IndexModel([("session_id", ASCENDING)], name="session_id")]
+    }
+
+    result = asyncio.run(ensure_indexes(database, declarations))
+
+    assert result == {"created": 1, "rebuilt": 0, "failed": 1}
+    assert database["user_progress"].indexes["user_id"] == {"key": [("user_id", 1)]}
+    assert "session_id" in database["chat_messages"].indexes
+
+
+def test_matching_indexes_are_left_alone():
+    collection = FakeCollection({"session_id": {"key": [("session_id", 1)]}})
+    declarations = {"chat_messages": [IndexModel([("session_id", ASCENDING)], name="session_id")]}
+    assert asyncio.run(ensure_indexes({"chat_messages": collection}, declarations)) == {
+        "created": 0, "rebuilt": 0, "failed": 0
+    }
@@ -0,0 +1,33 @@
+from backend.keyword_matcher import KeywordMatcher, normalize_text
+
+MATCHER = KeywordMatcher(["ids", "soc", "c++", "kali linux", "linux", "incident response", "python"])
+
+
+def test_keywords_inside_other_words_do_not_match():
+    assert MATCHER.matches("Managed vendor bids and social media; ran pythonic scripts") == set()
+
+
+def test_whole_words_match_at_text_edges_and_next_to_punctuation():
+    assert MATCHER.matches("IDS tuning, SOC shifts (24/7) and Python") == {"ids", "soc", "python"}
+
+
+def test_keywords_ending_in_symbols():
+    assert MATCHER.matches("Wrote C++ tooling") == {"c++"}
+    assert MATCHER.matches("Wrote c++x tooling") == set()
+
+
+def test_phrases_match_across_line_breaks_and_overlaps_are_reported():
+    text = "Daily Kali\n  Linux user; led Incident\tResponse"
+    assert MATCHER.matches(text) == {"kali linux", "linux", "incident response"}
+
+
+def test_offsets_refer_to_the_normalized_text():
+    text = "Skills:\n\nIDS,  SOC"
+    normalized = normalize_text(text)
+    for start, keyword in MATCHER.finditer(text):
+        assert normalized[start:start + len(keyword)] == keyword
+
+
+def test_duplicate_and_blank_keywords_are_ignored():
+    matcher = KeywordMatcher(["Linux", "linux ", "", "  "])
+    assert matcher.keywords == ["linux"]
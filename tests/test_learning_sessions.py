@@ -0,0 +1,20 @@
+import asyncio
+
+from backend.server import db
+
+
+def test_update_progress_of_a_missing_session_is_404(client):
+    response = client.post("/api/update-progress",
+                           params={"session_id": "missing", "progress_percentage": 50, "time_spent": 10})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Learning session not found"
+
+
+def test_update_progress_of_a_session(client):
+    asyncio.run(db.learning_sessions.insert_one({"id": "s1", "plan_id": "p1", "progress_percentage": 0.0}))
+    response = client.post("/api/update-progress",
+                           params={"session_id": "s1", "progress_percentage": 50, "time_spent": 10})
+    assert response.status_code == 200
+    assert response.json() == {"success": True, "progress_percentage": 50.0, "time_spent": 10}
+    session = asyncio.run(db.learning_sessions.find_one({"id": "s1"}))
+    assert session["progress_percentage"] == 50.0
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+
+from backend import llm_cache, server
+from backend.llm_cache import LLMResponseCache, SingleFlight
+
+
+def test_concurrent_calls_share_one_generation():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def producer():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "reply"
+
+        results = await asyncio.gather(*(flight.do("key", producer) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["reply"] * 5
+    assert flight.stats() == {"in_flight": 0, "generations": 1, "coalesced": 4}
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        started = []
+        release = asyncio.Event()
+
+        async def producer():
+            started.append(asyncio.current_task())
+            await release.wait()
+            return "reply"
+
+        leader = asyncio.create_task(flight.do("key", producer))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("key", producer)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0)
+        release.set()
+        return flight, started, await asyncio.gather(*followers)
+
+    flight, started, results = asyncio.run(scenario())
+    # The cancelled leader's run plus exactly one takeover by a follower
+    assert len(started) == 2
+    assert results == ["reply", "reply"]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def producer():
+            await release.wait()
+            return "reply"
+
+        leader = asyncio.create_task(flight.do("key", producer))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", producer))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        release.set()
+        return await leader
+
+    assert asyncio.run(scenario()) == "reply"
+
+
+def test_leader_failure_reaches_followers():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def producer():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("backend down")
+
+        return await asyncio.gather(*(flight.do("key", producer) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=60, enabled=True)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: now[0])
+    cache = LLMResponseCache(max_entries=4, ttl_seconds=60, enabled=True)
+    cache.set("a", "reply")
+    now[0] += 59
+    assert cache.get("a") == "reply"
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_key_does_not_depend_on_option_order():
+    first = LLMResponseCache.make_key("llama3", "prompt", {"temperature": 0.7, "top_p": 0.9, "max_tokens": 8192})
+    second = LLMResponseCache.make_key("llama3", "prompt", {"max_tokens": 8192, "top_p": 0.9, "temperature": 0.7})
+    assert first == second
+    assert LLMResponseCache.make_key("llama3", "prompt") == LLMResponseCache.make_key("llama3", "prompt", {})
+
+
+def test_key_changes_with_every_generation_input():
+    options = {"temperature": 0.7}
+    base = LLMResponseCache.make_key("llama3", "prompt", options)
+    variants = [
+        LLMResponseCache.make_key("llama3:8b", "prompt", options),
+        LLMResponseCache.make_key("llama3", "prompt ", options),
+        LLMResponseCache.make_key("llama3", "prompt", {"temperature": 0.8}),
+        LLMResponseCache.make_key("llama3", "prompt", {**options, "top_p": 0.9}),
+        LLMResponseCache.make_key("llama3", "prompt", options, system="Be brief")
+    ]
+    assert base not in variants
+    assert len(set(variants)) == len(variants)
+
+
+@pytest.fixture
+def stream_cache(monkeypatch):
+    """A fresh response cache for the streaming endpoints, and a count of upstream streams"""
+    cache = LLMResponseCache(max_entries=8, ttl_seconds=60, enabled=True)
+    monkeypatch.setattr(server, "llm_cache", cache)
+    upstream = []
+    stream_tokens = server.stream_ollama_tokens
+
+    def counting_stream(*args, **kwargs):
+        upstream.append(args[0])
+        return stream_tokens(*args, **kwargs)
+
+    monkeypatch.setattr(server, "stream_ollama_tokens", counting_stream)
+    return cache, upstream
+
+
+async def collect(tokens):
+    return [token async for token in tokens]
+
+
+def test_completed_stream_is_cached_and_replayed_in_one_chunk(stream_cache):
+    cache, upstream = stream_cache
+    first = asyncio.run(collect(server.stream_with_ollama("prompt", "Scan the network with nmap.", cache_key="k")))
+    replay = asyncio.run(collect(server.stream_with_ollama("prompt", "Scan the network with nmap.", cache_key="k")))
+
+    assert first == ["Scan ", "the ", "network ", "with ", "nmap."]
+    assert replay == ["Scan the network with nmap."]
+    assert upstream == ["prompt"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_failed_stream_is_not_cached(stream_cache, monkeypatch):
+    cache, _ = stream_cache
+
+    async def failing_stream(*args, **kwargs):
+        yield "Partial "
+        raise server.HTTPException(status_code=503, detail="Ollama went away")
+
+    monkeypatch.setattr(server, "stream_ollama_tokens", failing_stream)
+    with pytest.raises(server.HTTPException):
+        asyncio.run(collect(server.stream_with_ollama("prompt", "unused", cache_key="k")))
+    assert cache.get("k") is None
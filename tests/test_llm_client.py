@@ -0,0 +1,107 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import llm_client
+from backend.llm_client import OllamaClient
+
+PRIMARY = "http://ollama-a:11434"
+SECONDARY = "http://ollama-b:11434"
+
+
+class FakeHosts:
+    """Transport answering /api/tags for the hosts currently marked up"""
+
+    def __init__(self, *up: str):
+        self.up = set(up)
+        self.probes = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = f"{request.url.scheme}://{request.url.host}:{request.url.port}"
+        self.probes.append(host)
+        if host not in self.up:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"models": []})
+
+
+def make_client(fake: FakeHosts) -> OllamaClient:
+    client = OllamaClient([PRIMARY, SECONDARY])
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    return client
+
+
+def test_unreachable_host_is_skipped_in_favour_of_the_next():
+    fake = FakeHosts(SECONDARY)
+    client = make_client(fake)
+    assert asyncio.run(client.probe_hosts()) is True
+    assert client.get_host() == SECONDARY
+    assert client.is_host_healthy(PRIMARY) is False
+    assert client.is_host_healthy(SECONDARY) is True
+
+
+def test_recovered_host_regains_its_priority():
+    fake = FakeHosts(SECONDARY)
+    client = make_client(fake)
+    asyncio.run(client.probe_hosts())
+    fake.up.add(PRIMARY)
+    asyncio.run(client.probe_hosts())
+    assert client.get_host() == PRIMARY
+
+
+def test_probe_delay_backs_off_exponentially_and_resets_on_success(monkeypatch):
+    monkeypatch.setattr(llm_client, "OLLAMA_PROBE_BACKOFF_MIN", 1.0)
+    monkeypatch.setattr(llm_client, "OLLAMA_PROBE_BACKOFF_MAX", 8.0)
+    monkeypatch.setattr(llm_client, "OLLAMA_PROBE_INTERVAL", 30.0)
+    fake = FakeHosts()
+    client = make_client(fake)
+
+    delays = []
+    for _ in range(5):
+        asyncio.run(client.probe_hosts())
+        delays.append(client.next_probe_delay())
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
+    # The last known host is kept while nothing answers
+    assert client.get_host() == PRIMARY
+    assert client.health_status()["consecutive_failures"] == 5
+
+    fake.up.add(SECONDARY)
+    asyncio.run(client.probe_hosts())
+    assert client.next_probe_delay() == 30.0
+    assert client.health_status()["consecutive_failures"] == 0
+    assert client.get_host() == SECONDARY
+
+
+def test_reported_failure_is_skipped_until_a_probe_succeeds(monkeypatch):
+    monkeypatch.setattr(llm_client, "OLLAMA_PROBE_INTERVAL", 3600.0)
+    monkeypatch.setattr(llm_client, "OLLAMA_PROBE_BACKOFF_MIN", 0.01)
+    fake = FakeHosts(PRIMARY, SECONDARY)
+    client = make_client(fake)
+
+    async def scenario():
+        await client.start_health_prober()
+        assert client.get_host() == PRIMARY
+        # A request to the primary fails; the report wakes the prober at once
+        fake.up.discard(PRIMARY)
+        client.report_failure(PRIMARY)
+        assert client.health_status()["healthy"] is False
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if client.get_host() == SECONDARY:
+                break
+        failed_over = client.get_host(), client.is_host_healthy(PRIMARY)
+
+        # Once it answers again, the next scheduled probe moves back to the primary
+        fake.up.add(PRIMARY)
+        client._reprobe_event.set()  # Stands in for the probe interval elapsing
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if client.get_host() == PRIMARY and client.healthy:
+                break
+        await client.close()
+        return failed_over
+
+    failed_over = asyncio.run(scenario())
+    assert failed_over == (SECONDARY, False)
+    assert client.get_host() == PRIMARY
+    assert client.is_host_healthy(PRIMARY) is True
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from backend.llm_scheduler import GenerationScheduler, Priority, QueueFullError
+
+HOST = "http://ollama:11434"
+
+
+def test_slots_are_handed_over_in_priority_order():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_depth=8)
+        await scheduler.acquire(HOST, Priority.PLAN)
+        served = []
+
+        async def wait_for_slot(name, priority):
+            await scheduler.acquire(HOST, priority)
+            served.append(name)
+            scheduler.release(HOST)
+
+        waiters = []
+        for name, priority in [("plan", Priority.PLAN), ("assessment", Priority.ASSESSMENT),
+                               ("chat-1", Priority.CHAT), ("chat-2", Priority.CHAT)]:
+            waiters.append(asyncio.create_task(wait_for_slot(name, priority)))
+            await asyncio.sleep(0)
+
+        assert scheduler.stats()["hosts"][HOST] == {"active": 1, "queued": 4, "avg_duration_seconds": 30.0}
+        scheduler.release(HOST)
+        await asyncio.gather(*waiters)
+        return scheduler, served
+
+    scheduler, served = asyncio.run(scenario())
+    # Priority first, FIFO within a class
+    assert served == ["chat-1", "chat-2", "assessment", "plan"]
+    assert scheduler.stats()["hosts"][HOST]["active"] == 0
+
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_depth=8)
+        await scheduler.acquire(HOST, Priority.PLAN)
+        cancelled = asyncio.create_task(scheduler.acquire(HOST, Priority.CHAT))
+        waiting = asyncio.create_task(scheduler.acquire(HOST, Priority.PLAN))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        scheduler.release(HOST)
+        await waiting
+        return scheduler.stats()["hosts"][HOST]
+
+    assert asyncio.run(scenario()) == {"active": 1, "queued": 0, "avg_duration_seconds": 30.0}
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_depth=2)
+        await scheduler.acquire(HOST, Priority.CHAT)
+        waiters = [asyncio.create_task(scheduler.acquire(HOST, Priority.PLAN)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(QueueFullError) as excinfo:
+            await scheduler.acquire(HOST, Priority.CHAT)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return scheduler, excinfo.value
+
+    scheduler, error = asyncio.run(scenario())
+    # Two queued plus the rejected request, at 30s each on one slot
+    assert error.retry_after == 90
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_slot_context_releases_on_error():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_depth=1)
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot(HOST, Priority.CHAT):
+                raise RuntimeError("generation failed")
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["hosts"][HOST]["active"] == 0
+    assert stats["completed"]["CHAT"] == 1
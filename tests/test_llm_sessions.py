@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend import llm_sessions, server
+from backend.chat_context import ConversationContext
+from backend.llm_client import OllamaClient
+from backend.llm_sessions import OllamaSessionStore
+
+HOST = "http://ollama-a:11434"
+OTHER_HOST = "http://ollama-b:11434"
+MODEL = "llama3:70b"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_sessions.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_session_is_evicted():
+    sessions = OllamaSessionStore(max_entries=2)
+    sessions.set("a", HOST, MODEL, [1], "ra")
+    sessions.set("b", HOST, MODEL, [2], "rb")
+    assert list(sessions.get("a", HOST, MODEL, "ra")) == [1]
+    sessions.set("c", HOST, MODEL, [3], "rc")
+
+    assert sessions.get("b", HOST, MODEL, "rb") is None
+    assert list(sessions.get("a", HOST, MODEL, "ra")) == [1]
+    assert list(sessions.get("c", HOST, MODEL, "rc")) == [3]
+    assert sessions.stats()["evictions"] == 1
+
+
+def test_expired_context_is_dropped(clock):
+    sessions = OllamaSessionStore(ttl_seconds=60)
+    sessions.set("a", HOST, MODEL, [1, 2], "ra")
+    clock[0] += 59
+    assert sessions.get("a", HOST, MODEL, "ra") is not None
+    clock[0] += 2
+    assert sessions.get("a", HOST, MODEL, "ra") is None
+    assert sessions.stats()["expirations"] == 1
+    assert sessions.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("host, model, last_message_id", [
+    (OTHER_HOST, MODEL, "ra"),
+    (HOST, "llama3:8b", "ra"),
+    (HOST, MODEL, "newer-message")
+])
+def test_context_from_another_host_model_or_turn_is_invalidated(host, model, last_message_id):
+    sessions = OllamaSessionStore()
+    sessions.set("a", HOST, MODEL, [1, 2], "ra")
+    assert sessions.get("a", host, model, last_message_id) is None
+    # The mismatch drops the entry, so it cannot be picked up later either
+    assert sessions.get("a", HOST, MODEL, "ra") is None
+    assert sessions.stats()["stale"] == 1
+
+
+def test_oversized_context_is_not_kept():
+    sessions = OllamaSessionStore(max_context_tokens=3)
+    sessions.set("a", HOST, MODEL, [1, 2], "ra")
+    sessions.set("a", HOST, MODEL, [1, 2, 3, 4], "rb")
+    assert sessions.get("a", HOST, MODEL, "rb") is None
+    assert sessions.stats()["oversized"] == 1
+
+
+class FakeOllama:
+    """Records /api/generate payloads; rejects continued contexts when asked to"""
+
+    def __init__(self, reject_context: bool = False):
+        self.reject_context = reject_context
+        self.payloads = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.payloads.append(payload)
+        if self.reject_context and "context" in payload:
+            return httpx.Response(500, text="invalid context")
+        return httpx.Response(200, json={"response": "Use nmap -sV.", "context": [7, 8, 9], "done": True})
+
+
+@pytest.fixture
+def tutor(monkeypatch):
+    """Point the tutor at a fake Ollama host with an empty session store"""
+    def install(fake: FakeOllama, host: str = HOST):
+        client = OllamaClient([host])
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+        sessions = OllamaSessionStore()
+        monkeypatch.setattr(server, "ollama_client", client)
+        monkeypatch.setattr(server, "ollama_sessions", sessions)
+        monkeypatch.setattr(server, "OLLAMA_MODEL", MODEL)
+        return sessions
+    return install
+
+
+def reply(last_message_id: str) -> str:
+    context = ConversationContext(recent=[("Student", "What is nmap?")], last_message_id=last_message_id)
+    return asyncio.run(server.generate_tutor_reply("s1", "FULL PROMPT", "And -sV?", context, "r2"))
+
+
+def test_current_context_sends_only_the_new_message(tutor):
+    fake = FakeOllama()
+    sessions = tutor(fake)
+    sessions.set("s1", HOST, MODEL, [1, 2, 3], "r1")
+
+    assert reply("r1") == "Use nmap -sV."
+    assert len(fake.payloads) == 1
+    assert fake.payloads[0]["context"] == [1, 2, 3]
+    assert fake.payloads[0]["prompt"] == server.build_chat_followup_prompt("And -sV?")
+    # The reply's context is kept for the turn after it
+    assert list(sessions.get("s1", HOST, MODEL, "r2")) == [7, 8, 9]
+
+
+@pytest.mark.parametrize("stored_host, last_message_id", [(HOST, "m5"), (OTHER_HOST, "r1")])
+def test_stale_context_falls_back_to_the_full_prompt(tutor, stored_host, last_message_id):
+    fake = FakeOllama()
+    sessions = tutor(fake)
+    sessions.set("s1", stored_host, MODEL, [1, 2, 3], "r1")
+
+    assert reply(last_message_id) == "Use nmap -sV."
+    assert [payload["prompt"] for payload in fake.payloads] == ["FULL PROMPT"]
+    assert "context" not in fake.payloads[0]
+    assert sessions.stats()["stale"] == 1
+
+
+def test_rejected_context_is_dropped_and_the_full_prompt_is_sent(tutor):
+    fake = FakeOllama(reject_context=True)
+    sessions = tutor(fake)
+    sessions.set("s1", HOST, MODEL, [1, 2, 3], "r1")
+
+    assert reply("r1") == "Use nmap -sV."
+    assert [payload.get("context") for payload in fake.payloads] == [[1, 2, 3], None]
+    assert fake.payloads[1]["prompt"] == "FULL PROMPT"
+    assert sessions.stats()["fallbacks"] == 1
+    assert list(sessions.get("s1", HOST, MODEL, "r2")) == [7, 8, 9]
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.mock_db import ASCENDING, DESCENDING, DocumentStore
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def plans():
+    """Plans with an unpartitioned created_at index and a hash index on user_id"""
+    store = DocumentStore("learning_plans", ["id", "user_id"], [("created_at", None)])
+    for number in range(20):
+        store.insert({
+            "id": f"p{number:02d}",
+            "user_id": f"u{number % 4}",
+            "created_at": START + timedelta(minutes=number)
+        })
+    return store
+
+
+@pytest.fixture
+def messages():
+    """Two chat sessions on a (timestamp, id) index partitioned by session_id"""
+    store = DocumentStore("chat_messages", ["id", "session_id"], [(("timestamp", "id"), "session_id")])
+    for number in range(10):
+        # Pairs of messages share a timestamp, so id breaks the tie
+        store.insert({"id": f"m{number}", "session_id": "s1", "timestamp": START + timedelta(seconds=number // 2)})
+        store.insert({"id": f"x{number}", "session_id": "s2", "timestamp": START})
+    return store
+
+
+def ids(documents):
+    return [document["id"] for document in documents]
+
+
+def never_walk(*args, **kwargs):
+    raise AssertionError("the sorted index should not be walked")
+
+
+def test_ascending_walk_slices_skip_and_limit(plans):
+    assert ids(plans.find_sorted({}, [("created_at", ASCENDING)], skip=3, limit=4)) == ["p03", "p04", "p05", "p06"]
+    assert ids(plans.find_sorted({}, [("created_at", ASCENDING)], skip=18)) == ["p18", "p19"]
+    assert plans.find_sorted({}, [("created_at", ASCENDING)], skip=25, limit=5) == []
+
+
+def test_descending_walk_slices_skip_and_limit(plans):
+    assert ids(plans.find_sorted({}, [("created_at", DESCENDING)], skip=2, limit=3)) == ["p17", "p16", "p15"]
+    assert ids(plans.find_sorted({}, [("created_at", DESCENDING)], skip=18)) == ["p01", "p00"]
+    assert plans.find_sorted({}, [("created_at", DESCENDING)], skip=25, limit=5) == []
+
+
+def test_range_on_the_sort_field_is_bisected(plans):
+    query = {"created_at": {"$gte": START + timedelta(minutes=5), "$lt": START + timedelta(minutes=9)}}
+    assert ids(plans.find_sorted(query, [("created_at", ASCENDING)])) == ["p05", "p06", "p07", "p08"]
+    assert ids(plans.find_sorted(query, [("created_at", DESCENDING)], skip=1, limit=2)) == ["p07", "p06"]
+    assert plans.find_sorted({"created_at": {"$gt": START + timedelta(days=1)}}, [("created_at", ASCENDING)]) == []
+
+
+def test_residual_conditions_are_filtered_during_the_walk(plans):
+    query = {"created_at": {"$gt": START + timedelta(minutes=3)}, "id": {"$in": ["p01", "p05", "p09", "p13"]}}
+    assert ids(plans.find_sorted(query, [("created_at", DESCENDING)], skip=1, limit=2)) == ["p09", "p05"]
+
+
+def test_selective_hash_equality_is_preferred_over_an_unpartitioned_walk(plans, monkeypatch):
+    monkeypatch.setattr(plans, "_walk_sorted_index", never_walk)
+    page = plans.find_sorted({"user_id": "u1"}, [("created_at", DESCENDING)], limit=3)
+    assert ids(page) == ["p17", "p13", "p09"]
+    assert ids(plans.find_sorted({"user_id": "u1"}, [("created_at", ASCENDING)], skip=3)) == ["p13", "p17"]
+
+
+def test_partition_walk_orders_ties_by_the_second_field(messages):
+    page = messages.find_sorted({"session_id": "s1"}, [("timestamp", ASCENDING), ("id", ASCENDING)], skip=1, limit=4)
+    assert ids(page) == ["m1", "m2", "m3", "m4"]
+    page = messages.find_sorted({"session_id": "s2"}, [("timestamp", DESCENDING), ("id", DESCENDING)], limit=3)
+    assert ids(page) == ["x9", "x8", "x7"]
+
+
+def test_partition_walk_resumes_from_a_compound_keyset(messages):
+    cursor = START + timedelta(seconds=2)
+    query = {
+        "session_id": "s1",
+        "timestamp": {"$gte": cursor},
+        "$or": [{"timestamp": {"$gt": cursor}}, {"id": {"$gt": "m4"}}]
+    }
+    assert ids(messages.find_sorted(query, [("timestamp", ASCENDING), ("id", ASCENDING)], limit=3)) == ["m5", "m6", "m7"]
+
+
+def test_partition_is_walked_when_the_hash_bucket_is_no_smaller(messages, monkeypatch):
+    walked = []
+    walk = messages._walk_sorted_index
+    monkeypatch.setattr(messages, "_walk_sorted_index", lambda *args: walked.append(True) or walk(*args))
+    messages.find_sorted({"session_id": "s1"}, [("timestamp", ASCENDING), ("id", ASCENDING)], limit=2)
+    assert walked == [True]
+
+
+def test_point_lookup_inside_a_partition_uses_the_hash_index(messages, monkeypatch):
+    monkeypatch.setattr(messages, "_walk_sorted_index", never_walk)
+    page = messages.find_sorted({"session_id": "s1", "id": "m3"}, [("timestamp", ASCENDING), ("id", ASCENDING)])
+    assert ids(page) == ["m3"]
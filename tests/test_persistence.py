@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from backend import mock_db
+from backend.mock_db import DocumentStore
+from backend.persistence import SNAPSHOT_FILE, DurableJournal, JournalCorruptError
+
+STARTED = datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+class Stores(dict):
+    """Collection name -> DocumentStore, created on first use like mock_db.get_store"""
+
+    def get_store(self, name):
+        if name not in self:
+            self[name] = DocumentStore(name, ["id"])
+        return self[name]
+
+
+@pytest.fixture
+def journaled(monkeypatch):
+    """Route DocumentStore writes to a journal, as enable_persistence does"""
+    def attach(journal):
+        monkeypatch.setattr(mock_db, "journal", journal)
+    yield attach
+
+
+def recover(data_dir):
+    """Start a fresh process' view of the data directory"""
+    stores = Stores()
+    journal = DurableJournal(str(data_dir))
+    journal.load(stores, stores.get_store)
+    return journal, stores
+
+
+def documents(stores, name):
+    return sorted(stores.get_store(name).documents.values(), key=lambda document: document["id"])
+
+
+def test_wal_replay_after_crash(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    sessions = stores.get_store("learning_sessions")
+    first = sessions.insert({"id": "s1", "status": "active", "started_at": STARTED})
+    second = sessions.insert({"id": "s2", "status": "active", "started_at": STARTED})
+    sessions.set_fields(first, {"status": "completed"})
+    sessions.remove(second)
+    # Crash: the process dies without closing the journal
+
+    _, recovered = recover(tmp_path)
+    assert documents(recovered, "learning_sessions") == [{"id": "s1", "status": "completed", "started_at": STARTED}]
+    assert isinstance(documents(recovered, "learning_sessions")[0]["started_at"], datetime)
+
+
+def test_torn_final_record_is_discarded_and_later_writes_survive(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    stores.get_store("chat_messages").insert({"id": "m1", "text": "hello"})
+    # Crash in the middle of writing the next record
+    journal._wal.write('{"op":"i","c":"chat_messages","k":1,"d":{"id":"m2"')
+    journal._wal.flush()
+
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    assert documents(stores, "chat_messages") == [{"id": "m1", "text": "hello"}]
+    stores.get_store("chat_messages").insert({"id": "m3", "text": "after recovery"})
+
+    _, recovered = recover(tmp_path)
+    assert documents(recovered, "chat_messages") == [
+        {"id": "m1", "text": "hello"},
+        {"id": "m3", "text": "after recovery"}
+    ]
+
+
+def test_corrupt_record_before_the_end_refuses_to_start(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    messages = stores.get_store("chat_messages")
+    for number in range(3):
+        messages.insert({"id": f"m{number}", "text": "hello"})
+    path = journal._wal_path(journal.generation)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(lines[0] + b'{"op":"i","c":"chat_mes\n' + lines[2])
+
+    with pytest.raises(JournalCorruptError, match="byte"):
+        recover(tmp_path)
+    # Nothing was cut off, so the file can still be repaired by hand
+    assert path.read_bytes().endswith(lines[2])
+
+
+def test_corrupt_record_in_an_older_generation_refuses_to_start(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    stores.get_store("chat_messages").insert({"id": "m1", "text": "hello"})
+    older = journal._wal_path(journal.generation)
+    journal._open_wal(journal.generation + 1)
+    stores.get_store("chat_messages").insert({"id": "m2", "text": "newer"})
+    # A torn tail in a generation that was rotated away is not a crash mid-write
+    with open(older, "a", encoding="utf-8") as wal:
+        wal.write('{"op":"s","c":"chat_messages"')
+
+    with pytest.raises(JournalCorruptError):
+        recover(tmp_path)
+
+
+def test_wal_size_is_counted_in_bytes(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    stores.get_store("chat_messages").insert({"id": "m1", "text": "Привет, 世界"})
+    assert journal._wal_bytes == journal._wal_path(journal.generation).stat().st_size
+
+
+def test_snapshot_and_compaction_round_trip(tmp_path, journaled):
+    journal, stores = recover(tmp_path)
+    journaled(journal)
+    plans = stores.get_store("learning_plans")
+    for number in range(3):
+        plans.insert({"id": f"p{number}", "title": f"Plan {number}", "created_at": STARTED})
+    covered = journal.generation
+
+    asyncio.run(journal.compact(stores))
+    assert (tmp_path / SNAPSHOT_FILE).exists()
+    assert not journal._wal_path(covered).exists()
+
+    # Writes after the snapshot land in the next WAL generation
+    plans.set_fields(0, {"title": "Renamed"})
+    plans.remove(2)
+    plans.insert({"id": "p3", "title": "Plan 3", "created_at": STARTED})
+
+    _, recovered = recover(tmp_path)
+    assert documents(recovered, "learning_plans") == [
+        {"id": "p0", "title": "Renamed", "created_at": STARTED},
+        {"id": "p1", "title": "Plan 1", "created_at": STARTED},
+        {"id": "p3", "title": "Plan 3", "created_at": STARTED}
+    ]
+    # Document keys continue after the replayed ones, so new inserts never collide
+    assert recovered.get_store("learning_plans")._next_key == 4
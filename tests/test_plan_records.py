@@ -0,0 +1,87 @@
+import asyncio
+import copy
+from datetime import datetime
+
+import pytest
+
+from backend.server import backfill_plan_records, db, store_plan_content
+
+
+@pytest.fixture
+def plan(client):
+    response = client.post("/api/generate-learning-plan", json={"topic": "network-security", "level": "beginner"})
+    assert response.status_code == 200
+    plan_id = response.json()["plan_id"]
+    return client.get(f"/api/learning-plans/{plan_id}").json()
+
+
+def count(collection, plan_id):
+    return asyncio.run(collection.count_documents({"plan_id": plan_id}))
+
+
+def test_chapter_endpoint_matches_the_hydrated_plan(client, plan):
+    for chapter in plan["chapters"]:
+        response = client.get(f"/api/learning-plans/{plan['id']}/chapter/{chapter['id']}")
+        assert response.status_code == 200
+        assert response.json() == chapter
+
+
+def test_section_endpoint_matches_the_hydrated_plan(client, plan):
+    section = plan["chapters"][0]["sections"][0]
+    response = client.get(f"/api/learning-plans/{plan['id']}/section/{section['id']}")
+    assert response.status_code == 200
+    assert response.json() == section
+    assert "code_examples" in section
+
+
+def test_missing_section_chapter_or_plan_is_404(client, plan):
+    response = client.get(f"/api/learning-plans/{plan['id']}/section/99.9")
+    assert (response.status_code, response.json()["detail"]) == (404, "Section not found")
+    response = client.get(f"/api/learning-plans/{plan['id']}/chapter/99")
+    assert (response.status_code, response.json()["detail"]) == (404, "Chapter not found")
+    response = client.get("/api/learning-plans/missing/section/1.1")
+    assert (response.status_code, response.json()["detail"]) == (404, "Learning plan not found")
+
+
+def test_storing_content_again_replaces_stale_sections(client, plan):
+    chapters = copy.deepcopy(plan["chapters"][:1])
+    removed = chapters[0]["sections"].pop()["id"]
+    chapters[0]["sections"][0]["content"] = "Rewritten"
+    asyncio.run(store_plan_content(plan["id"], chapters))
+
+    assert count(db.plan_chapters, plan["id"]) == 1
+    assert count(db.plan_sections, plan["id"]) == len(chapters[0]["sections"])
+    assert client.get(f"/api/learning-plans/{plan['id']}/section/{removed}").status_code == 404
+    chapter = client.get(f"/api/learning-plans/{plan['id']}/chapter/{chapters[0]['id']}").json()
+    assert chapter == chapters[0]
+
+
+def test_backfill_creates_records_once(client, empty_db):
+    now = datetime.utcnow()
+    chapters = [{"id": "1", "title": "Basics", "sections": [
+        {"id": "1.1", "title": "Intro", "content": "Firewalls", "code_examples": ["iptables -L"]},
+        {"id": "1.2", "title": "More", "content": "Routing"}
+    ]}]
+    asyncio.run(db.learning_plans.insert_one({
+        "id": "legacy", "topic": "network-security", "level": "beginner", "duration_weeks": 8,
+        "curriculum": "...", "table_of_contents": {"total_chapters": 1}, "chapters": chapters,
+        "created_at": now, "updated_at": now
+    }))
+
+    assert asyncio.run(backfill_plan_records()) == 1
+    assert asyncio.run(backfill_plan_records()) == 0
+    assert count(db.plan_chapters, "legacy") == 1
+    assert count(db.plan_sections, "legacy") == 2
+    assert asyncio.run(db.plan_summaries.count_documents({"id": "legacy"})) == 1
+    assert client.get("/api/learning-plans/legacy/chapter/1").json()["sections"] == chapters[0]["sections"]
+
+
+def test_delete_leaves_no_orphaned_records(client, plan):
+    assert count(db.plan_sections, plan["id"]) > 0
+    assert client.delete(f"/api/learning-plans/{plan['id']}").status_code == 200
+
+    assert count(db.plan_chapters, plan["id"]) == 0
+    assert count(db.plan_sections, plan["id"]) == 0
+    assert asyncio.run(db.plan_summaries.count_documents({"id": plan["id"]})) == 0
+    assert client.get(f"/api/learning-plans/{plan['id']}/chapter/1").status_code == 404
+    assert client.delete(f"/api/learning-plans/{plan['id']}").status_code == 404
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from backend.server import LearningPlanRequest, save_learning_plan
+
+
+@pytest.fixture
+def plan_ids(client):
+    """Three saved plans, oldest first; generation itself is not under test here"""
+    ids = []
+    for topic in ("network-security", "ethical-hacking", "cloud-security"):
+        request = LearningPlanRequest(topic=topic, level="beginner")
+        ids.append(asyncio.run(save_learning_plan(request, f"Curriculum for {topic}", "")).plan_id)
+    return ids
+
+
+def listing(client, **params):
+    response = client.get("/api/learning-plans", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_listing_serves_summaries_newest_first(client, plan_ids):
+    body = listing(client, limit=2, offset=0)
+    assert body["total"] == 3
+    assert [plan["id"] for plan in body["plans"]] == plan_ids[:0:-1]
+    summary = body["plans"][0]
+    assert summary["topic"] == "cloud-security"
+    assert summary["total_chapters"] > 0 and summary["total_sections"] > 0
+    # Summaries never carry the plan's content
+    assert not {"curriculum", "chapters", "table_of_contents"} & set(summary)
+    assert [plan["id"] for plan in listing(client, limit=2, offset=2)["plans"]] == plan_ids[:1]
+
+
+def test_fields_select_a_projection_that_always_includes_id(client, plan_ids):
+    plans = listing(client, fields="topic, approved")["plans"]
+    assert len(plans) == 3
+    assert all(set(plan) == {"id", "topic", "approved"} for plan in plans)
+
+
+def test_unknown_fields_are_rejected(client, plan_ids):
+    response = client.get("/api/learning-plans", params={"fields": "topic,curriculum,secret"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown plan summary fields: curriculum, secret"
+
+
+def test_approvals_are_mirrored_into_the_summary(client, plan_ids):
+    plan_id = plan_ids[0]
+    assert client.post(f"/api/approve-toc/{plan_id}").status_code == 200
+    assert client.post(f"/api/approve-learning-plan/{plan_id}").status_code == 200
+
+    summaries = {plan["id"]: plan for plan in listing(client, fields="approved,toc_approved,updated_at")["plans"]}
+    assert summaries[plan_id]["approved"] is True
+    assert summaries[plan_id]["toc_approved"] is True
+    assert summaries[plan_ids[1]]["approved"] is False
+    plan = client.get(f"/api/learning-plans/{plan_id}").json()
+    assert summaries[plan_id]["updated_at"] == plan["updated_at"]
+
+    assert client.post(f"/api/approve-learning-plan/{plan_id}", params={"approved": False}).status_code == 200
+    assert listing(client, fields="approved")["plans"][-1] == {"id": plan_id, "approved": False}
+
+
+def test_approving_a_missing_plan_creates_no_summary(client, plan_ids):
+    assert client.post("/api/approve-learning-plan/missing").status_code == 404
+    assert listing(client)["total"] == 3
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend import mock_db
+from backend.mock_db import MockCollection, matches_query
+from backend.sqlite_store import SQLiteDB
+
+COLLECTION = "query_translation"
+BASE = datetime(2024, 5, 1, 9, 0, tzinfo=timezone.utc)
+
+# Whole seconds and fractional ones: isoformat() omits a zero microsecond
+# part, which the SQL text comparison must still order correctly
+DOCUMENTS = [
+    {"id": f"m{number}", "session_id": "a" if number % 2 else "b", "position": number,
+     "timestamp": BASE + timedelta(seconds=number // 2, microseconds=250000 * (number % 2))}
+    for number in range(10)
+] + [
+    {"id": "untimed", "session_id": "a", "position": 10},
+    {"id": "empty", "session_id": "b", "position": 11, "timestamp": None}
+]
+
+QUERIES = [
+    {"timestamp": {"$gt": BASE + timedelta(seconds=2)}},
+    {"timestamp": {"$lt": BASE + timedelta(seconds=2, microseconds=250000)}},
+    {"timestamp": {"$gte": BASE + timedelta(seconds=1), "$lte": BASE + timedelta(seconds=3)}},
+    {"session_id": "a", "timestamp": {"$gt": BASE, "$lt": BASE + timedelta(seconds=4)}},
+    {"timestamp": {"$in": [BASE, BASE + timedelta(seconds=3, microseconds=250000)]}},
+    {"session_id": {"$in": ["a"]}, "position": {"$gte": 3}},
+    {"id": {"$in": []}},
+    {"position": {"$in": [1, 4, 11]}, "timestamp": {"$lt": BASE + timedelta(seconds=4)}},
+    {"session_id": "b", "timestamp": {"$gte": BASE + timedelta(seconds=2)}, "$or": [
+        {"timestamp": {"$gt": BASE + timedelta(seconds=2)}},
+        {"timestamp": BASE + timedelta(seconds=2), "id": {"$gt": "m3"}}
+    ]}
+]
+
+
+def expected_ids(query):
+    return sorted(document["id"] for document in DOCUMENTS if matches_query(document, query))
+
+
+async def found_ids(collection, query):
+    return sorted(document["id"] for document in await collection.find(query, {"_id": 0}).to_list(None))
+
+
+@pytest.fixture
+def memory_collection():
+    collection = MockCollection(COLLECTION)
+    asyncio.run(collection.insert_many([dict(document) for document in DOCUMENTS]))
+    yield collection
+    mock_db.in_memory_db.pop(COLLECTION, None)
+
+
+@pytest.fixture
+def sqlite_collection(tmp_path):
+    database = SQLiteDB(str(tmp_path / "store.db"))
+    collection = database[COLLECTION]
+    asyncio.run(collection.insert_many([dict(document) for document in DOCUMENTS]))
+    yield collection
+    database.close()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_memory_backend_matches_query(memory_collection, query):
+    assert asyncio.run(found_ids(memory_collection, query)) == expected_ids(query)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_sqlite_backend_matches_query(sqlite_collection, query):
+    assert asyncio.run(found_ids(sqlite_collection, query)) == expected_ids(query)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_sqlite_translates_conditions_to_sql(sqlite_collection, query):
+    _, _, residual = sqlite_collection._where(query)
+    assert residual == {}
+
+
+def test_sqlite_sorted_range_page(sqlite_collection):
+    query = {"session_id": "a", "timestamp": {"$gt": BASE}}
+    cursor = sqlite_collection.find(query, {"_id": 0}).sort("timestamp", -1).limit(3)
+    page = asyncio.run(cursor.to_list(None))
+    assert [document["id"] for document in page] == ["m9", "m7", "m5"]
+    assert all(isinstance(document["timestamp"], datetime) for document in page)
+
+
+def test_unsupported_operator_is_rejected():
+    with pytest.raises(ValueError):
+        matches_query(DOCUMENTS[0], {"id": {"$regex": "^m"}})
+
+
+def test_not_equal_on_array_field_matches_on_both_backends(sqlite_collection, memory_collection):
+    progress = [{"id": "u1", "achievements": ["plan_approved"]}, {"id": "u2", "achievements": []}, {"id": "u3"}]
+    query = {"achievements": {"$ne": "plan_approved"}}
+    for collection in (memory_collection, sqlite_collection):
+        asyncio.run(collection.delete_many({}))
+        asyncio.run(collection.insert_many([dict(document) for document in progress]))
+        assert asyncio.run(found_ids(collection, query)) == ["u2", "u3"]
+
+
+def test_none_matches_missing_fields_on_both_backends(sqlite_collection, memory_collection):
+    query = {"session_id": "a", "timestamp": None}
+    assert expected_ids(query) == ["untimed"]
+    for collection in (memory_collection, sqlite_collection):
+        assert asyncio.run(found_ids(collection, {"timestamp": None})) == ["empty", "untimed"]
+        assert asyncio.run(found_ids(collection, query)) == ["untimed"]
@@ -0,0 +1,105 @@
+import gzip
+import json
+import uuid
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import List, Optional
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from backend import responses
+from backend.responses import FastJSONResponse, RenderedDocument, dump_json, etag_matches, make_etag, not_modified
+
+DOCUMENT = {"chapters": [{"title": f"Chapter {number}", "content": "Defense in depth " * 40} for number in range(5)]}
+ETAG = make_etag("learning_plan", "p1", "2024-05-01T12:00:00")
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_each_content_coding_gets_its_own_etag():
+    document = RenderedDocument.build(DOCUMENT)
+    compressed = document.response(request(accept_encoding="gzip"), headers={"ETag": ETAG})
+    identity = document.response(request(accept_encoding="identity"), headers={"ETag": ETAG})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == ETAG[:-1] + '-gzip"'
+    assert gzip.decompress(compressed.body) == identity.body
+    assert identity.headers["etag"] == ETAG
+    assert "content-encoding" not in identity.headers
+    assert compressed.headers["vary"] == identity.headers["vary"] == "Accept-Encoding"
+
+
+def test_variant_tags_of_the_same_version_match():
+    gzip_tag = ETAG[:-1] + '-gzip"'
+    assert etag_matches(request(if_none_match=ETAG), ETAG) == ETAG
+    assert etag_matches(request(if_none_match=f'"stale", W/{gzip_tag}'), ETAG) == gzip_tag
+    assert etag_matches(request(if_none_match=ETAG[:-1] + '-br"'), ETAG) == ETAG[:-1] + '-br"'
+    assert etag_matches(request(if_none_match="*"), ETAG) == ETAG
+
+
+def test_other_versions_do_not_match():
+    other = make_etag("learning_plan", "p1", "2024-05-02T08:00:00")
+    assert etag_matches(request(if_none_match=other[:-1] + '-gzip"'), ETAG) is None
+    assert etag_matches(request(if_none_match=ETAG[:-1] + '-zstd"'), ETAG) is None
+    assert etag_matches(request(), ETAG) is None
+
+
+def test_not_modified_varies_like_the_full_response():
+    response = not_modified(ETAG, "private, no-cache")
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == ETAG
+
+
+class Level(str, Enum):
+    BEGINNER = "beginner"
+
+
+class Section(BaseModel):
+    id: uuid.UUID
+    title: str
+    published: date
+
+
+class Chapter(BaseModel):
+    title: str
+    level: Level
+    sections: List[Section]
+    reviewed_at: Optional[datetime] = None
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """Run a test with orjson (when installed) and with the standard library fallback"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def test_fast_json_response_matches_jsonable_encoder(encoder):
+    section = Section(id=uuid.UUID("12345678-1234-5678-1234-567812345678"), title="Ports", published=date(2024, 5, 1))
+    content = {
+        "chapter": Chapter(title="Basics", level=Level.BEGINNER, sections=[section],
+                           reviewed_at=datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)),
+        "created_at": datetime(2024, 5, 1, 12, 30),
+        "updated_at": datetime(2024, 5, 2, 8, 0, 0, 1),
+        "session_id": uuid.UUID("87654321-4321-8765-4321-876543218765"),
+        "scores": [1, 2.5, None, True],
+        "note": "Défense — réseau"
+    }
+    fast = json.loads(FastJSONResponse(content).body)
+    assert fast == json.loads(JSONResponse(jsonable_encoder(content)).body)
+
+
+def test_non_finite_floats_are_written_as_null_by_either_encoder(encoder):
+    content = {"score": float("nan"), "bounds": [float("-inf"), 1.5, float("inf")]}
+    assert json.loads(dump_json(content)) == {"score": None, "bounds": [None, 1.5, None]}
@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend import server
+from backend.llm_cache import LLMResponseCache
+from backend.llm_client import OllamaError
+from backend.llm_sessions import OllamaSessionStore
+from backend.server import LearningPlanRequest, db, save_learning_plan
+
+HOST = "http://ollama-a:11434"
+
+
+class StubOllama:
+    """Stands in for the shared Ollama client: streams the given tokens, then fails or finishes"""
+
+    def __init__(self, tokens, failure=None):
+        self.tokens = tokens
+        self.failure = failure
+        self.prompts = []
+        self.failed_hosts = []
+
+    def get_host(self):
+        return HOST
+
+    def report_failure(self, host):
+        self.failed_hosts.append(host)
+
+    async def stream_generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        for token in self.tokens:
+            yield {"response": token, "done": False}
+            await asyncio.sleep(0)
+        if self.failure is not None:
+            raise self.failure
+        yield {"response": "", "done": True, "context": [1, 2, 3]}
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Route generations to a stub upstream, with empty response and context caches"""
+    def install(tokens, failure=None):
+        stub = StubOllama(tokens, failure)
+        monkeypatch.setattr(server, "MOCK_OLLAMA", False)
+        monkeypatch.setattr(server, "ollama_client", stub)
+        monkeypatch.setattr(server, "llm_cache", LLMResponseCache(enabled=True))
+        monkeypatch.setattr(server, "ollama_sessions", OllamaSessionStore())
+        return stub
+    return install
+
+
+def events(response):
+    """(event, data) pairs of a Server-Sent Events body"""
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    frames = []
+    for frame in response.text.split("\n\n"):
+        if not frame:
+            continue
+        event, data = frame.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        frames.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    assert response.text.endswith("\n\n")
+    return frames
+
+
+@pytest.fixture
+def session_id(client):
+    request = LearningPlanRequest(topic="network-security", level="beginner")
+    plan_id = asyncio.run(save_learning_plan(request, "Curriculum", "")).plan_id
+    return client.post("/api/start-learning-session", params={"plan_id": plan_id}).json()["session_id"]
+
+
+def stream_plan(client):
+    return client.post("/api/generate-learning-plan/stream", json={"topic": "network-security", "level": "beginner"})
+
+
+def test_plan_stream_sends_tokens_then_a_done_event(client, ollama):
+    ollama(["Week 1: ", "Networking ", "basics."])
+    frames = events(stream_plan(client))
+
+    assert frames[:-1] == [("token", {"token": token}) for token in ["Week 1: ", "Networking ", "basics."]]
+    event, done = frames[-1]
+    assert event == "done"
+    assert done["success"] is True
+    plan = client.get(f"/api/learning-plans/{done['plan_id']}").json()
+    assert plan["curriculum"] == "Week 1: Networking basics."
+
+
+def test_plan_stream_reports_an_upstream_failure_as_an_error_event(client, ollama):
+    stub = ollama(["Week 1: ", "Networking "], failure=OllamaError(500, "model crashed"))
+    frames = events(stream_plan(client))
+
+    assert [event for event, _ in frames] == ["token", "token", "error"]
+    assert frames[-1][1]["status_code"] == 500
+    assert "model crashed" in frames[-1][1]["detail"]
+    # Nothing was saved or cached, so a retry generates again
+    assert asyncio.run(db.plan_summaries.count_documents({})) == 0
+    stub.failure = None
+    assert events(stream_plan(client))[-1][0] == "done"
+    assert len(stub.prompts) == 2
+
+
+def test_lost_connection_mid_stream_is_a_503_error_event(client, ollama):
+    stub = ollama(["Week 1: "], failure=httpx.ReadError("connection reset"))
+    frames = events(stream_plan(client))
+
+    assert frames[-1][0] == "error"
+    assert frames[-1][1]["status_code"] == 503
+    assert stub.failed_hosts == [HOST]
+
+
+def test_chat_stream_saves_the_reply_and_ends_with_done(client, ollama, session_id):
+    ollama(["Use ", "nmap -sV."])
+    response = client.post("/api/chat-with-ai/stream", params={"session_id": session_id, "message": "How do I scan?"})
+    frames = events(response)
+
+    assert frames[:-1] == [("token", {"token": "Use "}), ("token", {"token": "nmap -sV."})]
+    event, done = frames[-1]
+    assert event == "done"
+    assert done["ai_response"] == "Use nmap -sV."
+    history = client.get(f"/api/chat-history/{session_id}").json()["messages"]
+    assert [(message["sender"], message["message"]) for message in history] == [
+        ("user", "How do I scan?"), ("ai", "Use nmap -sV.")
+    ]
+    assert history[-1]["id"] == done["message_id"]
+
+
+def test_chat_stream_failure_is_an_error_event_and_saves_no_reply(client, ollama, session_id):
+    ollama(["Use "], failure=OllamaError(500, "out of memory"))
+    response = client.post("/api/chat-with-ai/stream", params={"session_id": session_id, "message": "How do I scan?"})
+    frames = events(response)
+
+    assert [event for event, _ in frames] == ["token", "error"]
+    assert frames[-1][1]["status_code"] == 500
+    history = client.get(f"/api/chat-history/{session_id}").json()["messages"]
+    assert [message["sender"] for message in history] == ["user"]
+
+
+def test_chat_stream_for_a_missing_session_is_404_before_streaming(client, ollama):
+    response = client.post("/api/chat-with-ai/stream", params={"session_id": "missing", "message": "Hi"})
+    assert response.status_code == 404
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend.uploads import receive_file
+
+BOUNDARY = "----cvupload"
+CHUNK = 16 * 1024
+
+
+def part(name, content, filename=None, content_type=None):
+    disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+    headers = f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+    if content_type:
+        headers += f"Content-Type: {content_type}\r\n"
+    return headers.encode() + b"\r\n" + content + b"\r\n"
+
+
+def multipart(*parts):
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+class StreamedRequest:
+    """A request whose body arrives in CHUNK-sized messages, counting how many were read"""
+
+    def __init__(self, body, declare_length=True):
+        self.chunks = [body[offset:offset + CHUNK] for offset in range(0, len(body), CHUNK)]
+        self.read = 0
+        headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+        if declare_length:
+            headers.append((b"content-length", str(len(body)).encode()))
+        self.request = Request({"type": "http", "method": "POST", "headers": headers}, self.receive)
+
+    async def receive(self):
+        self.read += 1
+        more_body = self.read < len(self.chunks)
+        return {"type": "http.request", "body": self.chunks[self.read - 1], "more_body": more_body}
+
+
+def receive(streamed, **limits):
+    limits.setdefault("max_bytes", 64 * 1024)
+    return asyncio.run(receive_file(streamed.request, "file", **limits))
+
+
+def test_file_field_is_received_and_other_fields_skipped():
+    content = b"%PDF-1.7 " + b"x" * 40000
+    streamed = StreamedRequest(multipart(
+        part("note", b"ignored"),
+        part("file", content, "cv.pdf", "application/pdf")
+    ))
+    received = receive(streamed, allowed_types=["application/pdf"])
+    try:
+        assert (received.filename, received.content_type, received.size) == ("cv.pdf", "application/pdf", len(content))
+        assert received.file.read() == content
+    finally:
+        received.close()
+
+
+def test_declared_length_over_limit_is_rejected_before_reading():
+    streamed = StreamedRequest(multipart(part("file", b"x" * 200000, "cv.pdf", "application/pdf")))
+    with pytest.raises(HTTPException) as excinfo:
+        receive(streamed, too_large_detail="File too large")
+    assert (excinfo.value.status_code, excinfo.value.detail) == (400, "File too large")
+    assert streamed.read == 0
+
+
+def test_streamed_part_over_limit_stops_reading_the_body():
+    streamed = StreamedRequest(multipart(part("file", b"x" * 1024 * 1024, "cv.pdf", "application/pdf")),
+                               declare_length=False)
+    with pytest.raises(HTTPException) as excinfo:
+        receive(streamed)
+    assert excinfo.value.status_code == 400
+    # Rejected once the part crossed 64KB, long before the 1MB body was read
+    assert streamed.read <= 64 * 1024 // CHUNK + 2
+    assert streamed.read < len(streamed.chunks)
+
+
+def test_wrong_type_is_rejected_before_the_file_data():
+    streamed = StreamedRequest(multipart(part("file", b"MZ" + b"\0" * 60000, "cv.exe", "application/x-msdownload")))
+    with pytest.raises(HTTPException) as excinfo:
+        receive(streamed, allowed_types=["application/pdf"], invalid_type_detail="Invalid file type")
+    assert (excinfo.value.status_code, excinfo.value.detail) == (400, "Invalid file type")
+    assert streamed.read == 1
+
+
+def test_missing_field_is_reported():
+    streamed = StreamedRequest(multipart(part("resume", b"text", "cv.txt", "text/plain")))
+    with pytest.raises(HTTPException) as excinfo:
+        receive(streamed)
+    assert excinfo.value.detail == "Missing file field 'file'"